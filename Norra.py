@@ -67,7 +67,7 @@ def run_historical_fetch():
         else:
             print(f"Failed to fetch historical data for League ID {league_id}.")
 
-def fetch_predictions(api_key=None, dry_run=False):
+def fetch_predictions(api_key=None, dry_run=False, force=False):
     print("Running predictions engine (Local DB + ESPN mode)...")
     
     # 1. Fetch today's fixtures using free ESPN scoreboard API first
@@ -82,6 +82,28 @@ def fetch_predictions(api_key=None, dry_run=False):
         print("No matches found on ESPN Scoreboard today.")
         return
 
+    # Stable ids (same fixture -> same id on every run), so fixtures predicted earlier are skipped
+    from fixture_ids import register_fixtures, stable_team_id
+    try:
+        fixture_ids = register_fixtures(raw_fixtures)
+    except Exception as e:
+        print(f"Failed to resolve fixture ids: {e}")
+        return
+    db = SessionLocal()
+    try:
+        predicted = set(val[0] for val in db.query(Prediction.fixture_id).filter(Prediction.fixture_id.in_(fixture_ids)).all())
+    finally:
+        db.close()
+    if force:
+        predicted = set()
+    pending = [(fid, f) for fid, f in zip(fixture_ids, raw_fixtures) if fid not in predicted]
+    if predicted:
+        print(f"{len(raw_fixtures) - len(pending)} of {len(raw_fixtures)} fixtures already predicted. Skipping them.")
+    if not pending:
+        print("All of today's fixtures are already predicted. Nothing to do.")
+        return
+    raw_fixtures = [f for _, f in pending]
+
     # Extract active league IDs from today's fixtures
     active_leagues = list(set([f["league_id"] for f in raw_fixtures if f.get("league_id")]))
     print(f"Active leagues with matches today: {active_leagues}")
@@ -93,12 +115,17 @@ def fetch_predictions(api_key=None, dry_run=False):
     except Exception as e:
         print(f"Failed to update active season matches: {e}")
 
-    # 3. ML models are loaded/trained dynamically per-league in the prediction engine
+    # 3. Train every active league whose cached model is missing or stale, concurrently, before predicting
+    try:
+        from model_training import train_stale_models
+        train_stale_models(active_leagues)
+    except Exception as e:
+        print(f"Up-front model training failed, leagues will train on demand: {e}")
     model = None
 
     # 4. Convert ESPN fixtures to mock API-Football dictionary format
     fixtures = []
-    for f in raw_fixtures:
+    for fixture_id, f in pending:
         season_val = 2025
         for l in leagues:
             if l["league_id"] == f["league_id"]:
@@ -107,7 +134,7 @@ def fetch_predictions(api_key=None, dry_run=False):
         
         mocked_fixture = {
             "fixture": {
-                "id": hash(f"{f['home']}_{f['away']}_{f['league_id']}") % 10000000,
+                "id": fixture_id,
                 "date": f.get("date"),
                 "venue": {
                     "name": "Main Stadium",
@@ -121,11 +148,11 @@ def fetch_predictions(api_key=None, dry_run=False):
             },
             "teams": {
                 "home": {
-                    "id": hash(f['home']) % 10000,
+                    "id": stable_team_id(f['home']),
                     "name": f['home']
                 },
                 "away": {
-                    "id": hash(f['away']) % 10000,
+                    "id": stable_team_id(f['away']),
                     "name": f['away']
                 }
             },
@@ -185,10 +212,13 @@ def generate_predictions(fixtures, api_key, model=None):
     """
     Richer prediction generation using local DB stats and ML.
     """
-    from prediction_model import get_match_prediction
+    from prediction_model import predict_batch
     predictions = {}
 
-    for fixture in fixtures:
+    # Get Hybrid ML + Rule-Engine Predictions locally, batched per league
+    detailed_batch = predict_batch(fixtures, None, model=model)
+
+    for fixture, detailed_data in zip(fixtures, detailed_batch):
         fixture_id = fixture['fixture']['id']
         home_team = fixture['teams']['home']['name']
         away_team = fixture['teams']['away']['name']
@@ -200,9 +230,6 @@ def generate_predictions(fixtures, api_key, model=None):
         gg_outcome = "N/A"
         ou_outcome = "N/A"
 
-        # Get Hybrid ML + Rule-Engine Prediction locally
-        detailed_data = get_match_prediction(fixture, None, model=model)
-        
         if detailed_data.get("main") == "Skipped - Insufficient Data":
             print(f"Skipping match {home_team} vs {away_team} due to insufficient database records.")
             continue
@@ -689,6 +716,7 @@ if __name__ == "__main__":
     import datetime
     
     dry_run = "--dry-run" in sys.argv
+    force = "--force" in sys.argv # Re-predict fixtures that already have a stored prediction
     
     print(f"--- Norra AI Start Sequence (Dry Run: {dry_run}) ---")
     
@@ -699,4 +727,4 @@ if __name__ == "__main__":
     verify_previous_matches(None)
     
     # Step 2: Run Predictions
-    fetch_predictions(api_key=None, dry_run=dry_run)
\ No newline at end of file
+    fetch_predictions(api_key=None, dry_run=dry_run, force=force)
\ No newline at end of file
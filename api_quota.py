@@ -0,0 +1,168 @@
+# api_quota.py
+import os
+import time
+import datetime
+import threading
+from http_cache import endpoint_path
+
+# Lower number = more important. Enrichment calls are paced and give way to the others.
+PRIORITY_FIXTURES = 0
+PRIORITY_STANDINGS = 1
+PRIORITY_ENRICHMENT = 2
+
+# Share of the daily budget each priority must leave untouched for the more important ones
+DAILY_RESERVE = {
+    PRIORITY_FIXTURES: 0.0,
+    PRIORITY_STANDINGS: 0.05,
+    PRIORITY_ENRICHMENT: 0.20
+}
+
+# Longest a caller of each priority waits for a per-minute token before giving up
+MAX_WAIT_SECONDS = {
+    PRIORITY_FIXTURES: 120.0,
+    PRIORITY_STANDINGS: 90.0,
+    PRIORITY_ENRICHMENT: 65.0
+}
+
+def priority_for(url):
+    """Quota priority of an API-Football URL, or None for hosts that are not metered."""
+    path = endpoint_path(url)
+    if path is None:
+        return None
+    if path == "/fixtures":
+        return PRIORITY_FIXTURES
+    if path == "/standings":
+        return PRIORITY_STANDINGS
+    return PRIORITY_ENRICHMENT
+
+def _utc_today():
+    return datetime.datetime.utcnow().date()
+
+def _header(headers, name):
+    try:
+        value = headers.get(name)
+        return int(value) if value is not None else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class QuotaManager:
+    """
+    Token bucket for the per-minute limit plus a daily counter, both corrected from the
+    x-ratelimit-* response headers. Callers wait for a token instead of failing, and lower
+    priorities wait behind higher ones and stop early enough to leave a daily reserve.
+    """
+
+    def __init__(self, daily_limit, per_minute_limit, clock=time.monotonic, today=_utc_today):
+        self.daily_limit = daily_limit
+        self.per_minute_limit = per_minute_limit
+        self._clock = clock
+        self._today = today
+        self._cond = threading.Condition()
+        self._tokens = float(per_minute_limit)
+        self._refilled_at = clock()
+        self._blocked_until = 0.0
+        self._day = today()
+        self._daily_remaining = daily_limit
+        self._waiting = {p: 0 for p in DAILY_RESERVE}
+        self.granted = 0
+        self.denied = 0
+
+    def _refill(self):
+        now = self._clock()
+        if self._today() != self._day:
+            # API-Football resets the daily counter at midnight UTC
+            self._day = self._today()
+            self._daily_remaining = self.daily_limit
+        rate = self.per_minute_limit / 60.0
+        self._tokens = min(float(self.per_minute_limit), self._tokens + (now - self._refilled_at) * rate)
+        self._refilled_at = now
+        return now
+
+    def _daily_allows(self, priority):
+        reserve = int(self.daily_limit * DAILY_RESERVE.get(priority, 0.0))
+        return self._daily_remaining > reserve
+
+    def _seconds_until_token(self, now):
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        return max(0.0, (1.0 - self._tokens) * 60.0 / self.per_minute_limit)
+
+    def acquire(self, priority=PRIORITY_ENRICHMENT, max_wait=None):
+        """Takes one request slot, waiting up to max_wait seconds. Returns False when the budget says no."""
+        if max_wait is None:
+            max_wait = MAX_WAIT_SECONDS.get(priority, 60.0)
+        with self._cond:
+            deadline = self._clock() + max_wait
+            self._waiting[priority] = self._waiting.get(priority, 0) + 1
+            try:
+                while True:
+                    now = self._refill()
+                    if not self._daily_allows(priority):
+                        self.denied += 1
+                        return False
+                    outranked = any(n for p, n in self._waiting.items() if p < priority)
+                    if not outranked and now >= self._blocked_until and self._tokens >= 1.0:
+                        self._tokens -= 1.0
+                        self._daily_remaining -= 1
+                        self.granted += 1
+                        return True
+                    wait = min(self._seconds_until_token(now) or 0.05, deadline - now)
+                    if wait <= 0:
+                        self.denied += 1
+                        return False
+                    self._cond.wait(wait)
+            finally:
+                self._waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def observe(self, status_code, headers=None, body=None):
+        """Syncs the budget with a response: remaining-quota headers, 429s and in-body limit errors."""
+        headers = headers or {}
+        with self._cond:
+            now = self._refill()
+            daily_left = _header(headers, "x-ratelimit-requests-remaining")
+            if daily_left is not None:
+                self._daily_remaining = daily_left
+            daily_cap = _header(headers, "x-ratelimit-requests-limit")
+            if daily_cap:
+                self.daily_limit = daily_cap
+            minute_left = _header(headers, "x-ratelimit-remaining")
+            if minute_left is not None:
+                self._tokens = min(self._tokens, float(minute_left))
+            minute_cap = _header(headers, "x-ratelimit-limit")
+            if minute_cap:
+                self.per_minute_limit = minute_cap
+
+            limit_error = ""
+            if isinstance(body, dict) and body.get("errors"):
+                limit_error = str(body["errors"]).lower()
+                if not any(k in limit_error for k in ("limit", "quota", "too many")):
+                    limit_error = ""
+            if "day" in limit_error:
+                self._daily_remaining = 0
+            elif status_code == 429 or limit_error:
+                # Per-minute window exhausted: hold everyone until it rolls over
+                self._tokens = 0.0
+                self._blocked_until = max(self._blocked_until, now + 60.0)
+            self._cond.notify_all()
+        return bool(limit_error) or status_code == 429
+
+    def status(self):
+        with self._cond:
+            self._refill()
+            return {
+                "daily_limit": self.daily_limit,
+                "daily_remaining": self._daily_remaining,
+                "per_minute_limit": self.per_minute_limit,
+                "minute_tokens": round(self._tokens, 2),
+                "granted": self.granted,
+                "denied": self.denied
+            }
+
+
+# Free plan defaults: 100 requests/day, 10 requests/minute
+quota = QuotaManager(
+    int(os.getenv("FOOTBALL_API_DAILY_LIMIT", "100")),
+    int(os.getenv("FOOTBALL_API_MINUTE_LIMIT", "10"))
+)
@@ -160,6 +160,18 @@ def read_stats():
     except Exception as e:
         return {"error": f"Failed to load stats: {e}"}
 
+@app.get("/api/cache-stats")
+def read_cache_stats():
+    # Entries, approximate bytes and hit/miss counters of the in-process caches
+    from bounded_cache import cache_stats
+    return cache_stats()
+
+@app.get("/api/quota-status")
+def read_quota_status():
+    # Remaining API-Football budget as seen by this process
+    from api_quota import quota
+    return quota.status()
+
 @app.get("/api/timeline")
 def get_timeline(db: Session = Depends(database.get_db)):
     posts = db.query(database.PostTimeline).order_by(database.PostTimeline.created_at.desc()).limit(15).all()
@@ -307,6 +319,19 @@ def decide_outcome(
                 
         pred.status = "won" if is_correct else "lost"
         
+    from league_standings import apply_played_results
+    from league_snapshot import invalidate_league_snapshot
+
+    def as_result(m):
+        return {
+            "league_id": m.league_id,
+            "season": m.season,
+            "home_team": m.home_team,
+            "away_team": m.away_team,
+            "home_goals": m.home_goals,
+            "away_goals": m.away_goals
+        }
+
     played = db.query(database.PlayedMatch).filter(database.PlayedMatch.fixture_id == fixture_id).first()
     if not played:
         match_dt = pred.match_date or pred.created_at
@@ -322,10 +347,14 @@ def decide_outcome(
         )
         db.add(played)
     else:
+        # Swap the old score out of the materialized standings before applying the corrected one
+        apply_played_results(db, [as_result(played)], sign=-1)
         played.home_goals = home_goals
         played.away_goals = away_goals
+    apply_played_results(db, [as_result(played)])
         
     db.commit()
+    invalidate_league_snapshot(played.league_id)
     recalculate_stats(db)
     
     return {"status": "success", "prediction_status": pred.status}
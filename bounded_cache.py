@@ -0,0 +1,176 @@
+# bounded_cache.py
+import sys
+import time
+import threading
+from collections import OrderedDict
+
+# Every cache registers itself here so its counters can be exposed for monitoring
+_registry = {}
+
+def approx_size(value, _depth=0):
+    """Rough deep size in bytes of JSON-like payloads (dicts, lists, strings, numbers, arrays)."""
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(value)
+    if _depth > 6:
+        return size
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += approx_size(k, _depth + 1) + approx_size(v, _depth + 1)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for v in value:
+            size += approx_size(v, _depth + 1)
+    return size
+
+
+class _Namespace:
+    def __init__(self, ttl=None, max_entries=256, max_bytes=None, sizeof=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof or approx_size
+        self.entries = OrderedDict() # key -> (value, expires_at, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+
+class BoundedCache:
+    """
+    Thread-safe LRU cache split into namespaces, each with its own TTL, entry limit and
+    optional byte budget. Tracks hits, misses, evictions, expirations and approximate size.
+    """
+
+    def __init__(self, name, default_ttl=None, default_max_entries=256):
+        self.name = name
+        self.default_ttl = default_ttl
+        self.default_max_entries = default_max_entries
+        self._namespaces = {}
+        self._lock = threading.RLock()
+        _registry[name] = self
+
+    def configure(self, namespace, ttl=None, max_entries=None, max_bytes=None, sizeof=None):
+        """Sets the limits of a namespace (ttl in seconds, None = never expires)."""
+        with self._lock:
+            ns = self._namespaces.get(namespace)
+            if ns is None:
+                ns = self._namespaces[namespace] = _Namespace()
+            ns.ttl = ttl if ttl is not None else self.default_ttl
+            ns.max_entries = max_entries or self.default_max_entries
+            ns.max_bytes = max_bytes
+            ns.sizeof = sizeof or approx_size
+            self._evict(ns)
+        return self
+
+    def _ns(self, namespace):
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            ns = self._namespaces[namespace] = _Namespace(self.default_ttl, self.default_max_entries)
+        return ns
+
+    def _drop(self, ns, key):
+        _, _, size = ns.entries.pop(key)
+        ns.bytes -= size
+
+    def _evict(self, ns):
+        while ns.entries and (len(ns.entries) > ns.max_entries or (ns.max_bytes and ns.bytes > ns.max_bytes)):
+            self._drop(ns, next(iter(ns.entries)))
+            ns.evictions += 1
+
+    def get(self, namespace, key, default=None):
+        with self._lock:
+            ns = self._ns(namespace)
+            entry = ns.entries.get(key)
+            if entry is None:
+                ns.misses += 1
+                return default
+            value, expires_at, _ = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._drop(ns, key)
+                ns.expirations += 1
+                ns.misses += 1
+                return default
+            ns.entries.move_to_end(key)
+            ns.hits += 1
+            return value
+
+    def set(self, namespace, key, value):
+        with self._lock:
+            ns = self._ns(namespace)
+            if key in ns.entries:
+                self._drop(ns, key)
+            try:
+                size = ns.sizeof(value)
+            except Exception:
+                size = 0
+            expires_at = time.monotonic() + ns.ttl if ns.ttl is not None else None
+            ns.entries[key] = (value, expires_at, size)
+            ns.bytes += size
+            self._evict(ns)
+
+    def get_or_load(self, namespace, key, loader):
+        """Returns the cached value, calling loader() and caching its result on a miss."""
+        missing = object()
+        value = self.get(namespace, key, missing)
+        if value is missing:
+            # Load outside the lock so slow network calls do not block other readers
+            value = loader()
+            self.set(namespace, key, value)
+        return value
+
+    def resize(self, namespace, key, value):
+        """Re-measures a cached value that grew in place (e.g. a member built on first use)."""
+        with self._lock:
+            ns = self._ns(namespace)
+            entry = ns.entries.get(key)
+            if entry is None or entry[0] is not value:
+                return
+            try:
+                size = ns.sizeof(value)
+            except Exception:
+                size = entry[2]
+            ns.entries[key] = (value, entry[1], size)
+            ns.bytes += size - entry[2]
+            self._evict(ns)
+
+    def pop(self, namespace, key, default=None):
+        with self._lock:
+            ns = self._ns(namespace)
+            if key not in ns.entries:
+                return default
+            value = ns.entries[key][0]
+            self._drop(ns, key)
+            return value
+
+    def clear(self, namespace=None):
+        with self._lock:
+            targets = [self._ns(namespace)] if namespace is not None else self._namespaces.values()
+            for ns in targets:
+                ns.entries.clear()
+                ns.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            out = {}
+            for name, ns in self._namespaces.items():
+                lookups = ns.hits + ns.misses
+                out[name] = {
+                    "entries": len(ns.entries),
+                    "max_entries": ns.max_entries,
+                    "bytes": ns.bytes,
+                    "max_bytes": ns.max_bytes,
+                    "ttl_seconds": ns.ttl,
+                    "hits": ns.hits,
+                    "misses": ns.misses,
+                    "hit_rate": round(ns.hits / lookups, 4) if lookups else None,
+                    "evictions": ns.evictions,
+                    "expirations": ns.expirations
+                }
+            return out
+
+def cache_stats():
+    """Counters of every cache created in this process, keyed by cache name."""
+    return {name: cache.stats() for name, cache in list(_registry.items())}
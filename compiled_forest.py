@@ -0,0 +1,124 @@
+# compiled_forest.py
+import numpy as np
+
+# Names of the flat arrays a CompiledForests is made of (see to_arrays / from_arrays)
+ARRAY_NAMES = ("feature", "threshold", "left", "nan_right", "value", "roots", "layout")
+
+
+def _breadth_first(children_left, children_right):
+    """Node order of one tree, level by level, with the two children of a split always adjacent."""
+    levels = [np.array([0])]
+    frontier = levels[0]
+    while frontier.size:
+        splits = frontier[children_left[frontier] != -1]
+        frontier = np.column_stack([children_left[splits], children_right[splits]]).ravel()
+        levels.append(frontier)
+    return np.concatenate(levels)
+
+
+class CompiledForests:
+    """
+    Several fitted RandomForestClassifiers flattened into one set of contiguous node arrays and
+    scored together: every tree of every market walks the whole batch in one vectorized loop of
+    max-depth steps. Trees are laid out breadth-first so a split's right child directly follows
+    its left one, and a step is child = left + (x > threshold). Leaves loop back to themselves
+    (threshold +inf). The arithmetic follows sklearn's exactly (float32 features against float64
+    thresholds, trees summed in order, then divided by the tree count), so the output is
+    bit-identical to predict_proba.
+    """
+
+    def __init__(self, markets, feature, threshold, left, nan_right, value, roots, layout):
+        self.markets = list(markets)
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.nan_right = nan_right # Splits that send missing values right
+        self.value = value
+        self.roots = roots
+        self.layout = layout # Per market: first tree, end tree, number of classes, max depth
+        self.depth = int(layout[:, 3].max()) if len(layout) else 0
+        self.has_missing = bool(nan_right.any())
+
+    @classmethod
+    def from_models(cls, models):
+        """Compiles a {market: RandomForestClassifier} dict."""
+        markets = list(models)
+        trees = []
+        layout = []
+        for name in markets:
+            forest = models[name]
+            if getattr(forest, "n_outputs_", 1) != 1:
+                raise ValueError(f"Market '{name}': only single-output forests can be compiled.")
+            start = len(trees)
+            trees.extend(est.tree_ for est in forest.estimators_)
+            layout.append((start, len(trees), int(forest.n_classes_), max(t.max_depth for t in trees[start:])))
+        max_classes = max((entry[2] for entry in layout), default=1)
+
+        n_nodes = sum(t.node_count for t in trees)
+        feature = np.zeros(n_nodes, dtype=np.int32)
+        threshold = np.zeros(n_nodes, dtype=np.float64)
+        left = np.zeros(n_nodes, dtype=np.int32)
+        nan_right = np.zeros(n_nodes, dtype=bool)
+        value = np.zeros((n_nodes, max_classes), dtype=np.float64)
+        roots = np.zeros(len(trees), dtype=np.int32)
+
+        offset = 0
+        for i, tree in enumerate(trees):
+            n = tree.node_count
+            order = _breadth_first(tree.children_left, tree.children_right)
+            position = np.empty(n, dtype=np.int64)
+            position[order] = np.arange(n)
+            nodes = slice(offset, offset + n)
+            is_leaf = tree.children_left[order] == -1
+            feature[nodes] = np.where(is_leaf, 0, tree.feature[order])
+            threshold[nodes] = np.where(is_leaf, np.inf, tree.threshold[order])
+            left[nodes] = offset + np.where(is_leaf, np.arange(n), position[tree.children_left[order]])
+            missing = getattr(tree, "missing_go_to_left", None)
+            if missing is not None:
+                nan_right[nodes] = ~np.asarray(missing, dtype=bool)[order] & ~is_leaf
+            classes = tree.value.shape[2]
+            value[nodes, :classes] = tree.value[order, 0, :]
+            roots[i] = offset
+            offset += n
+        return cls(markets, feature, threshold, left, nan_right, value, roots,
+                   np.asarray(layout, dtype=np.int64).reshape(-1, 4))
+
+    def to_arrays(self):
+        return {name: getattr(self, name) for name in ARRAY_NAMES}
+
+    @classmethod
+    def from_arrays(cls, markets, arrays):
+        """Rebuilds from to_arrays() output, e.g. memory-mapped arrays from the model store."""
+        return cls(markets, *(arrays[name] for name in ARRAY_NAMES))
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    def leaves(self, X):
+        """Leaf node reached by every tree for every row of X: an int array (n_trees, n_rows)."""
+        # sklearn scores trees on float32 features; widening them to float64 once is exact
+        X = np.asarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat = X.astype(np.float64).ravel()
+        row_start = (np.arange(n_rows) * n_features)[None, :]
+        node = np.repeat(self.roots[:, None], n_rows, axis=1)
+        for _ in range(self.depth):
+            x = flat[row_start + self.feature[node]]
+            go_right = x > self.threshold[node]
+            if self.has_missing:
+                go_right |= np.isnan(x) & self.nan_right[node]
+            node = self.left[node] + go_right
+        return node
+    def predict_proba(self, X):
+        """{market: class probabilities (n_rows, n_classes)} for every market, from one traversal."""
+        node = self.leaves(X)
+        out = {}
+        for name, (start, end, n_classes, _) in zip(self.markets, self.layout):
+            leaf_values = self.value[node[start:end], :n_classes]
+            proba = np.zeros(leaf_values.shape[1:], dtype=np.float64)
+            for tree_values in leaf_values:
+                proba += tree_values
+            proba /= end - start
+            out[name] = proba
+        return out
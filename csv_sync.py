@@ -0,0 +1,240 @@
+# csv_sync.py
+import csv
+import hashlib
+import datetime
+import itertools
+import http_transport
+from database import SessionLocal, CsvImportState
+
+# Bytes before the last imported offset that are re-requested to check the file was only appended to
+OVERLAP_BYTES = 1024
+
+# Size of the blocks the response body is read in; nothing larger is held in memory at once
+STREAM_CHUNK_BYTES = 64 * 1024
+
+BOM = b"\xef\xbb\xbf"
+
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _read_exactly(chunks, n, hasher=None, tail=b""):
+    """
+    Consumes the first n bytes of a chunk iterator without keeping them, feeding them to hasher.
+    Returns (bytes_read, tail, leftover): the last OVERLAP_BYTES read and the unread part of the last chunk.
+    """
+    read = 0
+    for chunk in chunks:
+        take = min(len(chunk), n - read)
+        part = chunk[:take]
+        if hasher is not None:
+            hasher.update(part)
+        tail = (tail + part)[-OVERLAP_BYTES:]
+        read += take
+        if read >= n:
+            return read, tail, chunk[take:]
+    return read, tail, b""
+
+def _peek(chunks, leftover=b""):
+    """Returns a chunk iterator equivalent to leftover + chunks, or None when nothing is left."""
+    first = leftover
+    while not first:
+        first = next(chunks, None)
+        if first is None:
+            return None
+    return itertools.chain([first], chunks)
+
+
+class CsvDelta:
+    """
+    Result of a conditional fetch of one football-data.co.uk CSV.
+    mode is "unchanged" (nothing to parse), "delta" (only rows appended since the last import)
+    or "full" (first import, or the already-imported part of the file changed).
+    The body is streamed: rows() decodes it line by line and can only be iterated once.
+    """
+
+    def __init__(self, league_id, url, mode, header=None, chunks=None, row_offset=0, byte_offset=0,
+                 hasher=None, tail=b"", validators=None, response=None):
+        self.league_id = league_id
+        self.url = url
+        self.mode = mode
+        self.header = header
+        self.row_offset = row_offset
+        self.byte_offset = byte_offset
+        self.rows_read = 0
+        self.bytes_read = 0
+        self._chunks = chunks
+        self._hasher = hasher # Whole-file sha256, when the body is read from byte 0
+        self._tail = tail
+        self._validators = validators or {}
+        self._response = response
+
+    def _lines(self):
+        pending = b""
+        for chunk in self._chunks:
+            pending += chunk
+            start = 0
+            end = pending.find(b"\n")
+            while end != -1:
+                yield self._consume(pending[start:end + 1])
+                start = end + 1
+                end = pending.find(b"\n", start)
+            pending = pending[start:]
+        if pending:
+            yield self._consume(pending)
+
+    def _consume(self, raw):
+        # Bytes are accounted for as the csv reader pulls lines, so they stay aligned with rows_read
+        if self._hasher is not None:
+            self._hasher.update(raw)
+        self._tail = (self._tail + raw)[-OVERLAP_BYTES:]
+        self.bytes_read += len(raw)
+        if self.mode == "full" and self.bytes_read == len(raw):
+            raw = raw[len(BOM):] if raw.startswith(BOM) else raw
+            self.header = raw.decode("utf-8", errors="ignore").rstrip("\r\n")
+        # A newline byte never occurs inside a multi-byte UTF-8 sequence, so per-line decoding is exact
+        return raw.decode("utf-8", errors="ignore")
+
+    def rows(self):
+        """Yields (row_index, row_dict) for the new rows, row_index counting from the top of the file."""
+        if self.mode == "unchanged" or self._chunks is None:
+            return
+        lines = self._lines()
+        if self.mode == "delta":
+            lines = itertools.chain([self.header + "\n"], lines)
+        try:
+            for i, row in enumerate(csv.DictReader(lines)):
+                self.rows_read = i + 1
+                yield self.row_offset + i, row
+        finally:
+            self.close()
+
+    def close(self):
+        if self._response is not None:
+            self._response.close()
+            self._response = None
+
+    def checkpoint(self, db, final=True):
+        """
+        Records the rows consumed so far as imported, inside the caller's transaction so the
+        import state moves together with the inserted rows. Validators are only stored on the
+        final checkpoint: a 304 must not hide rows that an interrupted import never reached.
+        """
+        state = db.query(CsvImportState).filter(CsvImportState.league_id == self.league_id).first()
+        if state is None:
+            state = CsvImportState(league_id=self.league_id)
+            db.add(state)
+        if self.mode != "unchanged":
+            state.url = self.url
+            state.header = self.header
+            state.byte_offset = self.byte_offset + self.bytes_read
+            state.row_offset = self.row_offset + self.rows_read
+            state.content_hash = self._hasher.hexdigest() if self._hasher is not None else None
+            state.tail_hash = _sha256(self._tail)
+        if final:
+            state.etag = self._validators.get("etag")
+            state.last_modified = self._validators.get("last_modified")
+        state.checked_at = datetime.datetime.utcnow()
+
+    def commit(self):
+        """Records the fetched file as imported. Call only once its rows are safely stored."""
+        self.close()
+        if self.mode == "unchanged" and not self._validators:
+            return
+        db = SessionLocal()
+        try:
+            self.checkpoint(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error saving CSV import state for league {self.league_id}: {e}")
+        finally:
+            db.close()
+
+
+def _load_state(league_id):
+    db = SessionLocal()
+    try:
+        return db.query(CsvImportState).filter(CsvImportState.league_id == league_id).first()
+    except Exception as e:
+        print(f"Error loading CSV import state for league {league_id}: {e}")
+        return None
+    finally:
+        db.close()
+
+def _validators(response):
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified")
+    }
+
+def _stream(url, headers=None):
+    response = http_transport.get(url, headers=headers, stream=True, timeout=(5, 30))
+    return response, response.iter_content(STREAM_CHUNK_BYTES)
+
+def _full(league_id, url):
+    response, chunks = _stream(url)
+    try:
+        response.raise_for_status()
+    except Exception:
+        response.close()
+        raise
+    return CsvDelta(league_id, url, "full", chunks=chunks, hasher=hashlib.sha256(),
+                    validators=_validators(response), response=response)
+
+def fetch_csv_delta(league_id, url):
+    """
+    Opens a stream of only what changed in a CSV since the last committed import: a conditional
+    request (ETag / Last-Modified) first, then a byte range from the last imported offset.
+    Returns a CsvDelta; download errors are raised to the caller.
+    """
+    state = _load_state(league_id)
+    if state is None or state.url != url or not state.byte_offset:
+        return _full(league_id, url)
+
+    headers = {}
+    if state.etag:
+        headers["If-None-Match"] = state.etag
+    if state.last_modified:
+        headers["If-Modified-Since"] = state.last_modified
+    overlap = min(OVERLAP_BYTES, state.byte_offset)
+    start = state.byte_offset - overlap
+    headers["Range"] = f"bytes={start}-"
+
+    response, chunks = _stream(url, headers)
+    if response.status_code in (304, 416):
+        response.close()
+        if response.status_code == 304:
+            return CsvDelta(league_id, url, "unchanged")
+        # The file is shorter than what was imported: it was rewritten
+        return _full(league_id, url)
+    try:
+        response.raise_for_status()
+    except Exception:
+        response.close()
+        raise
+    validators = _validators(response)
+
+    hasher = None
+    if response.status_code == 206:
+        read, tail, leftover = _read_exactly(chunks, overlap)
+        unchanged_prefix = read == overlap and _sha256(tail) == state.tail_hash
+    else:
+        # Server ignored the Range header and sent the whole file: hash the known prefix as it streams past
+        hasher = hashlib.sha256() if state.content_hash else None
+        read, tail, leftover = _read_exactly(chunks, state.byte_offset, hasher)
+        if state.content_hash:
+            unchanged_prefix = read == state.byte_offset and hasher.hexdigest() == state.content_hash
+        else:
+            unchanged_prefix = read == state.byte_offset and _sha256(tail[-overlap:]) == state.tail_hash
+    if not unchanged_prefix:
+        response.close()
+        print(f"CSV for league {league_id} changed before the last imported row. Re-importing in full.")
+        return _full(league_id, url)
+
+    chunks = _peek(chunks, leftover)
+    if chunks is None:
+        response.close()
+        return CsvDelta(league_id, url, "unchanged", validators=validators)
+    return CsvDelta(league_id, url, "delta", state.header, chunks, state.row_offset or 0, state.byte_offset,
+                    hasher, tail, validators, response)
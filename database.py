@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, create_engine
+from sqlalchemy import Column, Integer, String, Float, JSON, DateTime, Index, create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import datetime
@@ -17,6 +17,9 @@ else:
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Rows per INSERT ... ON CONFLICT statement in upsert_rows
+UPSERT_BATCH_SIZE = int(os.getenv("DB_UPSERT_BATCH_SIZE", "500"))
+
 Base = declarative_base()
 
 class Prediction(Base):
@@ -48,6 +51,10 @@ class Prediction(Base):
 
 class MatchTrainingData(Base):
     __tablename__ = "match_training_data"
+    __table_args__ = (
+        # League-scoped training loads (row count, last id and the ordered scan) read only this index
+        Index("ix_match_training_data_league", "league_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     fixture_id = Column(Integer, unique=True, index=True)
@@ -67,6 +74,13 @@ class MatchTrainingData(Base):
 
 class PlayedMatch(Base):
     __tablename__ = "played_matches"
+    __table_args__ = (
+        # Composite indexes matching the league-scoped access paths (season tables, team form/H2H by date)
+        Index("ix_played_matches_league_season", "league_id", "season"),
+        Index("ix_played_matches_league_home_date", "league_id", "home_team", "match_date"),
+        Index("ix_played_matches_league_away_date", "league_id", "away_team", "match_date"),
+        Index("ix_played_matches_match_date", "match_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     fixture_id = Column(Integer, unique=True, index=True)
@@ -79,6 +93,113 @@ class PlayedMatch(Base):
     away_goals = Column(Integer)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+class LeagueStanding(Base):
+    __tablename__ = "league_standings"
+    __table_args__ = (
+        Index("ix_league_standings_league_season_team", "league_id", "season", "team", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    league_id = Column(Integer)
+    season = Column(String)
+    team = Column(String)
+    points = Column(Integer, default=0)
+    goals_scored = Column(Integer, default=0)
+    goals_conceded = Column(Integer, default=0)
+    matches_played = Column(Integer, default=0)
+    first_seen = Column(Integer, default=0) # Tie-break order: position the team first appeared in the season
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class TeamAlias(Base):
+    __tablename__ = "team_aliases"
+    __table_args__ = (
+        Index("ix_team_aliases_league_source", "league_id", "source_name", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    league_id = Column(Integer)
+    source_name = Column(String) # Team name as reported by ESPN / TheSportsDB
+    db_name = Column(String) # Matching team name in played_matches
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class ScheduledFixture(Base):
+    __tablename__ = "scheduled_fixtures"
+    __table_args__ = (
+        Index("ix_scheduled_fixtures_date_source", "fixture_date", "source"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String) # "espn" or "sportsdb"
+    espn_league = Column(String) # ESPN league code, or "sportsdb"
+    league_id = Column(Integer)
+    fixture_date = Column(String(10)) # YYYY-MM-DD bucket the fixture is listed under
+    kickoff = Column(String, nullable=True) # Kickoff as reported by the provider
+    home_team = Column(String)
+    away_team = Column(String)
+    status = Column(String)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow)
+
+class FixtureCalendarDate(Base):
+    __tablename__ = "fixture_calendar_dates"
+    __table_args__ = (
+        Index("ix_fixture_calendar_dates_source_date", "source", "fixture_date", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    source = Column(String)
+    fixture_date = Column(String(10))
+    fetched_at = Column(DateTime) # Last successful fetch of this date, used for freshness checks
+    fixtures = Column(Integer, default=0)
+
+class LeagueActivity(Base):
+    __tablename__ = "league_activity"
+
+    id = Column(Integer, primary_key=True, index=True)
+    espn_league = Column(String, unique=True, index=True) # ESPN league code ("*" holds the last full sweep)
+    league_id = Column(Integer, nullable=True)
+    season_start = Column(String(10), nullable=True) # First fixture date of the current run of matchdays
+    last_event_date = Column(String(10), nullable=True) # Latest fixture date seen (may be in the future)
+    cadence_days = Column(Float, nullable=True) # Smoothed gap between matchdays
+    first_polled_at = Column(DateTime, nullable=True)
+    last_polled_at = Column(DateTime, nullable=True)
+    next_poll_at = Column(DateTime, nullable=True)
+    last_status = Column(String, nullable=True)
+
+class CsvImportState(Base):
+    __tablename__ = "csv_import_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    league_id = Column(Integer, unique=True, index=True)
+    url = Column(String)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    header = Column(String) # CSV header line, prepended to appended-rows-only downloads
+    byte_offset = Column(Integer, default=0) # Bytes of the file already imported
+    row_offset = Column(Integer, default=0) # CSV data rows already imported (fixture ids are derived from it)
+    content_hash = Column(String, nullable=True) # sha256 of the whole file as last downloaded in full
+    tail_hash = Column(String, nullable=True) # sha256 of the last 1 KB imported, checked on range downloads
+    checked_at = Column(DateTime, nullable=True)
+
+class TrainingDataState(Base):
+    __tablename__ = "training_data_state"
+
+    id = Column(Integer, primary_key=True, index=True)
+    league_id = Column(Integer, unique=True, index=True)
+    version = Column(Integer, default=0) # Bumped whenever the league's training rows are inserted or changed
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+class FixtureRegistry(Base):
+    __tablename__ = "fixture_registry"
+
+    id = Column(Integer, primary_key=True, index=True)
+    fixture_id = Column(Integer, unique=True, index=True) # Stable id handed to predictions (see fixture_ids)
+    fixture_key = Column(String, unique=True, index=True) # league|YYYY-MM-DD|home|away, canonical team names
+    league_id = Column(Integer, nullable=True)
+    fixture_date = Column(String(10))
+    home_team = Column(String)
+    away_team = Column(String)
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+
 class BotStats(Base):
     __tablename__ = "bot_stats"
 
@@ -97,10 +218,82 @@ class PostTimeline(Base):
     link = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
 
+def ensure_indexes():
+    """Creates any declared index missing from tables that already existed (create_all skips those)."""
+    from sqlalchemy import inspect
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        existing = set(ix["name"] for ix in inspector.get_indexes(table.name))
+        for index in table.indexes:
+            if index.name not in existing:
+                print(f"Migration: Creating index '{index.name}' on '{table.name}'...")
+                index.create(bind=engine)
+
+def _dialect_insert(db):
+    name = db.get_bind().dialect.name
+    if name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    return None
+
+def upsert_rows(db, model, rows, key="fixture_id", update_columns=(), batch_size=None):
+    """
+    Bulk INSERT ... ON CONFLICT (key) inside the caller's transaction: new keys are inserted and,
+    when update_columns is given, existing rows whose values differ there are updated.
+    Runs in batches, so the cost follows the number of rows passed, not the size of the table.
+    Returns (inserted_keys, updated_keys). Dialects without ON CONFLICT fall back to a per-batch
+    existence check and plain inserts, without updates.
+    """
+    from sqlalchemy import or_
+    table = model.__table__
+    batch_size = batch_size or UPSERT_BATCH_SIZE
+    # One statement cannot touch the same row twice: the first occurrence of a key wins
+    unique = {}
+    for r in rows:
+        if r.get(key) is not None:
+            unique.setdefault(r[key], r)
+    rows = list(unique.values())
+
+    insert = _dialect_insert(db)
+    inserted, updated = [], []
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        if insert is None:
+            keys = [r[key] for r in batch]
+            existing = set(val[0] for val in db.query(table.c[key]).filter(table.c[key].in_(keys)).all())
+            new_rows = [r for r in batch if r[key] not in existing]
+            if new_rows:
+                db.execute(table.insert(), new_rows)
+            inserted.extend(r[key] for r in new_rows)
+            continue
+
+        stmt = insert(table).on_conflict_do_nothing(index_elements=[key]).returning(table.c[key])
+        batch_inserted = set(db.execute(stmt, batch).scalars().all())
+        inserted.extend(batch_inserted)
+
+        conflicts = [r for r in batch if r[key] not in batch_inserted]
+        if update_columns and conflicts:
+            stmt = insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[key],
+                set_={c: stmt.excluded[c] for c in update_columns},
+                # Unchanged rows are left alone and not counted as updated
+                where=or_(*[table.c[c].is_distinct_from(stmt.excluded[c]) for c in update_columns])
+            ).returning(table.c[key])
+            updated.extend(db.execute(stmt, conflicts).scalars().all())
+    return inserted, updated
+
 def init_db():
     Base.metadata.create_all(bind=engine)
     # Check and migrate schema for existing databases in a dialect-agnostic way
     from sqlalchemy import inspect, text
+    try:
+        ensure_indexes()
+    except Exception as e:
+        print(f"Index migration error: {e}")
     db = SessionLocal()
     try:
         inspector = inspect(db.bind)
@@ -125,6 +318,12 @@ def init_db():
             print("Migration: Adding 'status' column to 'predictions' table...")
             db.execute(text("ALTER TABLE predictions ADD COLUMN status VARCHAR(20) DEFAULT 'pending';"))
             db.commit()
+        # Backfill the materialized standings table the first time it appears next to existing results
+        if db.query(LeagueStanding.id).first() is None and db.query(PlayedMatch.id).first() is not None:
+            print("Migration: Building 'league_standings' from existing played matches...")
+            from league_standings import rebuild_league_standings
+            rebuild_league_standings(db)
+            db.commit()
     except Exception as e:
         print(f"Migration error: {e}")
     finally:
@@ -1,5 +1,6 @@
 # espn_api.py  
-import requests
+import os
+import http_transport
 import datetime
 
 # Map ESPN league abbreviations to API-Football league IDs
@@ -50,106 +51,393 @@ LEAGUE_MAPPING = {
     "fifa.world.q.playoffs": 16
 }
 
+ESPN_SCOREBOARD_BASE = "https://site.api.espn.com/apis/site/v2/sports/soccer"
+
+# Concurrent scoreboard requests and the deadline of each league request, in seconds
+ESPN_CONCURRENCY = 16
+ESPN_LEAGUE_TIMEOUT = 3.0
+
+
+class LeagueFetchResult:
+    """Outcome of one league/date scoreboard request. status is "ok", "no_events", "failed" or "timeout"."""
+
+    def __init__(self, espn_code, league_id, date_str, status, fixtures=None, error=None, elapsed=0.0):
+        self.espn_code = espn_code
+        self.league_id = league_id
+        self.date = date_str
+        self.status = status
+        self.fixtures = fixtures or []
+        self.error = error
+        self.elapsed = elapsed
+
+    @property
+    def succeeded(self):
+        return self.status in ("ok", "no_events")
+
+    def __repr__(self):
+        return f"LeagueFetchResult({self.espn_code}, {self.date}, {self.status}, {len(self.fixtures)} fixtures)"
+
+
+def parse_scoreboard_events(events, espn_code, api_football_id):
+    """Normalizes ESPN scoreboard events into the fixture dicts used by Norra.fetch_predictions."""
+    league_fixtures = []
+    for event in events:
+        competition = event.get('competitions', [{}])[0]
+        competitors = competition.get('competitors', [])
+        if len(competitors) < 2:
+            continue
+        
+        home_team = next((c['team']['displayName'] for c in competitors if c.get('homeAway') == 'home'), competitors[0]['team']['displayName'])
+        away_team = next((c['team']['displayName'] for c in competitors if c.get('homeAway') == 'away'), competitors[1]['team']['displayName'])
+        
+        league_fixtures.append({
+            "home": home_team,
+            "away": away_team,
+            "espn_league": espn_code,
+            "league_id": api_football_id,
+            "date": event.get('date'),
+            "status": event.get('status', {}).get('type', {}).get('description', 'Scheduled'),
+            "name": f"{home_team} vs {away_team}"
+        })
+    return league_fixtures
+
+def _date_param(d):
+    if isinstance(d, tuple):
+        # (first, last) date range, served by the scoreboard in a single response
+        return f"{_date_param(d[0])}-{_date_param(d[1])}"
+    if isinstance(d, (datetime.date, datetime.datetime)):
+        return d.strftime("%Y%m%d")
+    return str(d).replace("-", "")
+
+_executor = None
+
+def _blocking_executor(workers):
+    # Shared across sweeps, and not owned by the event loop, so asyncio.run does not wait for stragglers
+    global _executor
+    if _executor is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="espn")
+    return _executor
+
+async def _fetch_scoreboard(client, semaphore, base_url, espn_code, league_id, date_str, timeout):
+    import asyncio
+    import time
+    url = f"{base_url}/{espn_code}/scoreboard"
+    async with semaphore:
+        # The deadline starts once a slot is free, so queueing does not eat into it
+        started = time.monotonic()
+        try:
+            payload = await asyncio.wait_for(client(url, {"dates": date_str}), timeout)
+        except asyncio.TimeoutError:
+            return LeagueFetchResult(espn_code, league_id, date_str, "timeout",
+                                     error=f"no response within {timeout}s", elapsed=time.monotonic() - started)
+        except Exception as e:
+            return LeagueFetchResult(espn_code, league_id, date_str, "failed", error=str(e), elapsed=time.monotonic() - started)
+    elapsed = time.monotonic() - started
+    try:
+        fixtures = parse_scoreboard_events(payload.get("events", []), espn_code, league_id)
+    except Exception as e:
+        return LeagueFetchResult(espn_code, league_id, date_str, "failed", error=f"unparseable scoreboard: {e}", elapsed=elapsed)
+    return LeagueFetchResult(espn_code, league_id, date_str, "ok" if fixtures else "no_events", fixtures, elapsed=elapsed)
+
+async def fetch_espn_fixtures_async(dates=None, leagues=None, concurrency=None, league_timeout=None, base_url=None):
+    """
+    Fetches ESPN scoreboards for every (league, date) pair concurrently.
+    dates: dates, datetimes, "YYYYMMDD" strings or (first, last) range tuples (default: today).
+    leagues: {espn_code: api_football_id} or a list of ESPN codes (default: LEAGUE_MAPPING).
+    Returns one LeagueFetchResult per pair, so empty leagues and failed requests can be told apart.
+    """
+    import asyncio
+    if dates is None:
+        dates = [datetime.datetime.now()]
+    if leagues is None:
+        leagues = LEAGUE_MAPPING
+    elif not isinstance(leagues, dict):
+        leagues = {code: LEAGUE_MAPPING.get(code) for code in leagues}
+    base_url = (base_url or ESPN_SCOREBOARD_BASE).rstrip("/")
+    concurrency = concurrency or ESPN_CONCURRENCY
+    league_timeout = league_timeout or ESPN_LEAGUE_TIMEOUT
+    semaphore = asyncio.Semaphore(concurrency)
+    date_strs = [_date_param(d) for d in dates]
+
+    def jobs(client):
+        return [
+            _fetch_scoreboard(client, semaphore, base_url, code, league_id, date_str, league_timeout)
+            for date_str in date_strs
+            for code, league_id in leagues.items()
+        ]
+
+    try:
+        import aiohttp
+    except ImportError:
+        aiohttp = None
+
+    if aiohttp is None:
+        # No async client installed: run the pooled blocking transport on long-lived worker threads
+        loop = asyncio.get_running_loop()
+        executor = _blocking_executor(concurrency)
+        async def client(url, params):
+            res = await loop.run_in_executor(
+                executor, lambda: http_transport.get(url, params=params, timeout=league_timeout)
+            )
+            res.raise_for_status()
+            return res.json()
+        return await asyncio.gather(*jobs(client))
+
+    connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector, headers=http_transport.DEFAULT_HEADERS) as session:
+        async def client(url, params):
+            async with session.get(url, params=params) as res:
+                res.raise_for_status()
+                return await res.json(content_type=None)
+        return await asyncio.gather(*jobs(client))
+
+def fetch_espn_fixtures(dates=None, leagues=None, **kwargs):
+    """Synchronous shim around fetch_espn_fixtures_async for the cron / FastAPI worker code paths."""
+    import asyncio
+    coro = fetch_espn_fixtures_async(dates, leagues, **kwargs)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Called from inside an event loop: run the sweep on its own loop in a helper thread
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
 def fetch_espn_today_fixtures():
     """
     Fetches soccer matches for today across major ESPN leagues matching our Tier 1 and Tier 2 lists.
-    No API keys required. Uses multi-threading to speed up API calls.
+    No API keys required. All leagues are fetched concurrently by fetch_espn_fixtures_async.
     """
-    from concurrent.futures import ThreadPoolExecutor, as_completed
     date_str = datetime.datetime.now().strftime("%Y%m%d")
-    fixtures = []
-    
     print(f"Fetching free schedule from ESPN Scoreboard for date: {date_str} in parallel...")
-    
-    def fetch_league(espn_code, api_football_id):
-        url = f"https://site.api.espn.com/apis/site/v2/sports/soccer/{espn_code}/scoreboard?dates={date_str}"
-        try:
-            res = requests.get(url, timeout=5)
-            if res.status_code == 200:
-                events = res.json().get("events", [])
-                league_fixtures = []
-                for event in events:
-                    competition = event.get('competitions', [{}])[0]
-                    competitors = competition.get('competitors', [])
-                    if len(competitors) < 2:
-                        continue
-                    
-                    home_team = next((c['team']['displayName'] for c in competitors if c.get('homeAway') == 'home'), competitors[0]['team']['displayName'])
-                    away_team = next((c['team']['displayName'] for c in competitors if c.get('homeAway') == 'away'), competitors[1]['team']['displayName'])
-                    
-                    league_fixtures.append({
-                        "home": home_team,
-                        "away": away_team,
-                        "espn_league": espn_code,
-                        "league_id": api_football_id,
-                        "date": event.get('date'),
-                        "status": event.get('status', {}).get('type', {}).get('description', 'Scheduled'),
-                        "name": f"{home_team} vs {away_team}"
-                    })
-                return league_fixtures
-        except Exception:
-            pass
-        return []
 
-    # Use 15 concurrent threads to fetch from ESPN's scoreboard CDN rapidly
-    with ThreadPoolExecutor(max_workers=15) as executor:
-        futures = {executor.submit(fetch_league, espn_code, api_football_id): espn_code for espn_code, api_football_id in LEAGUE_MAPPING.items()}
-        for future in as_completed(futures):
-            fixtures.extend(future.result())
+    results = fetch_espn_fixtures([date_str])
+    fixtures = [f for r in results for f in r.fixtures]
+    failed = [r for r in results if not r.succeeded]
+    if failed:
+        print(f"ESPN Scoreboard: {len(failed)} league requests failed: " +
+              ", ".join(f"{r.espn_code} ({r.status}: {r.error})" for r in failed))
             
     print(f"ESPN Scoreboard: Found {len(fixtures)} matches matching prioritized tiers today.")
     return fixtures
 
+def fetch_sportsdb_fixtures(date_str):
+    """
+    Fetches one day of soccer matches ("YYYY-MM-DD") from TheSportsDB free developer API.
+    Does not require a custom API key. Raises on network or HTTP errors.
+    """
+    url = f"https://www.thesportsdb.com/api/v1/json/3/eventsday.php?d={date_str}&s=Soccer"
+    fixtures = []
+    
+    res = http_transport.get(url, timeout=10)
+    res.raise_for_status()
+    events = res.json().get("events", [])
+    if events:
+        for event in events:
+            home = event.get("strHomeTeam")
+            away = event.get("strAwayTeam")
+            league_name = event.get("strLeague")
+            
+            # Convert TheSportsDB league name to API-Football league ID
+            league_id = None
+            l_lower = league_name.lower() if league_name else ""
+            if "premier league" in l_lower and "english" in l_lower: league_id = 39
+            elif "la liga" in l_lower: league_id = 140
+            elif "serie a" in l_lower and "ital" in l_lower: league_id = 135
+            elif "bundesliga" in l_lower and "german" in l_lower: league_id = 78
+            elif "ligue 1" in l_lower and "french" in l_lower: league_id = 61
+            elif "mls" in l_lower or "major league soccer" in l_lower: league_id = 253
+            
+            if league_id and home and away:
+                fixtures.append({
+                    "home": home,
+                    "away": away,
+                    "espn_league": "sportsdb",
+                    "league_id": league_id,
+                    "date": event.get("dateEvent"),
+                    "status": event.get("strStatus", "Scheduled"),
+                    "name": f"{home} vs {away}"
+                })
+    return fixtures
+
 def fetch_sportsdb_today_fixtures():
     """
     Fallback schedule provider: Fetches today's soccer matches from TheSportsDB free developer API.
     Does not require a custom API key.
     """
-    import datetime
     date_str = datetime.datetime.now().strftime("%Y-%m-%d")
-    url = f"https://www.thesportsdb.com/api/v1/json/3/eventsday.php?d={date_str}&s=Soccer"
-    fixtures = []
-    
     try:
-        res = requests.get(url, timeout=10)
-        if res.status_code == 200:
-            events = res.json().get("events", [])
-            if events:
-                for event in events:
-                    home = event.get("strHomeTeam")
-                    away = event.get("strAwayTeam")
-                    league_name = event.get("strLeague")
-                    
-                    # Convert TheSportsDB league name to API-Football league ID
-                    league_id = None
-                    l_lower = league_name.lower() if league_name else ""
-                    if "premier league" in l_lower and "english" in l_lower: league_id = 39
-                    elif "la liga" in l_lower: league_id = 140
-                    elif "serie a" in l_lower and "ital" in l_lower: league_id = 135
-                    elif "bundesliga" in l_lower and "german" in l_lower: league_id = 78
-                    elif "ligue 1" in l_lower and "french" in l_lower: league_id = 61
-                    elif "mls" in l_lower or "major league soccer" in l_lower: league_id = 253
-                    
-                    if league_id and home and away:
-                        fixtures.append({
-                            "home": home,
-                            "away": away,
-                            "espn_league": "sportsdb",
-                            "league_id": league_id,
-                            "date": event.get("dateEvent"),
-                            "status": event.get("strStatus", "Scheduled"),
-                            "name": f"{home} vs {away}"
-                        })
+        return fetch_sportsdb_fixtures(date_str)
     except Exception as e:
         print(f"TheSportsDB fetch failed: {e}")
-        
-    return fixtures
+        return []
 
-def fetch_combined_today_fixtures():
-    """Combines ESPN scoreboard and TheSportsDB schedule fixtures, removing duplicates."""
-    espn_fixtures = fetch_espn_today_fixtures()
-    sportsdb_fixtures = fetch_sportsdb_today_fixtures()
-    
+
+# Rolling fixture calendar: today plus FIXTURE_CALENDAR_DAYS days, stored in scheduled_fixtures
+FIXTURE_CALENDAR_DAYS = int(os.getenv("FIXTURE_CALENDAR_DAYS", "7"))
+# Hours before a calendar date is fetched again. Today moves (kickoff changes, postponements), later days rarely do.
+TODAY_MAX_AGE_HOURS = float(os.getenv("FIXTURE_TODAY_MAX_AGE_HOURS", "8"))
+FUTURE_MAX_AGE_HOURS = float(os.getenv("FIXTURE_FUTURE_MAX_AGE_HOURS", "24"))
+
+def _fixture_day(kickoff, default):
+    """YYYY-MM-DD bucket of a provider kickoff string ("2026-05-02T15:00Z" or "2026-05-02")."""
+    if kickoff and len(kickoff) >= 10 and kickoff[4] == "-" and kickoff[7] == "-":
+        return kickoff[:10]
+    return default
+
+def _stale_dates(db, source, dates, now):
+    from database import FixtureCalendarDate
+    fetched = dict(db.query(FixtureCalendarDate.fixture_date, FixtureCalendarDate.fetched_at).filter(
+        FixtureCalendarDate.source == source,
+        FixtureCalendarDate.fixture_date.in_(dates)
+    ).all())
+    stale = []
+    for i, d in enumerate(dates):
+        max_age = datetime.timedelta(hours=TODAY_MAX_AGE_HOURS if i == 0 else FUTURE_MAX_AGE_HOURS)
+        if fetched.get(d) is None or now - fetched[d] > max_age:
+            stale.append(d)
+    return stale
+
+def _mark_fresh(db, source, counts, now):
+    from database import FixtureCalendarDate
+    rows = {r.fixture_date: r for r in db.query(FixtureCalendarDate).filter(
+        FixtureCalendarDate.source == source,
+        FixtureCalendarDate.fixture_date.in_(list(counts))
+    ).all()}
+    for d, count in counts.items():
+        row = rows.get(d)
+        if row is None:
+            db.add(FixtureCalendarDate(source=source, fixture_date=d, fetched_at=now, fixtures=count))
+        else:
+            row.fetched_at = now
+            row.fixtures = count
+
+def _store_fixtures(db, source, day_fixtures, leagues=None):
+    """Replaces the stored fixtures of the given dates (optionally only for some leagues) with day_fixtures."""
+    from database import ScheduledFixture
+    query = db.query(ScheduledFixture).filter(
+        ScheduledFixture.source == source,
+        ScheduledFixture.fixture_date.in_(list(day_fixtures))
+    )
+    if leagues is not None:
+        query = query.filter(ScheduledFixture.espn_league.in_(leagues))
+    query.delete(synchronize_session=False)
+    for day, fixtures in day_fixtures.items():
+        seen = set()
+        for f in fixtures:
+            key = (f["espn_league"], f["home"], f["away"])
+            if key in seen:
+                continue
+            seen.add(key)
+            db.add(ScheduledFixture(
+                source=source, espn_league=f["espn_league"], league_id=f["league_id"], fixture_date=day,
+                kickoff=f.get("date"), home_team=f["home"], away_team=f["away"], status=f.get("status")
+            ))
+
+def _fetch_espn_span(db, dates, leagues, now):
+    """
+    Fetches the leagues for the span dates[0]..dates[-1] and stores the fixtures of the wanted dates
+    for every league that answered. Returns the fixtures of each wanted date.
+    """
+    from league_activity import record_poll
+    # One request per league covers the whole span; dates inside it that are still fresh are left alone
+    results = fetch_espn_fixtures([(dates[0], dates[-1])], leagues) if leagues else []
+    wanted = set(dates)
+    day_fixtures = {d: [] for d in dates}
+    for r in results:
+        event_days = [_fixture_day(f.get("date"), dates[0]) for f in r.fixtures]
+        record_poll(db, r.espn_code, r.league_id, r.status, event_days, now)
+        for day, f in zip(event_days, r.fixtures):
+            if day in wanted:
+                day_fixtures[day].append(f)
+    failed = [r for r in results if not r.succeeded]
+    if failed:
+        # Failed leagues keep their previously stored fixtures until their retry (see _retry_espn_leagues)
+        print(f"Fixture calendar: {len(failed)} ESPN leagues failed: " + ", ".join(f"{r.espn_code} ({r.status})" for r in failed))
+    _store_fixtures(db, "espn", day_fixtures, leagues=[r.espn_code for r in results if r.succeeded])
+    return day_fixtures
+
+def _refresh_espn_dates(db, dates, now, skip=()):
+    from league_activity import leagues_due
+    # Dormant leagues (off-season, finished qualifiers) are only polled on their back-off schedule
+    leagues = {code: lid for code, lid in leagues_due(db, LEAGUE_MAPPING, now).items() if code not in skip}
+    day_fixtures = _fetch_espn_span(db, dates, leagues, now)
+    # Freshness is per date: a failed league is retried on its own, not by refetching every league
+    _mark_fresh(db, "espn", {d: len(f) for d, f in day_fixtures.items()}, now)
+
+def _retry_espn_leagues(db, dates, leagues, now):
+    """Refetches leagues whose last request failed over the whole calendar span; date freshness is untouched."""
+    print(f"Fixture calendar: retrying {len(leagues)} failed ESPN leagues: " + ", ".join(leagues))
+    _fetch_espn_span(db, dates, leagues, now)
+
+def _refresh_sportsdb_dates(db, dates, now):
+    for d in dates:
+        try:
+            fixtures = fetch_sportsdb_fixtures(d)
+        except Exception as e:
+            print(f"Fixture calendar: TheSportsDB fetch for {d} failed: {e}")
+            continue
+        _store_fixtures(db, "sportsdb", {d: fixtures})
+        _mark_fresh(db, "sportsdb", {d: len(fixtures)}, now)
+
+def refresh_fixture_calendar(days_ahead=None, force=False):
+    """
+    Brings the stored fixture calendar (today through today + days_ahead) up to date,
+    fetching only the dates whose last fetch is older than their freshness window, plus the
+    whole span for ESPN leagues whose last request failed once their back-off ran out.
+    Returns {source: [refreshed dates]}.
+    """
+    from database import SessionLocal
+    days_ahead = FIXTURE_CALENDAR_DAYS if days_ahead is None else days_ahead
+    today = datetime.datetime.now().date()
+    dates = [(today + datetime.timedelta(days=i)).isoformat() for i in range(days_ahead + 1)]
+    refreshed = {}
+    db = SessionLocal()
+    try:
+        now = datetime.datetime.utcnow()
+        from league_activity import leagues_to_retry
+        retry = leagues_to_retry(db, LEAGUE_MAPPING, now)
+        if retry:
+            _retry_espn_leagues(db, dates, retry, now)
+            db.commit()
+        # Leagues just retried over the whole span are not fetched again for the stale dates
+        refresh_espn = lambda db, stale, now: _refresh_espn_dates(db, stale, now, skip=retry)
+        for source, refresh in (("espn", refresh_espn), ("sportsdb", _refresh_sportsdb_dates)):
+            stale = dates if force else _stale_dates(db, source, dates, now)
+            if stale:
+                print(f"Fixture calendar: refreshing {source} for {len(stale)} dates ({stale[0]} .. {stale[-1]})")
+                refresh(db, stale, now)
+                db.commit()
+            refreshed[source] = stale
+    finally:
+        db.close()
+    return refreshed
+
+def get_calendar_fixtures(date, source=None):
+    """Stored fixtures for one date ("YYYY-MM-DD" or date), in the same shape as fetch_espn_today_fixtures."""
+    from database import SessionLocal, ScheduledFixture
+    day = date.isoformat() if isinstance(date, (datetime.date, datetime.datetime)) else str(date)
+    day = day[:10]
+    db = SessionLocal()
+    try:
+        query = db.query(ScheduledFixture).filter(ScheduledFixture.fixture_date == day)
+        if source:
+            query = query.filter(ScheduledFixture.source == source)
+        return [{
+            "home": f.home_team,
+            "away": f.away_team,
+            "espn_league": f.espn_league,
+            "league_id": f.league_id,
+            "date": f.kickoff,
+            "status": f.status,
+            "name": f"{f.home_team} vs {f.away_team}"
+        } for f in query.order_by(ScheduledFixture.id).all()]
+    finally:
+        db.close()
+
+def _merge_fixtures(espn_fixtures, sportsdb_fixtures):
     combined = list(espn_fixtures)
     existing_pairs = set()
     for f in espn_fixtures:
@@ -164,6 +452,31 @@ def fetch_combined_today_fixtures():
         if signature not in existing_pairs:
             combined.append(f)
             existing_pairs.add(signature)
-            
+    return combined
+
+def fetch_combined_fixtures(date=None):
+    """
+    ESPN and TheSportsDB fixtures for a date (default today) from the rolling calendar,
+    refreshing stale calendar dates first. Falls back to live fetches if the calendar is unavailable.
+    """
+    date = date or datetime.datetime.now().date()
+    try:
+        refresh_fixture_calendar()
+        espn_fixtures = get_calendar_fixtures(date, "espn")
+        sportsdb_fixtures = get_calendar_fixtures(date, "sportsdb")
+    except Exception as e:
+        print(f"Fixture calendar unavailable ({e}). Fetching live schedules...")
+        date_str = date.strftime("%Y-%m-%d") if hasattr(date, "strftime") else str(date)[:10]
+        espn_fixtures = [f for r in fetch_espn_fixtures([date_str]) for f in r.fixtures]
+        try:
+            sportsdb_fixtures = fetch_sportsdb_fixtures(date_str)
+        except Exception as e:
+            print(f"TheSportsDB fetch failed: {e}")
+            sportsdb_fixtures = []
+    return _merge_fixtures(espn_fixtures, sportsdb_fixtures)
+
+def fetch_combined_today_fixtures():
+    """Combines ESPN scoreboard and TheSportsDB schedule fixtures, removing duplicates."""
+    combined = fetch_combined_fixtures()
     print(f"Combined Schedule Caches: Found {len(combined)} total matches globally today.")
     return combined
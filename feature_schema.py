@@ -0,0 +1,103 @@
+# feature_schema.py
+import numpy as np
+
+
+class FeatureSchemaError(ValueError):
+    """A model or a training frame does not have the features of the schema, in its order."""
+
+
+class Feature:
+    """
+    One model input column.
+    At inference its value comes from the match context key `source` (defaults to the name),
+    from a fixed `constant`, or from `derive(value of another feature)`.
+    In training it is read from the frame, except derived features, which are always recomputed.
+    """
+
+    def __init__(self, name, dtype, source=None, constant=None, derive=None):
+        self.name = name
+        self.dtype = np.dtype(dtype)
+        self.source = source or name
+        self.constant = constant
+        self.derive = derive # (input feature name, function)
+
+
+class FeatureSchema:
+    """
+    Column order, dtypes and derivations of the market models' feature matrix, shared by
+    train_model and inference so both build exactly the same columns.
+    """
+
+    def __init__(self, features):
+        self.features = tuple(features)
+        self.columns = tuple(f.name for f in self.features)
+        self.dtypes = {f.name: f.dtype for f in self.features}
+        self._index = {name: i for i, name in enumerate(self.columns)}
+
+    def __len__(self):
+        return len(self.features)
+
+    def check_columns(self, columns, what="model"):
+        """Raises FeatureSchemaError unless columns are exactly the schema's columns, in order."""
+        columns = [str(c) for c in columns]
+        if columns == list(self.columns):
+            return
+        missing = [c for c in self.columns if c not in columns]
+        unexpected = [c for c in columns if c not in self._index]
+        detail = f"missing {missing}, unexpected {unexpected}" if missing or unexpected else "columns out of order"
+        raise FeatureSchemaError(f"Features of the {what} do not match the feature schema: {detail}.")
+
+    def check_model(self, model):
+        """Checks that every market model of a dict was fitted on this schema's columns."""
+        for name, clf in model.items():
+            names = getattr(clf, "feature_names_in_", None)
+            if names is not None:
+                self.check_columns(names, f"'{name}' model")
+            elif getattr(clf, "n_features_in_", len(self)) != len(self):
+                raise FeatureSchemaError(
+                    f"The '{name}' model expects {clf.n_features_in_} features; the feature schema has {len(self)}."
+                )
+
+    def training_frame(self, df):
+        """The schema's columns of a training DataFrame, in order and cast to their dtypes, derived ones recomputed."""
+        import pandas as pd
+        missing = [f.name for f in self.features if not f.derive and f.name not in df.columns]
+        if missing:
+            raise FeatureSchemaError(f"Training data is missing features {missing}.")
+        frame = pd.DataFrame(index=df.index)
+        for f in self.features:
+            if f.derive:
+                # Derivations run once per distinct input value (e.g. once per league), then broadcast
+                source, fn = f.derive
+                values, inverse = np.unique(df[source].to_numpy(), return_inverse=True)
+                column = pd.Series(np.asarray([fn(v.item()) for v in values])[inverse.reshape(-1)], index=df.index)
+            else:
+                column = df[f.name]
+            # An integer column with missing values stays floating (NaN is a valid tree input)
+            dtype = np.float32 if f.dtype.kind in "iu" and column.isna().any() else f.dtype
+            frame[f.name] = column.astype(dtype)
+        return frame
+
+    def row(self, ctx, out=None):
+        """Fills (or allocates) one float32 feature row from a match context."""
+        if out is None:
+            out = np.empty(len(self), dtype=np.float32)
+        for i, f in enumerate(self.features):
+            if f.derive:
+                source, fn = f.derive
+                out[i] = fn(self._value(self.features[self._index[source]], ctx))
+            else:
+                out[i] = self._value(f, ctx)
+        return out
+
+    def matrix(self, contexts, out=None):
+        """Fills (or allocates) a float32 (n_fixtures, n_features) matrix, one row per match context."""
+        if out is None:
+            out = np.empty((len(contexts), len(self)), dtype=np.float32)
+        for i, ctx in enumerate(contexts):
+            self.row(ctx, out[i])
+        return out
+
+    @staticmethod
+    def _value(feature, ctx):
+        return feature.constant if feature.constant is not None else ctx[feature.source]
@@ -0,0 +1,90 @@
+# fixture_ids.py
+import re
+import hashlib
+import datetime
+import unicodedata
+from database import SessionLocal, FixtureRegistry
+
+# ESPN/TheSportsDB fixtures get ids in [1e9, 2e9): clear of API-Football ids and of the
+# football-data.co.uk ids (league + season + row, at most 8 digits), and still a 32-bit INTEGER
+FIXTURE_ID_BASE = 1_000_000_000
+FIXTURE_ID_SPAN = 1_000_000_000
+TEAM_ID_SPAN = 10000
+
+
+def canonical_team_name(name):
+    """
+    Lossless spelling normalization used for identities: case, accents, punctuation and spacing.
+    (standardize_team_name also drops words like "United"/"City", which would merge clubs.)
+    """
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).casefold()
+    return " ".join(re.sub(r"[^0-9a-z]+", " ", text).split())
+
+def kickoff_day(kickoff):
+    """UTC calendar date (YYYY-MM-DD) of a provider kickoff string, or today when it is missing."""
+    if not kickoff:
+        return datetime.datetime.utcnow().date().isoformat()
+    from prediction_model import parse_date
+    return parse_date(kickoff).date().isoformat()
+
+def fixture_key(league_id, kickoff, home, away):
+    return f"{league_id}|{kickoff_day(kickoff)}|{canonical_team_name(home)}|{canonical_team_name(away)}"
+
+def _digest(text):
+    return int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+
+def candidate_fixture_id(key, attempt=0):
+    """Deterministic id for a fixture key; attempt > 0 rehashes after a collision."""
+    text = key if attempt == 0 else f"{key}#{attempt}"
+    return FIXTURE_ID_BASE + _digest(text) % FIXTURE_ID_SPAN
+
+def stable_team_id(name):
+    """Same id for the same team name in every process (unlike hash(), which is salted per run)."""
+    return _digest(canonical_team_name(name)) % TEAM_ID_SPAN
+
+def register_fixtures(fixtures, db=None):
+    """
+    Resolves stable ids for a list of {"league_id", "date", "home", "away"} dicts, in order.
+    Known keys reuse their registered id; new keys take their hash id, rehashed while it belongs
+    to another key, so two fixtures never share an id and a fixture keeps its id across runs.
+    """
+    own_session = db is None
+    db = db or SessionLocal()
+    try:
+        keys = [fixture_key(f.get("league_id"), f.get("date"), f.get("home"), f.get("away")) for f in fixtures]
+        known = dict(db.query(FixtureRegistry.fixture_key, FixtureRegistry.fixture_id).filter(
+            FixtureRegistry.fixture_key.in_(set(keys))
+        ).all()) if keys else {}
+
+        ids = []
+        for f, key in zip(fixtures, keys):
+            if key not in known:
+                attempt = 0
+                fixture_id = candidate_fixture_id(key)
+                while db.query(FixtureRegistry.id).filter(FixtureRegistry.fixture_id == fixture_id).first() is not None:
+                    attempt += 1
+                    fixture_id = candidate_fixture_id(key, attempt)
+                if attempt:
+                    print(f"Fixture id collision for {key}; rehashed {attempt} time(s).")
+                db.add(FixtureRegistry(
+                    fixture_id=fixture_id,
+                    fixture_key=key,
+                    league_id=f.get("league_id"),
+                    fixture_date=key.split("|")[1],
+                    home_team=f.get("home"),
+                    away_team=f.get("away")
+                ))
+                db.flush()
+                known[key] = fixture_id
+            ids.append(known[key])
+        if own_session:
+            db.commit()
+        return ids
+    except Exception:
+        if own_session:
+            db.rollback()
+        raise
+    finally:
+        if own_session:
+            db.close()
@@ -1,13 +1,12 @@
 #football_api.py
 import random
-import requests
 import datetime
 import tweepy
 import pandas as pd
 import numpy as np
-
-# Global quota safeguard
-API_QUOTA_EXCEEDED = False
+import http_transport
+import http_cache
+import api_quota
 
 class ResponseWrapper:
     def __init__(self, response):
@@ -31,47 +30,87 @@ class ResponseWrapper:
     def __getattr__(self, name):
         return getattr(self._response, name)
 
-_original_get = requests.get
+# Pooled keep-alive sessions with retries and timeouts (see http_transport)
+_original_get = http_transport.get
 
-def requests_get_wrapper(url, *args, **kwargs):
-    global API_QUOTA_EXCEEDED
-    if API_QUOTA_EXCEEDED:
-        # Return a mock response indicating quota limit exceeded
-        class MockResponse:
-            status_code = 429
-            text = '{"errors": {"token": "Quota limit exceeded (safeguard)"}}'
-            def json(self):
-                return {"errors": {"token": "Quota limit exceeded (safeguard)"}, "response": []}
-        return MockResponse()
-        
-    try:
-        response = _original_get(url, *args, **kwargs)
-        if response.status_code == 429:
-            print("API response: 429 Too Many Requests. API quota exceeded.")
-            API_QUOTA_EXCEEDED = True
-            
-        elif response.status_code == 200:
+class QuotaResponse:
+    """Returned instead of calling the API when the quota manager cannot fit the request in the budget."""
+    status_code = 429
+    text = '{"errors": {"token": "Quota limit exceeded (safeguard)"}}'
+    headers = {}
+    def json(self):
+        return {"errors": {"token": "Quota limit exceeded (safeguard)"}, "response": []}
+
+def _guarded_get(url, *args, **kwargs):
+    priority = api_quota.priority_for(url)
+    # One retry when the per-minute window was already spent by another process
+    for attempt in range(2):
+        if priority is not None and not api_quota.quota.acquire(priority):
+            print(f"API quota budget exhausted for {http_cache.endpoint_path(url)} (priority {priority}). Skipping request.")
+            return QuotaResponse()
+
+        try:
+            response = _original_get(url, *args, **kwargs)
+        except Exception as e:
+            print(f"Exception during API request to {url}: {e}")
+            class MockErrorResponse:
+                status_code = 500
+                text = str(e)
+                def json(self):
+                    return {"errors": {"exception": str(e)}, "response": []}
+            return MockErrorResponse()
+
+        if priority is None:
+            return response
+
+        body = None
+        if response.status_code == 200:
             try:
-                data = response.json()
-                errors = data.get("errors")
-                if errors:
-                    error_msgs = str(errors).lower()
-                    if "limit" in error_msgs or "quota" in error_msgs or "request limit" in error_msgs:
-                        print(f"API returned limit error: {errors}. Setting API_QUOTA_EXCEEDED flag.")
-                        API_QUOTA_EXCEEDED = True
+                body = response.json()
             except:
                 pass
-        return ResponseWrapper(response)
-    except Exception as e:
-        print(f"Exception during API request to {url}: {e}")
-        class MockErrorResponse:
-            status_code = 500
-            text = str(e)
-            def json(self):
-                return {"errors": {"exception": str(e)}, "response": []}
-        return MockErrorResponse()
+        limited = api_quota.quota.observe(response.status_code, getattr(response, "headers", None), body)
+        if not limited:
+            return response
+        print(f"API rate limit hit (status {response.status_code}). Quota: {api_quota.quota.status()}")
+    return response
+
+def _is_cacheable(response):
+    if response.status_code != 200:
+        return False
+    try:
+        return not response.json().get("errors")
+    except Exception:
+        return False
+
+def requests_get_wrapper(url, *args, **kwargs):
+    ttl = http_cache.ttl_for(url)
+    if not ttl:
+        return ResponseWrapper(_guarded_get(url, *args, **kwargs))
+
+    # API-Football endpoints go through the on-disk response cache (see http_cache.ENDPOINT_TTLS)
+    params = kwargs.get("params", args[0] if args else None)
+    cached, fresh = http_cache.lookup(url, params)
+    if cached is not None and fresh:
+        return ResponseWrapper(cached)
+
+    def fetch_and_store():
+        response = _guarded_get(url, *args, **kwargs)
+        if _is_cacheable(response):
+            http_cache.store(url, params, response.status_code, response.text, ttl)
+        return response
+
+    if cached is not None and http_cache.is_servable_stale(cached, ttl):
+        http_cache.revalidate_in_background(url, params, fetch_and_store)
+        return ResponseWrapper(cached)
+
+    response = fetch_and_store()
+    if response.status_code != 200 and cached is not None:
+        # Quota exhausted or network failure: an old answer beats an empty one
+        print(f"Serving stale cached response for {url} (status {response.status_code}).")
+        return ResponseWrapper(cached)
+    return ResponseWrapper(response)
 
-requests.get = requests_get_wrapper
 
 
 
@@ -81,7 +120,7 @@ def fetch_team_data(api_key, league_id):
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
 
     if response.status_code == 200:
         team_data = response.json()
@@ -172,7 +211,7 @@ def get_prioritized_fixtures(date, api_key):
     }
     
     try:
-        response = requests.get(url, headers=headers, params=querystring)
+        response = requests_get_wrapper(url, headers=headers, params=querystring)
         if response.status_code != 200:
             print(f"Failed to fetch global fixtures. Status: {response.status_code}")
             return []
@@ -229,7 +268,7 @@ def get_leagues(api_key):
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers)
+    response = requests_get_wrapper(url, headers=headers)
 
     if response.status_code == 200:
         return response.json()
@@ -253,7 +292,7 @@ def get_fixtures(api_key, league_id=None, season=None, date=None, team_id=None,
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
 
     if response.status_code == 200:
         return response.json().get("response", [])
@@ -276,7 +315,7 @@ def get_team_statistics(league_id, season, team_id, api_key):
         "x-apisports-key": api_key
     }
 
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
 
     if response.status_code == 200:
         print(response.text)  # Print the response content
@@ -299,7 +338,7 @@ def get_player_statistics(league_id, season, team_id, api_key):
         "x-apisports-key": api_key
     }
 
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
 
     if response.status_code == 200:
         print(response.text)  # Print the response content
@@ -322,7 +361,7 @@ def get_head_to_head_statistics(league_id, team_id1, team_id2, last_matches, api
         "x-apisports-key": api_key
     }
 
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
 
     if response.status_code == 200:
         print(response.text)  # Print the response content
@@ -345,7 +384,7 @@ def get_team_injuries(league_id, season, team_id, api_key):
         "x-apisports-key": api_key
     }
 
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
 
     if response.status_code == 200:
         print(response.text)  # Print the response content
@@ -367,7 +406,7 @@ def get_team_standings(league_id, season, api_key):
         "x-apisports-key": api_key
     }
 
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
 
     if response.status_code == 200:
         print(response.text)  # Print the response content
@@ -411,7 +450,7 @@ def get_lineups(fixture_id, api_key):
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
     if response.status_code == 200:
         return response.json().get("response", [])
     else:
@@ -425,7 +464,7 @@ def get_fixture_statistics(fixture_id, api_key):
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
     if response.status_code == 200:
         return response.json().get("response", [])
     else:
@@ -439,7 +478,7 @@ def get_fixture_by_id(fixture_id, api_key):
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
     if response.status_code == 200:
         data = response.json().get("response", [])
         return data[0] if data else None
@@ -454,7 +493,7 @@ def get_predictions(fixture_id, api_key):
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
     if response.status_code == 200:
         return response.json().get("response", [])
     else:
@@ -468,7 +507,7 @@ def get_odds(fixture_id, api_key):
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
     if response.status_code == 200:
         return response.json().get("response", [])
     else:
@@ -482,7 +521,7 @@ def get_fixtures_by_date(date_str, api_key):
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
     if response.status_code == 200:
         return response.json().get("response", [])
     else:
@@ -496,7 +535,7 @@ def get_top_scorers(league_id, season, api_key):
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
     if response.status_code == 200:
         return response.json().get("response", [])
     else:
@@ -510,7 +549,7 @@ def get_extended_h2h(home_id, away_id, api_key, last_n=10):
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
     if response.status_code == 200:
         return response.json().get("response", [])
     else:
@@ -524,7 +563,7 @@ def get_coach_history(team_id, api_key):
     headers = {
         "x-apisports-key": api_key
     }
-    response = requests.get(url, headers=headers, params=querystring)
+    response = requests_get_wrapper(url, headers=headers, params=querystring)
     if response.status_code == 200:
         return response.json().get("response", [])
     else:
@@ -0,0 +1,186 @@
+# http_cache.py
+import os
+import time
+import sqlite3
+import threading
+from urllib.parse import urlsplit, urlencode
+
+# Freshness per API-Football endpoint path, in seconds. Paths not listed here are never cached.
+ENDPOINT_TTLS = {
+    "/fixtures": 10 * 60,
+    "/fixtures/lineups": 15 * 60,
+    "/fixtures/statistics": 15 * 60,
+    "/fixtures/headtohead": 24 * 3600,
+    "/teams/statistics": 6 * 3600,
+    "/standings": 6 * 3600,
+    "/injuries": 3600,
+    "/odds": 3600,
+    "/predictions": 6 * 3600,
+    "/players": 12 * 3600,
+    "/players/topscorers": 12 * 3600,
+    "/coachs": 7 * 24 * 3600,
+    "/teams": 7 * 24 * 3600,
+    "/leagues": 7 * 24 * 3600
+}
+
+# How long past its TTL an entry may still be served while it is revalidated in the background
+STALE_WHILE_REVALIDATE_FACTOR = 1.0
+# Entries fetched longer ago than this are deleted; store() purges at most once per interval and process
+PURGE_MAX_AGE_SECONDS = 14 * 24 * 3600
+PURGE_INTERVAL_SECONDS = 3600
+
+_lock = threading.Lock()
+_initialized_paths = set()
+_revalidating = set()
+_last_purge = 0.0
+
+
+def cache_path():
+    return os.getenv("HTTP_CACHE_PATH", "http_cache.db")
+
+def cache_enabled():
+    return os.getenv("HTTP_CACHE_ENABLED", "true").lower() != "false"
+
+def endpoint_path(url):
+    """API-Football endpoint path of url (e.g. "/fixtures/headtohead"), or None for other hosts."""
+    parts = urlsplit(url)
+    if not parts.netloc.endswith("api-sports.io"):
+        return None
+    path = parts.path
+    # Strip the API version prefix, e.g. /v3/fixtures -> /fixtures (v3.football.api-sports.io has none)
+    if path.startswith("/v3/"):
+        path = path[3:]
+    return path.rstrip("/")
+
+def ttl_for(url):
+    """TTL in seconds for the endpoint behind url, or None when it should not be cached."""
+    if not cache_enabled():
+        return None
+    path = endpoint_path(url)
+    return ENDPOINT_TTLS.get(path) if path is not None else None
+
+def cache_key(url, params=None):
+    """URL plus params sorted by name with values stringified, so {"last": 10} and {"last": "10"} share an entry."""
+    items = sorted((str(k), str(v)) for k, v in (params or {}).items() if v is not None)
+    return f"{url}?{urlencode(items)}" if items else url
+
+
+class CachedResponse:
+    """Minimal requests.Response stand-in rebuilt from a cached body."""
+
+    def __init__(self, url, status_code, body, fetched_at, stale=False):
+        self.url = url
+        self.status_code = status_code
+        self.text = body
+        self.content = body.encode("utf-8")
+        self.fetched_at = fetched_at
+        self.stale = stale
+        self.from_cache = True
+        self.headers = {}
+
+    def json(self):
+        import json
+        return json.loads(self.text)
+
+
+def _connect():
+    path = cache_path()
+    conn = sqlite3.connect(path, timeout=10)
+    if path not in _initialized_paths:
+        with _lock:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS http_responses ("
+                "key TEXT PRIMARY KEY, url TEXT NOT NULL, status INTEGER NOT NULL, body TEXT NOT NULL, "
+                "fetched_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.commit()
+            _initialized_paths.add(path)
+    return conn
+
+def lookup(url, params=None):
+    """Returns (CachedResponse, is_fresh), or (None, False) when nothing usable is stored."""
+    key = cache_key(url, params)
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute(
+                "SELECT status, body, fetched_at, expires_at FROM http_responses WHERE key = ?", (key,)
+            ).fetchone()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"HTTP cache read failed for {url}: {e}")
+        return None, False
+    if row is None:
+        return None, False
+    status, body, fetched_at, expires_at = row
+    fresh = time.time() < expires_at
+    return CachedResponse(url, status, body, fetched_at, stale=not fresh), fresh
+
+def is_servable_stale(cached, ttl):
+    """Whether a stale entry is still young enough to serve while it is revalidated."""
+    return time.time() - cached.fetched_at < ttl * (1 + STALE_WHILE_REVALIDATE_FACTOR)
+
+def store(url, params, status_code, body, ttl):
+    now = time.time()
+    try:
+        conn = _connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_responses (key, url, status, body, fetched_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key(url, params), url, status_code, body, now, now + ttl)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"HTTP cache write failed for {url}: {e}")
+        return
+    if _purge_due(now):
+        purge_expired()
+
+def _purge_due(now):
+    global _last_purge
+    with _lock:
+        if now - _last_purge < PURGE_INTERVAL_SECONDS:
+            return False
+        _last_purge = now
+        return True
+
+def revalidate_in_background(url, params, fetch):
+    """Runs fetch() on a worker thread unless the same key is already being refreshed."""
+    key = cache_key(url, params)
+    with _lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+
+    def run():
+        try:
+            fetch()
+        except Exception as e:
+            print(f"Background revalidation of {url} failed: {e}")
+        finally:
+            with _lock:
+                _revalidating.discard(key)
+
+    threading.Thread(target=run, name=f"revalidate:{key}"[:60]).start()
+
+def purge_expired(max_age_seconds=None):
+    """Deletes entries fetched longer than max_age_seconds (PURGE_MAX_AGE_SECONDS) ago."""
+    max_age_seconds = max_age_seconds or PURGE_MAX_AGE_SECONDS
+    try:
+        conn = _connect()
+        try:
+            deleted = conn.execute(
+                "DELETE FROM http_responses WHERE fetched_at < ?", (time.time() - max_age_seconds,)
+            ).rowcount
+            conn.commit()
+            return deleted
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"HTTP cache purge failed: {e}")
+        return 0
@@ -0,0 +1,120 @@
+# league_activity.py
+import os
+import datetime
+from database import LeagueActivity
+
+# Every league is polled at least this often, whatever its learned calendar says
+FULL_SWEEP_DAYS = float(os.getenv("ESPN_FULL_SWEEP_DAYS", "7"))
+# Longest gap between polls of a dormant league. The calendar sweep looks FIXTURE_CALENDAR_DAYS ahead,
+# so polling at least every 6 days still spots a returning league a day or more before kickoff.
+DORMANT_MAX_DAYS = 6
+# Days before the expected start of a new season at which a dormant league is polled every sweep again
+SEASON_WAKEUP_DAYS = 14
+# A gap between matchdays longer than this starts a new season
+SEASON_BREAK_DAYS = 45
+# Back-off after a failed scoreboard request: doubles with every consecutive failure, up to the cap
+RETRY_MIN_MINUTES = float(os.getenv("ESPN_RETRY_MIN_MINUTES", "15"))
+RETRY_MAX_HOURS = float(os.getenv("ESPN_RETRY_MAX_HOURS", "24"))
+
+_SUCCEEDED = ("ok", "no_events")
+
+_FULL_SWEEP_KEY = "*"
+
+def _day(value):
+    return datetime.date.fromisoformat(value) if value else None
+
+def _poll_interval(row, today):
+    """Days until a league should be polled again, from its learned calendar."""
+    last_event = _day(row.last_event_date)
+    if last_event is None:
+        # Never seen a fixture: back off from the first poll onwards
+        first = row.first_polled_at.date() if row.first_polled_at else today
+        idle_days = (today - first).days
+    else:
+        idle_days = (today - last_event).days
+    # Upcoming fixture known, or still within the normal rhythm of matchdays (incl. international breaks)
+    if idle_days <= max(10, 2 * (row.cadence_days or 7)):
+        return 0
+
+    season_start = _day(row.season_start)
+    if season_start is not None:
+        # Around the same date one year on, the league is presumably about to return: keep a close watch
+        days_to_start = (season_start + datetime.timedelta(days=365) - today).days
+        if -SEASON_WAKEUP_DAYS <= days_to_start <= SEASON_WAKEUP_DAYS:
+            return 1
+    return min(DORMANT_MAX_DAYS, max(1, idle_days // 7))
+
+def leagues_due(db, leagues, now):
+    """
+    Subset of leagues ({espn_code: league_id}) to poll now. Active leagues are polled every time,
+    dormant ones on their back-off schedule, and everything once per full sweep.
+    """
+    rows = {r.espn_league: r for r in db.query(LeagueActivity).filter(
+        LeagueActivity.espn_league.in_(list(leagues) + [_FULL_SWEEP_KEY])
+    ).all()}
+    sweep = rows.get(_FULL_SWEEP_KEY)
+    if sweep is None or sweep.last_polled_at is None or now - sweep.last_polled_at >= datetime.timedelta(days=FULL_SWEEP_DAYS):
+        if sweep is None:
+            sweep = LeagueActivity(espn_league=_FULL_SWEEP_KEY)
+            db.add(sweep)
+        sweep.last_polled_at = now
+        print("League activity: running full sweep of all leagues.")
+        return dict(leagues)
+
+    due = {}
+    for code, league_id in leagues.items():
+        row = rows.get(code)
+        if row is None or row.next_poll_at is None or row.next_poll_at <= now:
+            due[code] = league_id
+    skipped = len(leagues) - len(due)
+    if skipped:
+        print(f"League activity: skipping {skipped} dormant leagues, polling {len(due)}.")
+    return due
+
+def leagues_to_retry(db, leagues, now):
+    """Subset of leagues ({espn_code: league_id}) whose last request failed and whose back-off has run out."""
+    rows = db.query(LeagueActivity).filter(
+        LeagueActivity.espn_league.in_(list(leagues)),
+        LeagueActivity.last_status.notin_(_SUCCEEDED),
+        LeagueActivity.next_poll_at <= now
+    ).all()
+    return {r.espn_league: leagues[r.espn_league] for r in rows}
+
+def _retry_delay(row):
+    """Back-off before retrying a failed league: twice the previous one after consecutive failures, capped."""
+    delay = datetime.timedelta(minutes=RETRY_MIN_MINUTES)
+    failed_before = row.last_status is not None and row.last_status not in _SUCCEEDED
+    if failed_before and row.next_poll_at and row.last_polled_at:
+        delay = max(delay, 2 * (row.next_poll_at - row.last_polled_at))
+    return min(delay, datetime.timedelta(hours=RETRY_MAX_HOURS))
+
+def record_poll(db, espn_code, league_id, status, event_days, now):
+    """Updates a league's learned calendar from one scoreboard result (event_days: YYYY-MM-DD strings)."""
+    row = db.query(LeagueActivity).filter(LeagueActivity.espn_league == espn_code).first()
+    if row is None:
+        row = LeagueActivity(espn_league=espn_code, league_id=league_id, first_polled_at=now)
+        db.add(row)
+    retry_delay = _retry_delay(row)
+    row.last_status = status
+    row.last_polled_at = now
+
+    if status not in _SUCCEEDED:
+        # Failed requests teach us nothing about the calendar; the league alone is retried after a back-off
+        row.next_poll_at = now + retry_delay
+        return row
+
+    last = _day(row.last_event_date)
+    for day in sorted(set(_day(d) for d in event_days if d)):
+        if last is not None and day <= last:
+            continue
+        gap = (day - last).days if last is not None else None
+        if gap is None or gap > SEASON_BREAK_DAYS:
+            row.season_start = day.isoformat()
+        else:
+            row.cadence_days = gap if row.cadence_days is None else 0.7 * row.cadence_days + 0.3 * gap
+        last = day
+    if last is not None:
+        row.last_event_date = last.isoformat()
+
+    row.next_poll_at = now + datetime.timedelta(days=_poll_interval(row, now.date()))
+    return row
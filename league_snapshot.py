@@ -0,0 +1,244 @@
+# league_snapshot.py
+import numpy as np
+from bounded_cache import BoundedCache
+from database import SessionLocal, PlayedMatch
+from team_names import TeamNameResolver
+
+# Sentinel used for rows without a kickoff date so they sort last in "most recent first" queries
+_MISSING_DATE = np.iinfo(np.int64).min
+
+
+class LeagueSnapshot:
+    """
+    Columnar, in-memory copy of a league's played_matches rows.
+    Loaded once per league and used to answer form, H2H, standings and
+    star power / defensive wall queries without touching the database.
+    """
+
+    def __init__(self, league_id, rows):
+        self.league_id = league_id
+
+        # Team and season names are dictionary-encoded into small integer codes
+        self.teams = []
+        self.team_index = {}
+        self.seasons = []
+        self.season_index = {}
+
+        n = len(rows)
+        self.home = np.empty(n, dtype=np.int32)
+        self.away = np.empty(n, dtype=np.int32)
+        self.home_goals = np.empty(n, dtype=np.int16)
+        self.away_goals = np.empty(n, dtype=np.int16)
+        self.season = np.empty(n, dtype=np.int32)
+        self.dates = np.empty(n, dtype=np.int64)
+
+        for i, (season, match_date, home_team, away_team, hg, ag) in enumerate(rows):
+            self.home[i] = self._team_code(home_team)
+            self.away[i] = self._team_code(away_team)
+            self.home_goals[i] = hg or 0
+            self.away_goals[i] = ag or 0
+            self.season[i] = self._season_code(season)
+            self.dates[i] = np.datetime64(match_date, "us").astype(np.int64) if match_date else _MISSING_DATE
+
+        self._standings_cache = {}
+        self._resolver = None
+        self._scoreline_model = None
+
+    def _team_code(self, name):
+        code = self.team_index.get(name)
+        if code is None:
+            code = len(self.teams)
+            self.team_index[name] = code
+            self.teams.append(name)
+        return code
+
+    def _season_code(self, season):
+        season = str(season)
+        code = self.season_index.get(season)
+        if code is None:
+            code = len(self.seasons)
+            self.season_index[season] = code
+            self.seasons.append(season)
+        return code
+
+    @classmethod
+    def load(cls, league_id):
+        """Reads every played match for the league in a single query."""
+        db = SessionLocal()
+        try:
+            rows = db.query(
+                PlayedMatch.season,
+                PlayedMatch.match_date,
+                PlayedMatch.home_team,
+                PlayedMatch.away_team,
+                PlayedMatch.home_goals,
+                PlayedMatch.away_goals
+            ).filter(PlayedMatch.league_id == league_id).order_by(PlayedMatch.id).all()
+            return cls(league_id, rows)
+        except Exception as e:
+            print(f"Error loading league snapshot for league {league_id}: {e}")
+            return cls(league_id, [])
+        finally:
+            db.close()
+
+    @property
+    def resolver(self):
+        """Team name resolver for this league, built on first use."""
+        if self._resolver is None:
+            self._resolver = TeamNameResolver(self.teams)
+        return self._resolver
+
+    @property
+    def scoreline_model(self):
+        """Dixon-Coles ScorelineModel fitted on this snapshot's matches, built on first use (None without goals)."""
+        if self._scoreline_model is None and len(self):
+            from scoreline_model import ScorelineModel
+            self._scoreline_model = ScorelineModel.fit(self)
+            _league_snapshots.resize("league", self.league_id, self)
+        return self._scoreline_model
+
+    def __len__(self):
+        return len(self.home)
+
+    @property
+    def nbytes(self):
+        """Size of the column arrays and the fitted scoreline model, used for cache size accounting."""
+        size = sum(a.nbytes for a in (self.home, self.away, self.home_goals, self.away_goals, self.season, self.dates))
+        if self._scoreline_model is not None:
+            size += self._scoreline_model.nbytes
+        return size
+
+    def _latest(self, idx, count):
+        """Returns the row indices in idx ordered most recent first, limited to count."""
+        order = np.argsort(-self.dates[idx], kind="stable")
+        return idx[order[:count]]
+
+    def form(self, team_name, count=5):
+        """Form points (0-100) over the last 'count' games, same scale as get_local_form."""
+        code = self.team_index.get(team_name)
+        if code is None:
+            return 50
+        idx = np.flatnonzero((self.home == code) | (self.away == code))
+        if idx.size == 0:
+            return 50
+        idx = self._latest(idx, count)
+
+        hg = self.home_goals[idx]
+        ag = self.away_goals[idx]
+        is_home = self.home[idx] == code
+        wins = (is_home & (hg > ag)) | (~is_home & (ag > hg))
+        score = int(wins.sum()) * 20 + int((hg == ag).sum()) * 10
+
+        max_possible = count * 20
+        return int((score / max_possible) * 100)
+
+    def h2h(self, home_team, away_team, last_n=10):
+        """H2H dominance score over the last 'last_n' meetings, same scale as get_local_h2h."""
+        h = self.team_index.get(home_team)
+        a = self.team_index.get(away_team)
+        if h is None or a is None:
+            return 0
+        idx = np.flatnonzero(((self.home == h) & (self.away == a)) | ((self.home == a) & (self.away == h)))
+        if idx.size == 0:
+            return 0
+        idx = self._latest(idx, last_n)
+
+        hg = self.home_goals[idx]
+        ag = self.away_goals[idx]
+        winner = np.where(hg > ag, self.home[idx], np.where(ag > hg, self.away[idx], -1))
+        diff = int((winner == h).sum()) - int((winner == a).sum())
+        return diff * 3
+
+    def standings(self, season):
+        """Team name -> rank for the season, ordered by points, goal difference and goals scored."""
+        season = str(season)
+        if season in self._standings_cache:
+            return self._standings_cache[season]
+
+        s_code = self.season_index.get(season)
+        if s_code is None:
+            return {}
+        idx = np.flatnonzero(self.season == s_code)
+
+        # Interleave home/away so tie order follows each team's first appearance, like the dict-based builder
+        appearances = np.empty(idx.size * 2, dtype=np.int32)
+        appearances[0::2] = self.home[idx]
+        appearances[1::2] = self.away[idx]
+        codes, first_seen = np.unique(appearances, return_index=True)
+        codes = codes[np.argsort(first_seen)]
+
+        n_teams = len(self.teams)
+        hg = self.home_goals[idx].astype(np.int64)
+        ag = self.away_goals[idx].astype(np.int64)
+        home_pts = np.where(hg > ag, 3, np.where(hg == ag, 1, 0))
+        away_pts = np.where(ag > hg, 3, np.where(hg == ag, 1, 0))
+
+        points = np.bincount(self.home[idx], home_pts, n_teams) + np.bincount(self.away[idx], away_pts, n_teams)
+        scored = np.bincount(self.home[idx], hg, n_teams) + np.bincount(self.away[idx], ag, n_teams)
+        conceded = np.bincount(self.home[idx], ag, n_teams) + np.bincount(self.away[idx], hg, n_teams)
+
+        pts = points[codes]
+        gd = scored[codes] - conceded[codes]
+        gs = scored[codes]
+        # lexsort is stable and sorts by the last key first
+        order = np.lexsort((-gs, -gd, -pts))
+        ranks = {self.teams[codes[pos]]: rank + 1 for rank, pos in enumerate(order)}
+
+        self._standings_cache[season] = ranks
+        return ranks
+
+    def _season_rows(self, code, season):
+        s_code = self.season_index.get(str(season))
+        if s_code is None:
+            return np.empty(0, dtype=np.intp)
+        return np.flatnonzero((self.season == s_code) & ((self.home == code) | (self.away == code)))
+
+    def team_stats(self, team_name, season):
+        """Star power and defensive wall scores, same scale as get_local_team_stats."""
+        code = self.team_index.get(team_name)
+        if code is None:
+            return 5.0, 5.0
+
+        idx = self._season_rows(code, season)
+        if idx.size == 0:
+            try:
+                season_clean = season.split("/")[0]
+                prev_season = f"{int(season_clean)-1}/{season_clean}" if "/" in season else str(int(season_clean)-1)
+                idx = self._season_rows(code, prev_season)
+            except:
+                pass
+
+        if idx.size == 0:
+            return 5.0, 5.0
+
+        is_home = self.home[idx] == code
+        hg = self.home_goals[idx]
+        ag = self.away_goals[idx]
+        goals_scored = int(np.where(is_home, hg, ag).sum())
+        goals_conceded = int(np.where(is_home, ag, hg).sum())
+        mp = idx.size
+
+        avg_scored = goals_scored / mp
+        avg_conceded = goals_conceded / mp
+
+        star_power = min(10.0, max(1.0, avg_scored * 4.0))
+        def_wall = min(15.0, max(1.0, 15.0 - (avg_conceded * 5.0)))
+
+        return star_power, def_wall
+
+
+# One snapshot per league, dropped whenever new played matches are written.
+# The TTL picks up rows written by other processes (e.g. the scheduler next to the API).
+_league_snapshots = BoundedCache("league_snapshots")
+_league_snapshots.configure("league", ttl=1800, max_entries=32)
+
+def get_league_snapshot(league_id):
+    """Returns the cached snapshot for a league, loading it from the database on first use."""
+    return _league_snapshots.get_or_load("league", league_id, lambda: LeagueSnapshot.load(league_id))
+
+def invalidate_league_snapshot(league_id=None):
+    """Drops the cached snapshot for a league (or all leagues) so the next read reloads it."""
+    if league_id is None:
+        _league_snapshots.clear("league")
+    else:
+        _league_snapshots.pop("league", league_id)
@@ -0,0 +1,108 @@
+# league_standings.py
+from database import SessionLocal, LeagueStanding, PlayedMatch
+
+def _result_deltas(matches, sign=1):
+    """
+    Folds match results into per-team stat deltas keyed by (league_id, season, team).
+    Insertion order of the returned dict follows each team's first appearance.
+    """
+    deltas = {}
+    for m in matches:
+        league_id = m["league_id"]
+        if league_id is None:
+            # Manually decided results without a league cannot be placed in a table
+            continue
+        season = str(m["season"])
+        hg = m["home_goals"] or 0
+        ag = m["away_goals"] or 0
+        home_pts = 3 if hg > ag else (1 if hg == ag else 0)
+        away_pts = 3 if ag > hg else (1 if hg == ag else 0)
+
+        for team, scored, conceded, pts in ((m["home_team"], hg, ag, home_pts), (m["away_team"], ag, hg, away_pts)):
+            key = (league_id, season, team)
+            if key not in deltas:
+                deltas[key] = {"points": 0, "goals_scored": 0, "goals_conceded": 0, "matches_played": 0}
+            d = deltas[key]
+            d["points"] += sign * pts
+            d["goals_scored"] += sign * scored
+            d["goals_conceded"] += sign * conceded
+            d["matches_played"] += sign
+    return deltas
+
+def apply_played_results(db, matches, sign=1):
+    """
+    Adds (sign=1) or removes (sign=-1) match results from the league_standings table.
+    Runs inside the caller's session and transaction; the caller commits.
+    """
+    deltas = _result_deltas(matches, sign)
+    if not deltas:
+        return
+
+    # Load every existing row touched by this batch with one query per league/season
+    existing = {}
+    next_position = {}
+    for league_id, season in set((k[0], k[1]) for k in deltas):
+        rows = db.query(LeagueStanding).filter(
+            LeagueStanding.league_id == league_id,
+            LeagueStanding.season == season
+        ).all()
+        for row in rows:
+            existing[(league_id, season, row.team)] = row
+        next_position[(league_id, season)] = max((row.first_seen for row in rows), default=-1) + 1
+
+    for key, d in deltas.items():
+        row = existing.get(key)
+        if row is None:
+            league_id, season, team = key
+            row = LeagueStanding(
+                league_id=league_id,
+                season=season,
+                team=team,
+                points=0,
+                goals_scored=0,
+                goals_conceded=0,
+                matches_played=0,
+                first_seen=next_position[(league_id, season)]
+            )
+            next_position[(league_id, season)] += 1
+            db.add(row)
+        row.points += d["points"]
+        row.goals_scored += d["goals_scored"]
+        row.goals_conceded += d["goals_conceded"]
+        row.matches_played += d["matches_played"]
+    db.flush()
+
+def rebuild_league_standings(db, league_id=None):
+    """Recomputes the standings of one league (or every league) from played_matches."""
+    query = db.query(
+        PlayedMatch.league_id,
+        PlayedMatch.season,
+        PlayedMatch.home_team,
+        PlayedMatch.away_team,
+        PlayedMatch.home_goals,
+        PlayedMatch.away_goals
+    )
+    delete_query = db.query(LeagueStanding)
+    if league_id is not None:
+        query = query.filter(PlayedMatch.league_id == league_id)
+        delete_query = delete_query.filter(LeagueStanding.league_id == league_id)
+
+    delete_query.delete(synchronize_session=False)
+    apply_played_results(db, (row._asdict() for row in query.order_by(PlayedMatch.id).yield_per(1000)))
+
+def get_league_standings(league_id, season):
+    """Team name -> rank for a league season, read from the materialized league_standings table."""
+    db = SessionLocal()
+    try:
+        rows = db.query(LeagueStanding.team).filter(
+            LeagueStanding.league_id == league_id,
+            LeagueStanding.season == str(season)
+        ).order_by(
+            LeagueStanding.points.desc(),
+            (LeagueStanding.goals_scored - LeagueStanding.goals_conceded).desc(),
+            LeagueStanding.goals_scored.desc(),
+            LeagueStanding.first_seen
+        ).all()
+        return {row[0]: rank + 1 for rank, row in enumerate(rows)}
+    finally:
+        db.close()
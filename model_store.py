@@ -0,0 +1,178 @@
+# model_store.py
+import os
+import json
+import shutil
+import hashlib
+import datetime
+import tempfile
+import pickle
+import numpy as np
+import sklearn
+
+try:
+    import fcntl
+except ImportError: # Windows: publishes are still atomic, only concurrent manifest edits are unguarded
+    fcntl = None
+
+# Root of the store: <dir>/<league_id>/manifest.json plus one directory per model version
+MODEL_STORE_DIR = os.getenv("MODEL_STORE_DIR", "models")
+# Versions kept per league after a publish (the current one included)
+MODEL_STORE_KEEP_VERSIONS = int(os.getenv("MODEL_STORE_KEEP_VERSIONS", "3"))
+
+MANIFEST = "manifest.json"
+
+
+def _league_dir(league_id):
+    return os.path.join(MODEL_STORE_DIR, str(league_id))
+
+def _utcnow():
+    return datetime.datetime.utcnow()
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def training_data_version(df):
+    """Content hash of a training DataFrame: same rows and values -> same version."""
+    if df is None or df.empty:
+        return None
+    import pandas as pd
+    hashed = pd.util.hash_pandas_object(df, index=False).values
+    return hashlib.sha256(hashed.tobytes() + ",".join(map(str, df.columns)).encode()).hexdigest()[:16]
+
+def training_data_key_version(key):
+    """Version of training data identified by its data key (row count, last id, state) instead of its content."""
+    return hashlib.sha256(key.encode()).hexdigest()[:16] if key else None
+
+def read_manifest(league_id):
+    path = os.path.join(_league_dir(league_id), MANIFEST)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading model manifest for league {league_id}: {e}")
+        return None
+
+def _write_manifest(league_id, manifest):
+    league_dir = _league_dir(league_id)
+    fd, tmp_path = tempfile.mkstemp(prefix=".manifest-", dir=league_dir)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, os.path.join(league_dir, MANIFEST))
+
+def current_entry(league_id, version=None):
+    """Manifest entry of the current (or the given) version, or None."""
+    manifest = read_manifest(league_id)
+    if not manifest:
+        return None
+    version = version or manifest.get("current")
+    for entry in manifest.get("versions", []):
+        if entry["version"] == version:
+            return entry
+    return None
+
+def entry_age_hours(entry):
+    trained_at = datetime.datetime.fromisoformat(entry["trained_at"])
+    return (_utcnow() - trained_at).total_seconds() / 3600
+
+def publish(league_id, model, feature_columns, train_df=None, arrays=None, metadata=None):
+    """
+    Writes a new version of a league's market models (and optional named numpy arrays) and makes
+    it current; metadata adds fields to the version's manifest entry (a training_data_version in it
+    replaces the content hash of train_df, also in the version id). Every artifact is written
+    into a temporary directory that is renamed into place, then the manifest is replaced
+    atomically, so readers see either the old or the new version. Returns the version id.
+    """
+    league_dir = _league_dir(league_id)
+    os.makedirs(league_dir, exist_ok=True)
+    now = _utcnow()
+    data_version = (metadata or {}).get("training_data_version") or training_data_version(train_df)
+    version = now.strftime("%Y%m%dT%H%M%S") + (f"-{data_version[:8]}" if data_version else "")
+
+    tmp_dir = tempfile.mkdtemp(prefix=".publish-", dir=league_dir)
+    try:
+        def describe(filename):
+            path = os.path.join(tmp_dir, filename)
+            return {"file": filename, "bytes": os.path.getsize(path), "sha256": _sha256_file(path)}
+
+        # sklearn copies tree nodes into its own buffers on unpickling, so mapping them saves
+        # nothing; estimators are plain pickles and raw arrays are the memory-mapped artifacts
+        markets = {}
+        for name, estimator in model.items():
+            with open(os.path.join(tmp_dir, f"{name}.pkl"), "wb") as f:
+                pickle.dump(estimator, f, protocol=pickle.HIGHEST_PROTOCOL)
+            markets[name] = describe(f"{name}.pkl")
+        stored_arrays = {}
+        for name, array in (arrays or {}).items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+            stored_arrays[name] = dict(describe(f"{name}.npy"), dtype=str(array.dtype), shape=list(array.shape))
+
+        lock = open(os.path.join(league_dir, ".lock"), "a")
+        try:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            final_dir = os.path.join(league_dir, version)
+            suffix = 1
+            while os.path.exists(final_dir):
+                suffix += 1
+                final_dir = os.path.join(league_dir, f"{version}.{suffix}")
+            version = os.path.basename(final_dir)
+            os.rename(tmp_dir, final_dir)
+
+            manifest = read_manifest(league_id) or {"league_id": league_id, "versions": []}
+            manifest["versions"].insert(0, {
+                "version": version,
+                "trained_at": now.isoformat(),
+                "training_data_version": data_version,
+                "training_rows": int(len(train_df)) if train_df is not None else None,
+                "feature_columns": list(feature_columns),
+                "markets": markets,
+                "arrays": stored_arrays,
+                "sklearn": sklearn.__version__,
+                **(metadata or {})
+            })
+            manifest["current"] = version
+            dropped = manifest["versions"][MODEL_STORE_KEEP_VERSIONS:]
+            manifest["versions"] = manifest["versions"][:MODEL_STORE_KEEP_VERSIONS]
+            _write_manifest(league_id, manifest)
+        finally:
+            lock.close()
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Readers that opened an old version keep their mappings; unlinked files live until closed
+    for entry in dropped:
+        shutil.rmtree(os.path.join(league_dir, entry["version"]), ignore_errors=True)
+    return version
+
+def load(league_id, version=None):
+    """
+    Loads the market models of the current (or given) version.
+    Returns (model_dict, manifest_entry), or (None, None) when nothing is stored.
+    """
+    entry = current_entry(league_id, version)
+    if entry is None:
+        return None, None
+    version_dir = os.path.join(_league_dir(league_id), entry["version"])
+    model = {}
+    for name, info in entry["markets"].items():
+        with open(os.path.join(version_dir, info["file"]), "rb") as f:
+            model[name] = pickle.load(f)
+    return model, entry
+
+def load_arrays(league_id, entry):
+    """
+    Memory-maps the numpy arrays stored with a version (read-only). Every process mapping the
+    same version shares one physical copy through the page cache.
+    """
+    version_dir = os.path.join(_league_dir(league_id), entry["version"])
+    return {
+        name: np.load(os.path.join(version_dir, info["file"]), mmap_mode="r", allow_pickle=False)
+        for name, info in entry.get("arrays", {}).items()
+    }
@@ -0,0 +1,118 @@
+# model_training.py
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# League training processes run at once (defaults to one per core)
+MODEL_TRAIN_WORKERS = int(os.getenv("MODEL_TRAIN_WORKERS", str(os.cpu_count() or 1)))
+# Minimum seconds between two retrain policy checks of one league in the serving path
+RETRAIN_CHECK_SECONDS = float(os.getenv("RETRAIN_CHECK_SECONDS", "300"))
+
+_background_lock = threading.Lock()
+_background_threads = {}
+_last_checked = {}
+
+
+def _worker_init():
+    # A forked child must not reuse the parent's pooled database connections
+    import database
+    database.engine.dispose(close=False)
+
+def _train_league(league_id, n_jobs):
+    """
+    Updates and publishes one league's market models: grown with trees fitted on the new rows when
+    possible, refitted in full otherwise (see update_league_model). Runs in a worker process.
+    """
+    import prediction_model
+    started = time.perf_counter()
+    try:
+        status = prediction_model.update_league_model(league_id, n_jobs=n_jobs)
+        return league_id, status, time.perf_counter() - started
+    except Exception as e:
+        print(f"Training failed for league {league_id}: {e}")
+        return league_id, "failed", time.perf_counter() - started
+
+def stale_leagues(league_ids):
+    """Leagues that retrain_policy wants retrained: no usable model, or enough new training rows since it was trained."""
+    from prediction_model import cached_model_is_fresh
+    return [lid for lid in dict.fromkeys(league_ids) if lid is not None and not cached_model_is_fresh(lid)]
+
+def train_stale_models(league_ids, max_workers=None):
+    """
+    Trains every stale league up front, one process per league across the CPU cores, with each
+    league's five market models fitted in parallel on the cores left over. Each model is published
+    atomically by save_cached_model and dropped from the in-process cache so the next prediction
+    loads it. Returns {league_id: "trained" | "updated" | "no_data" | "failed"}.
+    """
+    import prediction_model
+    pending = stale_leagues(league_ids)
+    if not pending:
+        return {}
+
+    workers = max(1, min(len(pending), max_workers or MODEL_TRAIN_WORKERS))
+    cores = os.cpu_count() or 1
+    n_jobs = max(1, cores // workers)
+    print(f"Training {len(pending)} stale league models on {workers} worker(s) ({n_jobs} market fit(s) each)...")
+
+    started = time.perf_counter()
+    results = {}
+    if workers == 1:
+        outcomes = (_train_league(lid, n_jobs) for lid in pending)
+    else:
+        # fork keeps the already-imported sklearn/pandas modules; other platforms fall back to spawn
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_worker_init)
+        futures = [pool.submit(_train_league, lid, n_jobs) for lid in pending]
+        outcomes = (future.result() for future in as_completed(futures))
+    try:
+        for league_id, status, elapsed in outcomes:
+            results[league_id] = status
+            prediction_model._loaded_models_cache.pop("league", league_id)
+            prediction_model._loaded_models_cache.pop("compiled", league_id)
+            print(f"League {league_id}: {status} in {elapsed:.1f}s")
+    finally:
+        if workers > 1:
+            pool.shutdown()
+    print(f"Model training finished in {time.perf_counter() - started:.1f}s.")
+    return results
+
+def _retrain_and_swap(league_id):
+    import prediction_model
+    _, status, elapsed = _train_league(league_id, 1)
+    if status in ("trained", "updated"):
+        # The next prediction loads the published version; until then the old model kept serving
+        prediction_model._loaded_models_cache.pop("league", league_id)
+        prediction_model._loaded_models_cache.pop("compiled", league_id)
+    print(f"Background retrain of league {league_id}: {status} in {elapsed:.1f}s")
+
+def retrain_in_background(league_id):
+    """
+    Retrains a league on a daemon thread when retrain_policy asks for it, while the model already
+    loaded keeps serving predictions. The policy is checked at most every RETRAIN_CHECK_SECONDS per
+    league, and one retrain per league runs at a time. Returns the started thread, or None.
+    """
+    from retrain_policy import retrain_reason
+    now = time.monotonic()
+    with _background_lock:
+        running = _background_threads.get(league_id)
+        if running is not None and running.is_alive():
+            return None
+        if now - _last_checked.get(league_id, float("-inf")) < RETRAIN_CHECK_SECONDS:
+            return None
+        _last_checked[league_id] = now
+    try:
+        reason = retrain_reason(league_id)
+    except Exception as e:
+        print(f"Retrain policy check failed for league {league_id}: {e}")
+        return None
+    if reason is None:
+        return None
+    print(f"Retraining league {league_id} in the background ({reason}); the current model keeps serving.")
+    thread = threading.Thread(target=_retrain_and_swap, args=(league_id,), name=f"retrain-{league_id}", daemon=True)
+    with _background_lock:
+        _background_threads[league_id] = thread
+    thread.start()
+    return thread
@@ -7,20 +7,27 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from football_api import fetch_team_data
 import datetime
+import itertools
 import os
 from dotenv import load_dotenv
 from football_api import get_fixtures
-from database import SessionLocal, MatchTrainingData, PlayedMatch
+from database import SessionLocal, MatchTrainingData, PlayedMatch, TrainingDataState, upsert_rows
+from league_snapshot import get_league_snapshot, invalidate_league_snapshot
+from league_standings import apply_played_results, get_league_standings
+from team_names import standardize_team_name, lookup_team_alias, save_team_alias
+from bounded_cache import BoundedCache
+from feature_schema import Feature, FeatureSchema, FeatureSchemaError
+from scoreline_model import ht_ft_label
+import training_cache
 
 load_dotenv()
 
-# Centralized analytical cache to minimize API calls
-ANALYTICAL_CACHE = {
-    "standings": {},
-    "scorers": {},
-    "h2h": {},
-    "stats": {}
-}
+# Centralized analytical cache to minimize API calls (bounded LRU, per-namespace TTL in seconds)
+ANALYTICAL_CACHE = BoundedCache("analytics")
+ANALYTICAL_CACHE.configure("scorers", ttl=12 * 3600, max_entries=64)
+ANALYTICAL_CACHE.configure("h2h", ttl=24 * 3600, max_entries=512)
+ANALYTICAL_CACHE.configure("stats", ttl=6 * 3600, max_entries=512)
+ANALYTICAL_CACHE.configure("injuries", ttl=3600, max_entries=512)
 
 def get_league_avg_goals(league_id):
     avg_goals = {
@@ -41,8 +48,117 @@ def get_league_avg_goals(league_id):
     }
     return avg_goals.get(league_id, 2.50)
 
+# Inputs of the market models, in training order; inference fills them from the match context
+FEATURE_SCHEMA = FeatureSchema([
+    Feature("league_id", "int32"),
+    Feature("home_rank", "int8"),
+    Feature("away_rank", "int8"),
+    Feature("home_motivation", "float32"),
+    Feature("away_motivation", "float32"),
+    Feature("home_star_power", "float32"),
+    Feature("home_defensive_wall", "float32", source="home_def_wall"),
+    Feature("h2h_dominance", "int8"),
+    Feature("home_advantage", "int8", constant=1), # Fixtures are always scored from the home side
+    Feature("league_avg_goals", "float32", derive=("league_id", get_league_avg_goals))
+])
+
+# Derived columns refreshed when a training row is re-imported (e.g. after a full CSV re-import)
+TRAINING_UPDATE_COLUMNS = (
+    "league_id", "home_rank", "away_rank", "home_motivation", "away_motivation",
+    "home_star_power", "home_defensive_wall", "h2h_dominance", "home_advantage",
+    "home_goals", "away_goals", "result"
+)
+
+# Compact dtypes of the stored training columns, in load order: the schema's stored features, then the targets
+TRAINING_COLUMN_DTYPES = {
+    **{f.name: f.dtype for f in FEATURE_SCHEMA.features if not f.derive},
+    "home_goals": np.dtype("int16"),
+    "away_goals": np.dtype("int16"),
+    "result": np.dtype("int8")
+}
+
+# Rows fetched per round trip when streaming training data out of the database
+TRAINING_LOAD_CHUNK_ROWS = int(os.getenv("TRAINING_LOAD_CHUNK_ROWS", "10000"))
+
+def _bump_training_versions(db, league_ids):
+    """
+    Adds the rows written per league (one league_id per inserted or changed row) to the leagues'
+    training data state, inside the caller's transaction. The state only grows, so it versions the
+    data (see _training_data_key) and counts the rows written since a model was trained (see retrain_policy).
+    """
+    from collections import Counter
+    for league_id, written in sorted(Counter(league_ids).items()):
+        bumped = db.query(TrainingDataState).filter(TrainingDataState.league_id == league_id).update(
+            {TrainingDataState.version: TrainingDataState.version + written}, synchronize_session=False
+        )
+        if not bumped:
+            db.add(TrainingDataState(league_id=league_id, version=written))
+    db.flush()
+
+def training_data_state(league_id):
+    """Training rows written for a league so far (see _bump_training_versions), or 0."""
+    db = SessionLocal()
+    try:
+        state = db.query(TrainingDataState.version).filter(TrainingDataState.league_id == league_id).scalar()
+        return state or 0
+    finally:
+        db.close()
+
+def _upsert_training_records(db, records):
+    """Upserts training rows by fixture_id inside the caller's transaction. Returns (inserted, updated)."""
+    rows = []
+    for r in records:
+        if "fixture_id" not in r:
+            continue
+        rows.append({
+            "fixture_id": r["fixture_id"],
+            "league_id": r["league_id"],
+            "home_rank": r["home_rank"],
+            "away_rank": r["away_rank"],
+            "home_motivation": r["home_motivation"],
+            "away_motivation": r["away_motivation"],
+            "home_star_power": r["home_star_power"],
+            "home_defensive_wall": r["home_defensive_wall"],
+            "h2h_dominance": r["h2h_dominance"],
+            "home_advantage": r["home_advantage"],
+            "home_goals": r.get("home_goals", 0),
+            "away_goals": r.get("away_goals", 0),
+            "result": r["result"]
+        })
+    inserted, updated = upsert_rows(db, MatchTrainingData, rows, update_columns=TRAINING_UPDATE_COLUMNS)
+    if inserted or updated:
+        leagues = {row["fixture_id"]: row["league_id"] for row in rows}
+        _bump_training_versions(db, (leagues[key] for key in list(inserted) + list(updated)))
+    return len(inserted), len(updated)
+
+def _insert_played_records(db, records):
+    """
+    Inserts played matches whose fixture_id is not stored yet (ON CONFLICT DO NOTHING) and applies
+    only those to the standings table. Score corrections go through the admin results endpoint.
+    """
+    rows = []
+    for r in records:
+        if "fixture_id" not in r:
+            continue
+        rows.append({
+            "fixture_id": r["fixture_id"],
+            "league_id": r["league_id"],
+            "season": r["season"],
+            "match_date": r["match_date"],
+            "home_team": r["home_team"],
+            "away_team": r["away_team"],
+            "home_goals": r["home_goals"],
+            "away_goals": r["away_goals"]
+        })
+    inserted = set(upsert_rows(db, PlayedMatch, rows)[0])
+    new_records = [r for r in rows if r["fixture_id"] in inserted]
+    if new_records:
+        # Keep the materialized standings in step with the inserted results (same transaction)
+        apply_played_results(db, new_records)
+    return new_records
+
 def save_training_data(df_or_list):
-    """Saves training data to the database, skipping duplicates by fixture_id."""
+    """Upserts training data by fixture_id. Returns the number of new rows, or None on error."""
     if isinstance(df_or_list, pd.DataFrame):
         records = df_or_list.to_dict(orient="records")
     else:
@@ -53,147 +169,239 @@ def save_training_data(df_or_list):
 
     db = SessionLocal()
     try:
-        # Optimize: Fetch all existing fixture_ids in a single query to prevent N+1 queries
-        existing_ids = set(val[0] for val in db.query(MatchTrainingData.fixture_id).all())
-        
-        new_records = []
-        for r in records:
-            if "fixture_id" not in r:
-                continue
-            if r["fixture_id"] in existing_ids:
-                continue
-                
-            new_records.append({
-                "fixture_id": r["fixture_id"],
-                "league_id": r["league_id"],
-                "home_rank": r["home_rank"],
-                "away_rank": r["away_rank"],
-                "home_motivation": r["home_motivation"],
-                "away_motivation": r["away_motivation"],
-                "home_star_power": r["home_star_power"],
-                "home_defensive_wall": r["home_defensive_wall"],
-                "h2h_dominance": r["h2h_dominance"],
-                "home_advantage": r["home_advantage"],
-                "home_goals": r.get("home_goals", 0),
-                "away_goals": r.get("away_goals", 0),
-                "result": r["result"]
-            })
-            # Add to local set to avoid duplicates within the same batch
-            existing_ids.add(r["fixture_id"])
-        
-        if new_records:
-            db.bulk_insert_mappings(MatchTrainingData, new_records)
+        inserted, updated = _upsert_training_records(db, records)
+        if inserted or updated:
             db.commit()
-            print(f"Saved {len(new_records)} new training samples to the database using bulk insert.")
+            print(f"Saved {inserted} new training samples to the database ({updated} existing samples updated).")
+        return inserted
     except Exception as e:
         db.rollback()
         print(f"Error saving training data to database: {e}")
+        return None
     finally:
         db.close()
 
 def save_played_matches(records):
-    """Saves played matches to the database, skipping duplicates by fixture_id."""
+    """Saves played matches to the database, skipping duplicates by fixture_id. Returns the number of new rows."""
     if not records:
         return
     db = SessionLocal()
     try:
-        existing_ids = set(val[0] for val in db.query(PlayedMatch.fixture_id).all())
-        new_records = []
-        for r in records:
-            if "fixture_id" not in r:
-                continue
-            if r["fixture_id"] in existing_ids:
-                continue
-            new_records.append({
-                "fixture_id": r["fixture_id"],
-                "league_id": r["league_id"],
-                "season": r["season"],
-                "match_date": r["match_date"],
-                "home_team": r["home_team"],
-                "away_team": r["away_team"],
-                "home_goals": r["home_goals"],
-                "away_goals": r["away_goals"]
-            })
-            existing_ids.add(r["fixture_id"])
+        new_records = _insert_played_records(db, records)
         if new_records:
-            db.bulk_insert_mappings(PlayedMatch, new_records)
             db.commit()
             print(f"Saved {len(new_records)} new played match records to the database.")
+            for lid in set(r["league_id"] for r in new_records):
+                invalidate_league_snapshot(lid)
+        return len(new_records)
     except Exception as e:
         db.rollback()
         print(f"Error saving played matches to database: {e}")
+        return None
     finally:
         db.close()
 
-def load_cached_model(league_id):
-    """Loads scikit-learn models from a local league-specific pickle file if it is within the cache expiry limit."""
-    model_file = f"model_{league_id}.pkl"
-    if not os.path.exists(model_file):
-        return None
+def _legacy_model_file(league_id):
+    # Pre-store pickles (model_{league_id}.pkl) are still served until the league is retrained
+    return f"model_{league_id}.pkl"
+
+def cached_model_is_fresh(league_id):
+    """True unless retrain_policy says the league's model should be retrained (see retrain_reason)."""
+    import retrain_policy
+    reason = retrain_policy.retrain_reason(league_id)
+    if reason:
+        print(f"Model for league {league_id} needs retraining: {reason}.")
+    return reason is None
+
+def _load_cached_models(league_id):
+    """
+    Loads the league's current models, as (model_dict, compiled), however old they are: new
+    training data triggers a retrain instead (see _resolve_league_model). Versions built by another
+    scikit-learn or on other features cannot serve and are not loaded.
+    compiled memory-maps the version's compiled forests, or is None when none were stored.
+    """
+    import model_store
+    import retrain_policy
+    from compiled_forest import CompiledForests, ARRAY_NAMES
     try:
-        import time
+        entry = model_store.current_entry(league_id)
+        if entry is not None:
+            reason = retrain_policy.usable_reason(entry, league_id)
+            if reason:
+                print(f"Stored model for league {league_id} cannot be used: {reason}.")
+                return None, None
+            model, entry = model_store.load(league_id, entry["version"])
+            compiled = None
+            if all(name in entry.get("arrays", {}) for name in ARRAY_NAMES):
+                compiled = CompiledForests.from_arrays(list(entry["markets"]), model_store.load_arrays(league_id, entry))
+            return model, compiled
+        if not os.path.exists(_legacy_model_file(league_id)):
+            return None, None
         import pickle
-        file_age_hours = (time.time() - os.path.getmtime(model_file)) / 3600
-        expiry_hours = float(os.getenv("MODEL_CACHE_EXPIRY_HOURS", "24"))
-        if file_age_hours > expiry_hours:
-            print(f"Cached model for league {league_id} is {file_age_hours:.1f} hours old (expired > {expiry_hours} hours).")
-            return None
-        with open(model_file, "rb") as f:
+        with open(_legacy_model_file(league_id), "rb") as f:
             model = pickle.load(f)
-        return model
+        FEATURE_SCHEMA.check_model(model)
+        return model, None
     except Exception as e:
         print(f"Error loading cached model for league {league_id}: {e}")
-        return None
+        return None, None
+
+def load_cached_model(league_id):
+    """Loads the league's current models from the model store (see _load_cached_models)."""
+    return _load_cached_models(league_id)[0]
 
-def save_cached_model(model, league_id):
-    """Saves the trained models to a local league-specific pickle file."""
-    model_file = f"model_{league_id}.pkl"
+def compile_market_models(model):
+    """
+    Flattens a market model dict into CompiledForests for vectorized inference (see predict_batch).
+    Raises FeatureSchemaError when the models were fitted on other features than FEATURE_SCHEMA.
+    """
+    from compiled_forest import CompiledForests
+    FEATURE_SCHEMA.check_model(model)
+    return CompiledForests.from_models(model)
+
+def _tree_batch(mode, trees, train_df, new_rows=None):
+    """Provenance of one batch of trees added to every market forest (see tree_batches in the manifest)."""
+    return {
+        "mode": mode,
+        "trees": int(trees),
+        "rows": int(len(train_df)) if train_df is not None else None,
+        "new_rows": new_rows,
+        "training_data_state": train_df.attrs.get("training_data_state") if train_df is not None else None,
+        "trained_at": datetime.datetime.utcnow().isoformat()
+    }
+
+def save_cached_model(model, league_id, train_df=None, tree_batches=None):
+    """
+    Publishes the trained models as a new version in the model store, recording the training
+    data version, training data state (see load_training_data), feature schema and tree provenance
+    in the league's manifest. The row count and data version describe the whole history the
+    forests reflect: train_df.attrs carries them (training_rows, training_data_key) when train_df is
+    only the recent window their latest trees were fitted on. tree_batches lists, oldest first, the
+    batches of trees every market forest is made of (with the rows each was fitted on); by default
+    the forests are one full fit on train_df. The compiled forests
+    are stored alongside as raw arrays that inference memory-maps. Publishing is atomic.
+    Returns the version id, or None on error.
+    """
+    import model_store
     try:
-        import pickle
-        with open(model_file, "wb") as f:
-            pickle.dump(model, f)
-        print(f"Successfully cached model to {model_file}")
+        arrays = compile_market_models(model).to_arrays()
+        attrs = train_df.attrs if train_df is not None else {}
+        if tree_batches is None:
+            tree_batches = [_tree_batch("full", len(next(iter(model.values())).estimators_), train_df)]
+        metadata = {"training_data_state": attrs.get("training_data_state"), "tree_batches": tree_batches}
+        if attrs.get("training_data_key"):
+            # Versioned by the data key, so a full fit and an incremental update on the same rows agree
+            metadata["training_data_version"] = model_store.training_data_key_version(attrs["training_data_key"])
+            metadata["training_rows"] = int(attrs.get("training_rows", len(train_df)))
+        version = model_store.publish(league_id, model, FEATURE_SCHEMA.columns, train_df, arrays=arrays, metadata=metadata)
+        print(f"Successfully stored model for league {league_id} as version {version}")
+        return version
     except Exception as e:
         print(f"Error saving cached model for league {league_id}: {e}")
+        return None
+
+def _training_data_key(db, league_id):
+    """
+    (row count, last id, training data state, cache key) of a league's training rows, or of all of
+    them. The key changes whenever rows are inserted, updated (state bump) or deleted (count and last id).
+    """
+    from sqlalchemy import func
+    rows = db.query(func.count(MatchTrainingData.id), func.max(MatchTrainingData.id))
+    versions = db.query(func.coalesce(func.sum(TrainingDataState.version), 0))
+    if league_id is not None:
+        rows = rows.filter(MatchTrainingData.league_id == league_id)
+        versions = versions.filter(TrainingDataState.league_id == league_id)
+    count, max_id = rows.one()
+    state = versions.scalar()
+    return count, max_id, state, f"v{state}-n{count}-id{max_id}"
+
+def _stream_training_columns(db, league_id, count, max_id, min_id=None):
+    """
+    Streams training rows (ids min_id..max_id) in TRAINING_LOAD_CHUNK_ROWS partitions into preallocated
+    compact column arrays. Returns ({name: array}, rows_read); fewer rows than count means rows were
+    deleted meanwhile.
+    """
+    from sqlalchemy import select
+    names = list(TRAINING_COLUMN_DTYPES)
+    columns = {name: np.empty(count, dtype=dtype) for name, dtype in TRAINING_COLUMN_DTYPES.items()}
+    query = select(*(getattr(MatchTrainingData, name) for name in names)).where(MatchTrainingData.id <= max_id)
+    if min_id is not None:
+        query = query.where(MatchTrainingData.id >= min_id)
+    if league_id is not None:
+        query = query.where(MatchTrainingData.league_id == league_id)
+    # Core rows (no ORM loading), fetched TRAINING_LOAD_CHUNK_ROWS at a time
+    result = db.connection().execute(query.order_by(MatchTrainingData.id).execution_options(yield_per=TRAINING_LOAD_CHUNK_ROWS))
+    filled = 0
+    for part in result.partitions():
+        # float64 holds every stored integer and float exactly; NULLs become NaN
+        block = np.array(list(map(tuple, part)), dtype=np.float64)[:count - filled]
+        end = filled + len(block)
+        for j, name in enumerate(names):
+            values = block[:, j]
+            if columns[name].dtype.kind in "iu" and np.isnan(values).any():
+                # An integer column with NULLs stays floating (NaN is a valid tree input)
+                columns[name] = columns[name].astype(np.float32)
+            columns[name][filled:end] = values
+        filled = end
+    return {name: column[:filled] for name, column in columns.items()}, filled
 
 def load_training_data(league_id=None):
-    """Loads existing training data from the database for ML training, bypassing SQLAlchemy ORM overhead."""
+    """
+    Loads the training rows of a league (or of every league) as a DataFrame of compact columns
+    (TRAINING_COLUMN_DTYPES). Rows are streamed in chunks into preallocated arrays, never held as
+    Python tuples all at once. The columns are cached on disk per data version (see training_cache),
+    so an unchanged training set is read back from memory-mapped files instead of the database.
+    attrs["training_data_state"] and attrs["training_data_key"] hold the league's training data state
+    and data key (see _training_data_key) the rows were read at.
+    """
     db = SessionLocal()
     try:
-        query = db.query(
-            MatchTrainingData.league_id,
-            MatchTrainingData.home_rank,
-            MatchTrainingData.away_rank,
-            MatchTrainingData.home_motivation,
-            MatchTrainingData.away_motivation,
-            MatchTrainingData.home_star_power,
-            MatchTrainingData.home_defensive_wall,
-            MatchTrainingData.h2h_dominance,
-            MatchTrainingData.home_advantage,
-            MatchTrainingData.home_goals,
-            MatchTrainingData.away_goals,
-            MatchTrainingData.result
-        )
-        if league_id is not None:
-            query = query.filter(MatchTrainingData.league_id == league_id)
-            
-        records = query.all()
-        
-        if not records:
+        count, max_id, state, key = _training_data_key(db, league_id)
+        if not count:
             return pd.DataFrame()
-        
-        columns = [
-            "league_id", "home_rank", "away_rank", "home_motivation", "away_motivation",
-            "home_star_power", "home_defensive_wall", "h2h_dominance", "home_advantage",
-            "home_goals", "away_goals", "result"
-        ]
-        return pd.DataFrame(records, columns=columns)
+        scope = league_id if league_id is not None else "all"
+        columns = training_cache.read(scope, key)
+        if columns is None:
+            columns, filled = _stream_training_columns(db, league_id, count, max_id)
+            if filled == count:
+                training_cache.write(scope, key, columns)
+        df = pd.DataFrame(columns)
+        if league_id is not None:
+            df.attrs["training_data_state"] = int(state)
+            df.attrs["training_data_key"] = key
+        return df
     except Exception as e:
         print(f"Error loading training data from database: {e}")
         return pd.DataFrame()
     finally:
         db.close()
 
+def load_recent_training_data(league_id, n):
+    """
+    The league's n most recent training rows (by id), shaped like load_training_data's and never cached.
+    attrs also describe the whole history without reading it: its row count (training_rows), training
+    data state and data key.
+    """
+    db = SessionLocal()
+    try:
+        count, max_id, state, key = _training_data_key(db, league_id)
+        n = min(n, count)
+        if not n:
+            return pd.DataFrame()
+        min_id = db.query(MatchTrainingData.id).filter(
+            MatchTrainingData.league_id == league_id,
+            MatchTrainingData.id <= max_id
+        ).order_by(MatchTrainingData.id.desc()).offset(n - 1).limit(1).scalar()
+        columns, _ = _stream_training_columns(db, league_id, n, max_id, min_id)
+        df = pd.DataFrame(columns)
+        df.attrs.update(training_data_state=int(state), training_data_key=key, training_rows=int(count))
+        return df
+    except Exception as e:
+        print(f"Error loading recent training data from database: {e}")
+        return pd.DataFrame()
+    finally:
+        db.close()
+
 def parse_date(date_str):
     if not date_str:
         return datetime.datetime.utcnow()
@@ -216,69 +424,118 @@ def parse_date(date_str):
             pass
     return datetime.datetime.utcnow()
 
-def fetch_football_data_co_uk_historical(league_id):
+def reconstruct_prematch_standings(seasons, home_teams, away_teams, home_goals, away_goals, carry=None):
     """
-    Downloads historical data from football-data.co.uk for a given league,
-    chronologically reconstructs standings to calculate ranks, and stores the records.
+    Vectorized replay of every season table in a chronologically ordered list of results.
+    For each match, returns both teams' rank, points, goals scored/conceded and matches played
+    as they stood BEFORE kickoff, plus the number of teams in the table at that point.
+    Ties on (points, goal difference, goals scored) keep the order teams first appeared in.
+    Pass the same carry dict to consecutive calls to replay a long file in chunks: each season's
+    table is picked up where the previous chunk left it, and updated in place.
     """
-    league_code_map = {
-        113: "SWE",  # Sweden Allsvenskan
-        103: "NOR",  # Norway Eliteserien
-        71: "BRA",   # Brazil Serie A
-        253: "USA",  # MLS
-        128: "ARG",  # Argentina Primera Division
-        262: "MEX",  # Mexico Liga MX
-        98: "JPN",   # J1 League
-        169: "CHN",  # China Super League
-        119: "DNK",  # Denmark Superliga
-        244: "FIN",  # Finland Veikkausliiga
-        235: "RUS"   # Russia Premier League
-    }
+    seasons = np.asarray(seasons).astype(str)
+    home_goals = np.asarray(home_goals, dtype=np.int64)
+    away_goals = np.asarray(away_goals, dtype=np.int64)
+    n = len(seasons)
     
-    code = league_code_map.get(league_id)
-    if not code:
-        print(f"No football-data.co.uk mapping for League ID {league_id}.")
-        return False
+    keys = ["home_rank", "away_rank", "total_teams",
+            "home_points", "home_goals_scored", "home_goals_conceded", "home_matches_played",
+            "away_points", "away_goals_scored", "away_goals_conceded", "away_matches_played"]
+    out = {k: np.zeros(n, dtype=np.int64) for k in keys}
+    if n == 0:
+        return out
         
-    url = f"https://www.football-data.co.uk/new/{code}.csv"
-    print(f"Fetching historical all-seasons CSV from: {url}...")
-    
-    import urllib.request
-    import csv
-    import io
-    import hashlib
-    
-    req = urllib.request.Request(
-        url, 
-        headers={'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'}
-    )
+    home_pts = np.where(home_goals > away_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    away_pts = np.where(away_goals > home_goals, 3, np.where(home_goals == away_goals, 1, 0))
+    names = np.empty(n * 2, dtype=object)
+    names[0::2] = home_teams
+    names[1::2] = away_teams
     
-    try:
-        with urllib.request.urlopen(req, timeout=15) as response:
-            content = response.read().decode('utf-8-sig', errors='ignore')
-    except Exception as e:
-        print(f"Failed to download historical data for {code}: {e}")
-        return False
+    season_labels, season_codes = np.unique(seasons, return_inverse=True)
+    for s in range(season_codes.max() + 1):
+        rows = np.flatnonzero(season_codes == s)
+        m = rows.size
+        prev = carry.get(str(season_labels[s])) if carry is not None else None
+        known = prev["teams"] if prev else []
         
-    f = io.StringIO(content)
-    reader = csv.DictReader(f)
-    
-    # standings[season][team_name] = {"points": 0, "goals_scored": 0, "goals_conceded": 0, "matches_played": 0}
-    standings = {}
-    records_to_insert = []
-    played_records_to_insert = []
-    
-    # Query existing PlayedMatch fixture IDs for this league to avoid redundant calculations/inserts
-    db = SessionLocal()
-    try:
-        existing_ids = set(val[0] for val in db.query(PlayedMatch.fixture_id).filter(PlayedMatch.league_id == league_id).all())
-    except Exception as e:
-        print(f"Error querying existing fixture IDs: {e}")
-        existing_ids = set()
-    finally:
-        db.close()
+        # Team codes in order of first appearance (home before away within a match); carried teams keep theirs
+        season_names = np.empty(m * 2, dtype=object)
+        season_names[0::2] = names[rows * 2]
+        season_names[1::2] = names[rows * 2 + 1]
+        uniq, first_idx, inverse = np.unique(season_names, return_index=True, return_inverse=True)
+        known_codes = {team: i for i, team in enumerate(known)}
+        uniq_codes = np.array([known_codes.get(team, -1) for team in uniq], dtype=np.int64)
+        newcomers = np.flatnonzero(uniq_codes < 0)
+        newcomers = newcomers[np.argsort(first_idx[newcomers])]
+        uniq_codes[newcomers] = len(known) + np.arange(len(newcomers))
+        codes = uniq_codes[inverse]
+        h = codes[0::2]
+        a = codes[1::2]
+        n_teams = len(known) + len(newcomers)
         
-    for index, row in enumerate(reader):
+        # Per-match contributions -> exclusive cumulative sums give the pre-match table
+        match_idx = np.arange(m)
+        def pre_match(home_vals, away_vals, stat):
+            delta = np.zeros((m, n_teams), dtype=np.int64)
+            np.add.at(delta, (match_idx, h), home_vals)
+            np.add.at(delta, (match_idx, a), away_vals)
+            start = np.zeros(n_teams, dtype=np.int64)
+            if prev:
+                start[:len(known)] = prev[stat]
+            return np.cumsum(delta, axis=0) - delta + start[None, :]
+            
+        points = pre_match(home_pts[rows], away_pts[rows], "points")
+        scored = pre_match(home_goals[rows], away_goals[rows], "scored")
+        conceded = pre_match(away_goals[rows], home_goals[rows], "conceded")
+        played = pre_match(1, 1, "played")
+        
+        # A team enters the table on its first match, even though its stats are still zero
+        first_match = np.full(n_teams, -1, dtype=np.int64)
+        first_match[len(known):] = first_idx[newcomers] // 2
+        in_table = first_match[None, :] <= match_idx[:, None]
+        
+        # Pack (points, goal difference, goals scored, earlier first appearance) into one sortable key
+        score = ((points << 16) + (scored - conceded + (1 << 15))) << 16
+        score = ((score + scored) << 10) + (1023 - np.arange(n_teams))[None, :]
+        home_score = score[match_idx, h][:, None]
+        away_score = score[match_idx, a][:, None]
+        
+        out["home_rank"][rows] = 1 + (in_table & (score > home_score)).sum(axis=1)
+        out["away_rank"][rows] = 1 + (in_table & (score > away_score)).sum(axis=1)
+        out["total_teams"][rows] = in_table.sum(axis=1)
+        for side, team in (("home", h), ("away", a)):
+            out[f"{side}_points"][rows] = points[match_idx, team]
+            out[f"{side}_goals_scored"][rows] = scored[match_idx, team]
+            out[f"{side}_goals_conceded"][rows] = conceded[match_idx, team]
+            out[f"{side}_matches_played"][rows] = played[match_idx, team]
+            
+        if carry is not None:
+            # Table after the last match of this chunk = its pre-match row plus that match's result
+            last_pts = np.zeros(n_teams, dtype=np.int64)
+            last_for = np.zeros(n_teams, dtype=np.int64)
+            last_against = np.zeros(n_teams, dtype=np.int64)
+            last_played = np.zeros(n_teams, dtype=np.int64)
+            last_h, last_a = h[-1], a[-1]
+            r = rows[-1]
+            np.add.at(last_pts, [last_h, last_a], [home_pts[r], away_pts[r]])
+            np.add.at(last_for, [last_h, last_a], [home_goals[r], away_goals[r]])
+            np.add.at(last_against, [last_h, last_a], [away_goals[r], home_goals[r]])
+            np.add.at(last_played, [last_h, last_a], [1, 1])
+            carry[str(season_labels[s])] = {
+                "teams": list(known) + [uniq[i] for i in newcomers],
+                "points": points[-1] + last_pts,
+                "scored": scored[-1] + last_for,
+                "conceded": conceded[-1] + last_against,
+                "played": played[-1] + last_played
+            }
+    return out
+
+# Rows parsed, ranked and inserted per transaction by the historical CSV import
+CSV_IMPORT_CHUNK_ROWS = int(os.getenv("CSV_IMPORT_CHUNK_ROWS", "1000"))
+
+def _parse_result_rows(league_id, rows):
+    """Yields (fixture_id, season, date, home_team, away_team, home_goals, away_goals) for each valid result row."""
+    for index, row in rows:
         season = row.get("Season")
         home_team = row.get("Home")
         away_team = row.get("Away")
@@ -288,10 +545,8 @@ def fetch_football_data_co_uk_historical(league_id):
             
         hg_str = row.get("HG")
         ag_str = row.get("AG")
-        res = row.get("Res")
-        date_str = row.get("Date")
         
-        if hg_str is None or ag_str is None or res is None:
+        if hg_str is None or ag_str is None or row.get("Res") is None:
             continue
             
         try:
@@ -305,122 +560,159 @@ def fetch_football_data_co_uk_historical(league_id):
         except ValueError:
             season_int = 0
             
-        fixture_id = int(f"{league_id}{season_int % 100}{index % 1000:03d}")
-        result = 1 if hg > ag else (2 if ag > hg else 0)
-        
-        if season not in standings:
-            standings[season] = {}
-            
-        season_standings = standings[season]
-        
-        if home_team not in season_standings:
-            season_standings[home_team] = {"points": 0, "goals_scored": 0, "goals_conceded": 0, "matches_played": 0}
-        if away_team not in season_standings:
-            season_standings[away_team] = {"points": 0, "goals_scored": 0, "goals_conceded": 0, "matches_played": 0}
-            
-        # Incremental Skip: If match already exists, only update standings in-memory and skip feature engineering
-        if fixture_id in existing_ids:
-            season_standings[home_team]["matches_played"] += 1
-            season_standings[away_team]["matches_played"] += 1
-            season_standings[home_team]["goals_scored"] += hg
-            season_standings[home_team]["goals_conceded"] += ag
-            season_standings[away_team]["goals_scored"] += ag
-            season_standings[away_team]["goals_conceded"] += hg
-            
-            if result == 1:
-                season_standings[home_team]["points"] += 3
-            elif result == 2:
-                season_standings[away_team]["points"] += 3
-            else:
-                season_standings[home_team]["points"] += 1
-                season_standings[away_team]["points"] += 1
-            continue
-            
-        match_date = parse_date(date_str)
-            
-        # Determine Ranks BEFORE the match is played
-        def get_rankings(st_dict):
-            def sort_key(item):
-                team, stats = item
-                gd = stats["goals_scored"] - stats["goals_conceded"]
-                return (stats["points"], gd, stats["goals_scored"])
-            sorted_teams = sorted(st_dict.items(), key=sort_key, reverse=True)
-            return {team: rank + 1 for rank, (team, _) in enumerate(sorted_teams)}
-            
-        ranks = get_rankings(season_standings)
-        
-        home_rank = ranks.get(home_team, 10)
-        away_rank = ranks.get(away_team, 10)
-        total_teams = len(ranks) or 20
-        
-        home_motivation = calculate_league_motivation(home_rank, total_teams)
-        away_motivation = calculate_league_motivation(away_rank, total_teams)
-        
-        # Estimate star power and defense wall
-        def get_team_star_power(stats):
-            mp = stats["matches_played"]
-            if mp == 0: return 5.0
-            avg_goals = stats["goals_scored"] / mp
-            return min(10.0, max(1.0, avg_goals * 4.0))
-            
-        def get_team_defensive_wall(stats):
-            mp = stats["matches_played"]
-            if mp == 0: return 5.0
-            avg_conceded = stats["goals_conceded"] / mp
-            return min(15.0, max(1.0, 15.0 - (avg_conceded * 5.0)))
-            
-        home_star = get_team_star_power(season_standings[home_team])
-        home_def = get_team_defensive_wall(season_standings[home_team])
+        yield int(f"{league_id}{season_int % 100}{index % 1000:03d}"), season, row.get("Date"), home_team, away_team, hg, ag
+
+def _seed_season_tables(db, league_id, seasons, exclude_ids, carry):
+    """Replays the stored results of seasons not in carry yet, so appended rows are ranked against them."""
+    for season in sorted(set(seasons) - set(carry)):
+        query = db.query(
+            PlayedMatch.home_team, PlayedMatch.away_team, PlayedMatch.home_goals, PlayedMatch.away_goals
+        ).filter(
+            PlayedMatch.league_id == league_id,
+            PlayedMatch.season == season,
+            PlayedMatch.fixture_id.notin_(exclude_ids)
+        ).order_by(PlayedMatch.id).yield_per(CSV_IMPORT_CHUNK_ROWS)
+        batch = []
+        for r in itertools.chain(query, [None]):
+            if r is not None:
+                batch.append(r)
+            if batch and (r is None or len(batch) >= CSV_IMPORT_CHUNK_ROWS):
+                reconstruct_prematch_standings(
+                    [season] * len(batch), [b[0] for b in batch], [b[1] for b in batch],
+                    [b[2] or 0 for b in batch], [b[3] or 0 for b in batch], carry=carry
+                )
+                batch = []
+
+def _import_result_chunk(db, league_id, chunk, carry, seed):
+    """Ranks one chunk of parsed rows against the running season tables and inserts the new ones."""
+    fixture_ids, seasons, dates, home_teams, away_teams, home_goals, away_goals = (list(c) for c in zip(*chunk))
+    if seed:
+        _seed_season_tables(db, league_id, seasons, fixture_ids, carry)
+    table = reconstruct_prematch_standings(seasons, home_teams, away_teams, home_goals, away_goals, carry=carry)
+    
+    home_mp = table["home_matches_played"]
+    safe_mp = np.maximum(home_mp, 1)
+    home_star = np.where(home_mp == 0, 5.0, np.clip(table["home_goals_scored"] / safe_mp * 4.0, 1.0, 10.0))
+    home_def = np.where(home_mp == 0, 5.0, np.clip(15.0 - (table["home_goals_conceded"] / safe_mp * 5.0), 1.0, 15.0))
+    
+    records_to_insert = []
+    played_records_to_insert = []
+    for i, fixture_id in enumerate(fixture_ids):
+        hg = home_goals[i]
+        ag = away_goals[i]
+        home_rank = int(table["home_rank"][i])
+        away_rank = int(table["away_rank"][i])
+        total_teams = int(table["total_teams"][i])
         
-        data_point = {
+        records_to_insert.append({
             "fixture_id": fixture_id,
             "league_id": league_id,
             "home_rank": home_rank,
             "away_rank": away_rank,
-            "home_motivation": home_motivation,
-            "away_motivation": away_motivation,
-            "home_star_power": home_star,
-            "home_defensive_wall": home_def,
+            "home_motivation": calculate_league_motivation(home_rank, total_teams),
+            "away_motivation": calculate_league_motivation(away_rank, total_teams),
+            "home_star_power": float(home_star[i]),
+            "home_defensive_wall": float(home_def[i]),
             "h2h_dominance": 0,
             "home_advantage": 1,
             "home_goals": hg,
             "away_goals": ag,
-            "result": result
-        }
-        records_to_insert.append(data_point)
-        
-        played_point = {
+            "result": 1 if hg > ag else (2 if ag > hg else 0)
+        })
+        played_records_to_insert.append({
             "fixture_id": fixture_id,
             "league_id": league_id,
-            "season": str(season),
-            "match_date": match_date,
-            "home_team": home_team,
-            "away_team": away_team,
+            "season": str(seasons[i]),
+            "match_date": parse_date(dates[i]),
+            "home_team": home_teams[i],
+            "away_team": away_teams[i],
             "home_goals": hg,
             "away_goals": ag
-        }
-        played_records_to_insert.append(played_point)
+        })
         
-        # Update standings with this match's results
-        season_standings[home_team]["matches_played"] += 1
-        season_standings[away_team]["matches_played"] += 1
-        season_standings[home_team]["goals_scored"] += hg
-        season_standings[home_team]["goals_conceded"] += ag
-        season_standings[away_team]["goals_scored"] += ag
-        season_standings[away_team]["goals_conceded"] += hg
+    # Rows already stored are not inserted again but still counted in the replay above
+    _, refreshed = _upsert_training_records(db, records_to_insert)
+    return len(_insert_played_records(db, played_records_to_insert)), refreshed
+
+def fetch_football_data_co_uk_historical(league_id):
+    """
+    Downloads historical data from football-data.co.uk for a given league,
+    reconstructs pre-match standings chunk by chunk with vectorized replays, and stores the records.
+    Only rows appended since the last import are downloaded and parsed (see csv_sync), and the
+    body is streamed so memory stays flat regardless of the file size.
+    """
+    league_code_map = {
+        113: "SWE",  # Sweden Allsvenskan
+        103: "NOR",  # Norway Eliteserien
+        71: "BRA",   # Brazil Serie A
+        253: "USA",  # MLS
+        128: "ARG",  # Argentina Primera Division
+        262: "MEX",  # Mexico Liga MX
+        98: "JPN",   # J1 League
+        169: "CHN",  # China Super League
+        119: "DNK",  # Denmark Superliga
+        244: "FIN",  # Finland Veikkausliiga
+        235: "RUS"   # Russia Premier League
+    }
+    
+    code = league_code_map.get(league_id)
+    if not code:
+        print(f"No football-data.co.uk mapping for League ID {league_id}.")
+        return False
         
-        if result == 1:
-            season_standings[home_team]["points"] += 3
-        elif result == 2:
-            season_standings[away_team]["points"] += 3
-        else:
-            season_standings[home_team]["points"] += 1
-            season_standings[away_team]["points"] += 1
+    url = f"https://www.football-data.co.uk/new/{code}.csv"
+    print(f"Fetching historical all-seasons CSV from: {url}...")
+    
+    from csv_sync import fetch_csv_delta
+    
+    try:
+        delta = fetch_csv_delta(league_id, url)
+    except Exception as e:
+        print(f"Failed to download historical data for {code}: {e}")
+        return False
+    if delta.mode == "unchanged":
+        print(f"CSV for {code} unchanged since the last import. Skipping.")
+        delta.commit()
+        return False
+    print(f"CSV for {code}: {delta.mode} import from row {delta.row_offset}.")
+    
+    # Stream the file through fixed-size chunks; each chunk and the import state commit together,
+    # so an interrupted import resumes after the last stored chunk
+    carry = {}
+    imported = 0
+    refreshed = 0
+    rows = _parse_result_rows(league_id, delta.rows())
+    try:
+        while True:
+            chunk = list(itertools.islice(rows, CSV_IMPORT_CHUNK_ROWS))
+            final = len(chunk) < CSV_IMPORT_CHUNK_ROWS
+            db = SessionLocal()
+            try:
+                if chunk:
+                    inserted, updated = _import_result_chunk(db, league_id, chunk, carry, seed=delta.mode == "delta")
+                    imported += inserted
+                    refreshed += updated
+                delta.checkpoint(db, final=final)
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                print(f"Error importing historical rows for {code}: {e}")
+                return False
+            finally:
+                db.close()
+            if final:
+                break
+    except Exception as e:
+        print(f"Failed to download historical data for {code}: {e}")
+        return False
+    finally:
+        delta.close()
+        if imported:
+            invalidate_league_snapshot(league_id)
             
-    if records_to_insert:
-        save_training_data(records_to_insert)
-        save_played_matches(played_records_to_insert)
-        print(f"Successfully imported {len(records_to_insert)} fresh matches for league ID {league_id}.")
+    print(f"CSV for {code}: read {delta.rows_read} rows ({delta.bytes_read} bytes), {refreshed} existing training samples updated.")
+    if imported:
+        print(f"Successfully imported {imported} fresh matches for league ID {league_id}.")
         return True
     return False
 
@@ -614,52 +906,136 @@ def process_fixtures_data(fixtures_data, api_key):
     return processed_data
 
 
-def train_model(df):
+# Market models fitted at once by train_model (each forest is single-threaded)
+MODEL_TRAIN_JOBS = int(os.getenv("MODEL_TRAIN_JOBS", str(min(5, os.cpu_count() or 1))))
+
+def _market_targets(df):
+    """Target column of each market model, keyed like the dict train_model returns."""
+    total_goals = df['home_goals'] + df['away_goals']
+    return {
+        # 1. Outcome Model (1: Home, 0: Draw, 2: Away)
+        "outcome": df['result'],
+        # 2. BTTS Model (1: Yes, 0: No)
+        "btts": ((df['home_goals'] > 0) & (df['away_goals'] > 0)).astype(int),
+        # 3. Over 2.5 Goals Model
+        "ou25": (total_goals > 2.5).astype(int),
+        # 4. Over 1.5 Goals Model
+        "ou15": (total_goals > 1.5).astype(int),
+        # 5. Over 3.5 Goals Model
+        "ou35": (total_goals > 3.5).astype(int)
+    }
+
+# Incremental updates (see grow_model): trees added per market, recent rows they are fitted on,
+# and the forest size past which the oldest incremental trees are dropped. 0 trees disables them.
+MODEL_UPDATE_TREES = int(os.getenv("MODEL_UPDATE_TREES", "10"))
+MODEL_UPDATE_WINDOW_ROWS = int(os.getenv("MODEL_UPDATE_WINDOW_ROWS", "500"))
+MODEL_UPDATE_MAX_TREES = int(os.getenv("MODEL_UPDATE_MAX_TREES", "60"))
+
+def _fit_market(X, y):
+    # Optimize RandomForest parameters for low memory and high generalization (n_estimators=30, max_depth=6)
+    model = RandomForestClassifier(n_estimators=30, max_depth=6, random_state=42)
+    model.fit(X, y)
+    return model
+
+def train_model(df, n_jobs=None):
+    """
+    Fits the five market models. Up to n_jobs (default MODEL_TRAIN_JOBS) are fitted concurrently on
+    threads: tree building releases the GIL, and fixed seeds keep the result identical to a serial fit.
+    """
     if df.empty:
         print("No historical data found. Falling back to rule-engine.")
         return None
         
     print(f"Training Multi-Market RandomForest Models on {len(df)} samples...")
     
-    # Add league_avg_goals feature dynamically
-    df["league_avg_goals"] = df["league_id"].apply(get_league_avg_goals)
+    X = FEATURE_SCHEMA.training_frame(df)
+    targets = _market_targets(df)
     
-    X = df.drop(columns=['result', 'home_goals', 'away_goals'])
-    
-    # Optimize RandomForest parameters for low memory and high generalization (n_estimators=30, max_depth=6)
-    # 1. Outcome Model (1: Home, 0: Draw, 2: Away)
-    y_outcome = df['result']
-    outcome_model = RandomForestClassifier(n_estimators=30, max_depth=6, random_state=42)
-    outcome_model.fit(X, y_outcome)
-    
-    # 2. BTTS Model (1: Yes, 0: No)
-    y_btts = ((df['home_goals'] > 0) & (df['away_goals'] > 0)).astype(int)
-    btts_model = RandomForestClassifier(n_estimators=30, max_depth=6, random_state=42)
-    btts_model.fit(X, y_btts)
-    
-    # 3. Over 2.5 Goals Model
-    y_ou25 = ((df['home_goals'] + df['away_goals']) > 2.5).astype(int)
-    ou25_model = RandomForestClassifier(n_estimators=30, max_depth=6, random_state=42)
-    ou25_model.fit(X, y_ou25)
-    
-    # 4. Over 1.5 Goals Model
-    y_ou15 = ((df['home_goals'] + df['away_goals']) > 1.5).astype(int)
-    ou15_model = RandomForestClassifier(n_estimators=30, max_depth=6, random_state=42)
-    ou15_model.fit(X, y_ou15)
-
-    # 5. Over 3.5 Goals Model
-    y_ou35 = ((df['home_goals'] + df['away_goals']) > 3.5).astype(int)
-    ou35_model = RandomForestClassifier(n_estimators=30, max_depth=6, random_state=42)
-    ou35_model.fit(X, y_ou35)
+    n_jobs = max(1, min(len(targets), n_jobs or MODEL_TRAIN_JOBS))
+    if n_jobs == 1:
+        models = {name: _fit_market(X, y) for name, y in targets.items()}
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=n_jobs, thread_name_prefix="fit-market") as pool:
+            futures = {name: pool.submit(_fit_market, X, y) for name, y in targets.items()}
+            models = {name: future.result() for name, future in futures.items()}
 
     print("All Multi-Market Models trained successfully.")
-    return {
-        "outcome": outcome_model,
-        "btts": btts_model,
-        "ou25": ou25_model,
-        "ou15": ou15_model,
-        "ou35": ou35_model
-    }
+    return models
+
+def grow_model(model, tree_batches, window_df, new_rows, n_trees=None, max_trees=None):
+    """
+    Incremental update: adds n_trees (MODEL_UPDATE_TREES) trees per market, fitted on window_df only,
+    to copies of the market forests (warm_start). Once a forest would exceed max_trees
+    (MODEL_UPDATE_MAX_TREES), its oldest incremental batches are dropped; full-fit trees are kept.
+    Returns (model, tree_batches), or None when the window lacks a class a forest predicts.
+    """
+    import copy
+    n_trees = n_trees or MODEL_UPDATE_TREES
+    max_trees = max_trees or MODEL_UPDATE_MAX_TREES
+    X = FEATURE_SCHEMA.training_frame(window_df)
+    targets = _market_targets(window_df)
+    batches = list(tree_batches) + [_tree_batch("incremental", n_trees, window_df, new_rows)]
+
+    # Trees sit in batch order, so each batch owns a slice of every forest's tree list
+    ends = list(itertools.accumulate(b["trees"] for b in batches))
+    keep = [True] * len(batches)
+    total = ends[-1]
+    for i, batch in enumerate(batches[:-1]):
+        if total <= max_trees:
+            break
+        if batch["mode"] == "incremental":
+            keep[i] = False
+            total -= batch["trees"]
+    kept = [t for i, end in enumerate(ends) if keep[i] for t in range(end - batches[i]["trees"], end)]
+
+    grown = {}
+    for name, forest in model.items():
+        y = targets[name]
+        if not np.array_equal(np.unique(y), forest.classes_):
+            return None
+        market = copy.copy(forest) # The loaded forest may still be serving; its tree list stays untouched
+        market.estimators_ = list(forest.estimators_)
+        market.set_params(warm_start=True, n_estimators=len(forest.estimators_) + n_trees,
+                          random_state=int(window_df.attrs.get("training_data_state") or 0))
+        market.fit(X, y)
+        market.estimators_ = [market.estimators_[t] for t in kept]
+        market.set_params(warm_start=False, n_estimators=len(market.estimators_))
+        grown[name] = market
+    return grown, [batch for i, batch in enumerate(batches) if keep[i]]
+
+def update_league_model(league_id, n_jobs=None):
+    """
+    Brings a league's stored model up to date with its training data and publishes the result.
+    When the stored forests are usable and the rows written since they were trained are fewer than
+    the rows of their last full fit, they grow incrementally (grow_model) on the most recent
+    max(new rows, MODEL_UPDATE_WINDOW_ROWS) rows: the cost follows the new matches, not the history.
+    Otherwise the five markets are refitted on the full history.
+    Returns "updated", "trained", "no_data" or "failed".
+    """
+    import model_store
+    import retrain_policy
+    entry = model_store.current_entry(league_id)
+    batches = entry.get("tree_batches") if entry else None
+    if batches and MODEL_UPDATE_TREES > 0 and retrain_policy.usable_reason(entry, league_id) is None:
+        new_rows = training_data_state(league_id) - (entry.get("training_data_state") or 0)
+        last_full = max(i for i, b in enumerate(batches) if b["mode"] == "full")
+        since_full = new_rows + sum(b.get("new_rows") or 0 for b in batches[last_full + 1:])
+        if 0 < new_rows and since_full < (batches[last_full]["rows"] or 0):
+            # Only the recent window is read; its attrs describe the whole history for the manifest entry
+            window_df = load_recent_training_data(league_id, max(new_rows, MODEL_UPDATE_WINDOW_ROWS))
+            model, _ = model_store.load(league_id, entry["version"])
+            grown = grow_model(model, batches, window_df, new_rows) if not window_df.empty else None
+            if grown is not None:
+                print(f"Growing league {league_id} forests with {MODEL_UPDATE_TREES} trees on the last {len(window_df)} rows ({new_rows} new).")
+                return "updated" if save_cached_model(grown[0], league_id, window_df, grown[1]) else "failed"
+            print(f"Recent rows of league {league_id} do not cover every class. Refitting in full.")
+
+    train_df = fetch_training_data(None, league_id)
+    if train_df.empty:
+        return "no_data"
+    model = train_model(train_df, n_jobs=n_jobs)
+    return "trained" if save_cached_model(model, league_id, train_df) else "failed"
 
 def calculate_team_form(team_id, league_id, api_key):
     """
@@ -774,13 +1150,10 @@ def calculate_player_star_power(team_id, league_id, season, api_key):
     Checks if a team has top-tier scorers available.
     Returns a booster score (0-15).
     """
-    key = (league_id, season)
-    if key in ANALYTICAL_CACHE["scorers"]:
-        scorers = ANALYTICAL_CACHE["scorers"][key]
-    else:
-        from football_api import get_top_scorers
-        scorers = get_top_scorers(league_id, season, api_key)
-        ANALYTICAL_CACHE["scorers"][key] = scorers
+    from football_api import get_top_scorers
+    scorers = ANALYTICAL_CACHE.get_or_load(
+        "scorers", (league_id, season), lambda: get_top_scorers(league_id, season, api_key)
+    )
         
     if not scorers or not isinstance(scorers, list): return 0
     
@@ -829,14 +1202,10 @@ def calculate_injury_impact(team_id, league_id, season, api_key):
     Checks for injuries and suspensions.
     Returns a penalty score based on the depth of the injury list.
     """
-    cache_key = (league_id, season, team_id)
-    if cache_key in ANALYTICAL_CACHE.get("injuries", {}):
-        injuries_raw = ANALYTICAL_CACHE["injuries"][cache_key]
-    else:
-        from football_api import get_team_injuries
-        injuries_raw = get_team_injuries(league_id, season, team_id, api_key)
-        if "injuries" not in ANALYTICAL_CACHE: ANALYTICAL_CACHE["injuries"] = {}
-        ANALYTICAL_CACHE["injuries"][cache_key] = injuries_raw
+    from football_api import get_team_injuries
+    injuries_raw = ANALYTICAL_CACHE.get_or_load(
+        "injuries", (league_id, season, team_id), lambda: get_team_injuries(league_id, season, team_id, api_key)
+    )
 
     if not injuries_raw: return 0
     
@@ -889,13 +1258,10 @@ def calculate_deep_h2h_dominance(home_id, away_id, api_key):
     Analyzes last 10 H2H results for historical dominance.
     Returns a score favoring the dominant team.
     """
-    key = tuple(sorted([home_id, away_id]))
-    if key in ANALYTICAL_CACHE["h2h"]:
-        h2h_data = ANALYTICAL_CACHE["h2h"][key]
-    else:
-        from football_api import get_extended_h2h
-        h2h_data = get_extended_h2h(home_id, away_id, api_key, last_n=10)
-        ANALYTICAL_CACHE["h2h"][key] = h2h_data
+    from football_api import get_extended_h2h
+    h2h_data = ANALYTICAL_CACHE.get_or_load(
+        "h2h", tuple(sorted([home_id, away_id])), lambda: get_extended_h2h(home_id, away_id, api_key, last_n=10)
+    )
         
     if not h2h_data: return 0
     
@@ -914,13 +1280,10 @@ def calculate_defensive_wall(team_id, league_id, season, api_key):
     """
     Returns a defensive strength score (0-20) based on clean sheets and GA.
     """
-    key = (league_id, season, team_id)
-    if key in ANALYTICAL_CACHE["stats"]:
-        stats = ANALYTICAL_CACHE["stats"][key]
-    else:
-        from football_api import get_team_statistics
-        stats = get_team_statistics(league_id, season, team_id, api_key)
-        ANALYTICAL_CACHE["stats"][key] = stats
+    from football_api import get_team_statistics
+    stats = ANALYTICAL_CACHE.get_or_load(
+        "stats", (league_id, season, team_id), lambda: get_team_statistics(league_id, season, team_id, api_key)
+    )
         
     if not stats or not isinstance(stats, dict): return 10
     
@@ -1031,292 +1394,168 @@ def calculate_derby_coefficient(fixture):
             
     return False
 
-def standardize_team_name(name):
-    if not name:
-        return ""
-    n = name.lower().strip()
-    suffixes = [
-        "fc", "fk", "ac", "sc", "rc", "afc", "cf", "ud", "cd",
-        "united", "city", "town", "rovers", "wanderers", "athletic", 
-        "hotspur", "hotspurs", "albion", "solna", "ff", "if", "ifs", "ab", "s.c.", "f.c."
-    ]
-    words = n.split()
-    cleaned_words = [w for w in words if w not in suffixes]
-    return " ".join(cleaned_words)
-
 def find_db_team_name(espn_name, league_id):
-    """Finds the closest team name matching espn_name in the played_matches database for that league."""
-    db = SessionLocal()
+    """Finds the closest team name matching espn_name in the played_matches snapshot for that league."""
     try:
-        home_teams = db.query(PlayedMatch.home_team).filter(PlayedMatch.league_id == league_id).distinct().all()
-        away_teams = db.query(PlayedMatch.away_team).filter(PlayedMatch.league_id == league_id).distinct().all()
-        db_teams = set([t[0] for t in home_teams if t[0]] + [t[0] for t in away_teams if t[0]])
-        
-        if not db_teams:
+        snapshot = get_league_snapshot(league_id)
+        if not snapshot.teams:
             return espn_name
             
-        espn_clean = standardize_team_name(espn_name)
-        
-        for db_t in db_teams:
-            if db_t.lower().strip() == espn_name.lower().strip():
-                return db_t
-                
-        for db_t in db_teams:
-            if standardize_team_name(db_t) == espn_clean:
-                return db_t
-                
-        for db_t in db_teams:
-            db_clean = standardize_team_name(db_t)
-            if espn_clean in db_clean or db_clean in espn_clean:
-                return db_t
-                
-        synonyms = {
-            "manchester united": "man united",
-            "manchester city": "man city",
-            "tottenham hotspur": "tottenham",
-            "west ham united": "west ham",
-            "inter milan": "inter",
-            "ac milan": "milan",
-            "real betis": "betis",
-            "real sociedad": "sociedad",
-            "athletic bilbao": "bilbao",
-            "sporting lisbon": "sporting cp"
-        }
-        for k, v in synonyms.items():
-            if espn_clean == k and v in [t.lower() for t in db_teams]:
-                return next(t for t in db_teams if t.lower() == v)
-            if espn_clean == v and k in [t.lower() for t in db_teams]:
-                return next(t for t in db_teams if t.lower() == k)
-                
-        return espn_name
+        # A team of that exact name wins over any stored alias
+        exact = snapshot.resolver.exact.get(espn_name.lower().strip())
+        if exact is not None:
+            return exact
+
+        # Previously resolved aliases are persisted, so repeat lookups across runs skip the matching passes
+        alias = lookup_team_alias(espn_name, league_id)
+        if alias is not None and alias in snapshot.team_index:
+            return alias
+            
+        db_name, matched_by = snapshot.resolver.match(espn_name)
+        if db_name is None:
+            return espn_name
+        # Substring matches are guesses: they are re-made from the current teams instead of kept forever
+        if matched_by != "substring":
+            save_team_alias(espn_name, league_id, db_name)
+        return db_name
     except Exception as e:
         print(f"Error matching team name '{espn_name}': {e}")
         return espn_name
-    finally:
-        db.close()
 
 def get_local_standings(league_id, season):
-    """Calculates team rankings dynamically from played_matches table."""
-    db = SessionLocal()
+    """Reads team rankings from the materialized league_standings table, falling back to the league snapshot."""
     try:
-        matches = db.query(PlayedMatch).filter(
-            PlayedMatch.league_id == league_id,
-            PlayedMatch.season == str(season)
-        ).all()
-        
-        standings = {}
-        for m in matches:
-            h = m.home_team
-            a = m.away_team
-            hg = m.home_goals
-            ag = m.away_goals
-            
-            if h not in standings:
-                standings[h] = {"points": 0, "goals_scored": 0, "goals_conceded": 0, "matches_played": 0}
-            if a not in standings:
-                standings[a] = {"points": 0, "goals_scored": 0, "goals_conceded": 0, "matches_played": 0}
-                
-            standings[h]["matches_played"] += 1
-            standings[a]["matches_played"] += 1
-            standings[h]["goals_scored"] += hg
-            standings[h]["goals_conceded"] += ag
-            standings[a]["goals_scored"] += ag
-            standings[a]["goals_conceded"] += hg
-            
-            if hg > ag:
-                standings[h]["points"] += 3
-            elif ag > hg:
-                standings[a]["points"] += 3
-            else:
-                standings[h]["points"] += 1
-                standings[a]["points"] += 1
-                
-        def sort_key(item):
-            team, stats = item
-            gd = stats["goals_scored"] - stats["goals_conceded"]
-            return (stats["points"], gd, stats["goals_scored"])
-            
-        sorted_teams = sorted(standings.items(), key=sort_key, reverse=True)
-        ranks = {team: rank + 1 for rank, (team, _) in enumerate(sorted_teams)}
+        ranks = get_league_standings(league_id, season)
+    except Exception as e:
+        print(f"Error reading materialized standings for league {league_id}: {e}")
+        ranks = {}
+    if ranks:
         return ranks
+    try:
+        return get_league_snapshot(league_id).standings(season)
     except Exception as e:
         print(f"Error calculating local standings: {e}")
         return {}
-    finally:
-        db.close()
 
 def get_local_form(team_name, league_id, count=5):
-    """Calculates form points (0-100) based on the last 'count' games in the database."""
-    db = SessionLocal()
+    """Calculates form points (0-100) based on the last 'count' games in the league snapshot."""
     try:
-        matches = db.query(PlayedMatch).filter(
-            PlayedMatch.league_id == league_id,
-            (PlayedMatch.home_team == team_name) | (PlayedMatch.away_team == team_name)
-        ).order_by(PlayedMatch.match_date.desc()).limit(count).all()
-        
-        if not matches:
-            return 50
-            
-        score = 0
-        for m in matches:
-            is_home = m.home_team == team_name
-            hg = m.home_goals
-            ag = m.away_goals
-            
-            if hg == ag:
-                score += 10
-            elif is_home and hg > ag:
-                score += 20
-            elif not is_home and ag > hg:
-                score += 20
-                
-        max_possible = count * 20
-        return int((score / max_possible) * 100)
+        return get_league_snapshot(league_id).form(team_name, count)
     except Exception as e:
         print(f"Error calculating local form for {team_name}: {e}")
         return 50
-    finally:
-        db.close()
 
 def get_local_h2h(home_team, away_team, league_id):
-    """Analyzes last 10 H2H results from the local database played_matches table."""
-    db = SessionLocal()
+    """Analyzes last 10 H2H results from the league's played_matches snapshot."""
     try:
-        matches = db.query(PlayedMatch).filter(
-            PlayedMatch.league_id == league_id,
-            (
-                ((PlayedMatch.home_team == home_team) & (PlayedMatch.away_team == away_team)) |
-                ((PlayedMatch.home_team == away_team) & (PlayedMatch.away_team == home_team))
-            )
-        ).order_by(PlayedMatch.match_date.desc()).limit(10).all()
-        
-        if not matches:
-            return 0
-            
-        home_wins = 0
-        away_wins = 0
-        for m in matches:
-            hg = m.home_goals
-            ag = m.away_goals
-            
-            if hg > ag:
-                winner = m.home_team
-            elif ag > hg:
-                winner = m.away_team
-            else:
-                winner = None
-                
-            if winner == home_team:
-                home_wins += 1
-            elif winner == away_team:
-                away_wins += 1
-                
-        diff = home_wins - away_wins
-        return diff * 3
+        return get_league_snapshot(league_id).h2h(home_team, away_team)
     except Exception as e:
         print(f"Error calculating local H2H for {home_team} vs {away_team}: {e}")
         return 0
-    finally:
-        db.close()
 
 def get_local_team_stats(team_name, league_id, season):
-    """Calculates star power and defensive wall scores from local played_matches table."""
-    db = SessionLocal()
+    """Calculates star power and defensive wall scores from the league's played_matches snapshot."""
     try:
-        matches = db.query(PlayedMatch).filter(
-            PlayedMatch.league_id == league_id,
-            PlayedMatch.season == str(season),
-            ((PlayedMatch.home_team == team_name) | (PlayedMatch.away_team == team_name))
-        ).all()
-        
-        if not matches:
-            try:
-                season_clean = season.split("/")[0]
-                prev_season = f"{int(season_clean)-1}/{season_clean}" if "/" in season else str(int(season_clean)-1)
-                matches = db.query(PlayedMatch).filter(
-                    PlayedMatch.league_id == league_id,
-                    PlayedMatch.season == prev_season,
-                    ((PlayedMatch.home_team == team_name) | (PlayedMatch.away_team == team_name))
-                ).all()
-            except:
-                pass
-                
-        if not matches:
-            return 5.0, 5.0
-            
-        goals_scored = 0
-        goals_conceded = 0
-        mp = len(matches)
-        
-        for m in matches:
-            is_home = m.home_team == team_name
-            hg = m.home_goals
-            ag = m.away_goals
-            
-            if is_home:
-                goals_scored += hg
-                goals_conceded += ag
-            else:
-                goals_scored += ag
-                goals_conceded += hg
-                
-        avg_scored = goals_scored / mp
-        avg_conceded = goals_conceded / mp
-        
-        star_power = min(10.0, max(1.0, avg_scored * 4.0))
-        def_wall = min(15.0, max(1.0, 15.0 - (avg_conceded * 5.0)))
-        
-        return star_power, def_wall
+        return get_league_snapshot(league_id).team_stats(team_name, season)
     except Exception as e:
         print(f"Error calculating local team stats for {team_name}: {e}")
         return 5.0, 5.0
-    finally:
-        db.close()
 
-_loaded_models_cache = {}
- 
-def get_match_prediction(fixture, api_key, model=None):
+def _model_nbytes(model):
+    """Approximate in-memory size of a market model dict (tree node arrays of every forest)."""
+    total = 0
+    for clf in (model or {}).values():
+        for est in getattr(clf, "estimators_", []):
+            tree = est.tree_
+            # sklearn's Node struct is 64 bytes per node, plus the class-count value array
+            total += tree.node_count * 64 + tree.value.nbytes
+    return total
+
+# Loaded league models, expiring with the stored version so a retrained model is picked up
+_loaded_models_cache = BoundedCache("models")
+_loaded_models_cache.configure(
+    "league",
+    ttl=float(os.getenv("MODEL_CACHE_EXPIRY_HOURS", "24")) * 3600,
+    max_entries=int(os.getenv("MODEL_CACHE_MAX_LEAGUES", "16")),
+    sizeof=_model_nbytes
+)
+_loaded_models_cache.configure(
+    "compiled",
+    ttl=float(os.getenv("MODEL_CACHE_EXPIRY_HOURS", "24")) * 3600,
+    max_entries=int(os.getenv("MODEL_CACHE_MAX_LEAGUES", "16")),
+    sizeof=lambda compiled: compiled.nbytes
+)
+
+# "forest": the five market forests pick; "scoreline": one Dixon-Coles scoreline distribution prices every market
+PREDICTION_ENGINE = os.getenv("PREDICTION_ENGINE", "forest")
+
+def _skipped_prediction():
+    return {
+        "main": "Skipped - Insufficient Data",
+        "confidence": "0%",
+        "dc": "N/A",
+        "ht": "N/A",
+        "corners": 0,
+        "ml": "Insufficient Data",
+        "ou_refined": "N/A",
+        "btts": "N/A",
+        "dnb": "N/A",
+        "multi_goals": "N/A",
+        "ht_ft": "N/A",
+        "combos": "N/A",
+        "star_power": "N/A",
+        "h2h_dom": 0,
+        "league_avg_goals": 2.5,
+        "v4_omniscience": {
+            "poisson": "0.0",
+            "derby": "No",
+            "stability": "N/A",
+            "injuries": "N/A"
+        }
+    }
+
+def _resolve_league_model(league_id, model=None):
+    """Returns the provided model dict, or loads/trains the league-specific one."""
+    if model is None or not isinstance(model, dict):
+        model = _loaded_models_cache.get("league", league_id)
+        if model is None:
+            model, compiled = _load_cached_models(league_id)
+            if not model:
+                print(f"No cached model for league {league_id} found. Training on the fly...")
+                train_df = fetch_training_data(None, league_id)
+                if not train_df.empty:
+                    model = train_model(train_df)
+                    save_cached_model(model, league_id, train_df)
+            if model:
+                _loaded_models_cache.set("league", league_id, model)
+                _loaded_models_cache.set("compiled", league_id, compiled or compile_market_models(model))
+        if model:
+            # New results retrain the league in the background while this model keeps serving
+            from model_training import retrain_in_background
+            retrain_in_background(league_id)
+    return model
+
+def _resolve_compiled_model(league_id, league_model, model=None):
+    """CompiledForests for the model _resolve_league_model returned; a caller-provided model is compiled here."""
+    if model is None or not isinstance(model, dict):
+        compiled = _loaded_models_cache.get("compiled", league_id)
+        if compiled is not None:
+            return compiled
+        compiled = compile_market_models(league_model)
+        _loaded_models_cache.set("compiled", league_id, compiled)
+        return compiled
+    return compile_market_models(league_model)
+
+def _build_match_context(fixture):
     """
-    Calculates a prediction based on form, H2H, venue, and ML Model using local DB data.
+    Computes the local-DB features and the rule-engine baseline for one fixture.
+    Everything a prediction needs except the ML market probabilities.
     """
-    fixture_id = fixture['fixture']['id']
     home_name = fixture['teams']['home']['name']
     away_name = fixture['teams']['away']['name']
     league_id = fixture['league']['id']
     season = fixture['league'].get('season', 2025)
     
-    # Check if this league is actually seeded (at least 10 matches)
-    db = SessionLocal()
-    try:
-        match_count = db.query(PlayedMatch.id).filter(PlayedMatch.league_id == league_id).limit(10).count()
-    finally:
-        db.close()
-        
-    if match_count < 10:
-        return {
-            "main": "Skipped - Insufficient Data",
-            "confidence": "0%",
-            "dc": "N/A",
-            "ht": "N/A",
-            "corners": 0,
-            "ml": "Insufficient Data",
-            "ou_refined": "N/A",
-            "btts": "N/A",
-            "dnb": "N/A",
-            "multi_goals": "N/A",
-            "ht_ft": "N/A",
-            "combos": "N/A",
-            "star_power": "N/A",
-            "h2h_dom": 0,
-            "league_avg_goals": 2.5,
-            "v4_omniscience": {
-                "poisson": "0.0",
-                "derby": "No",
-                "stability": "N/A",
-                "injuries": "N/A"
-            }
-        }
-        
     # 1. Match/Standardize team names against local DB
     home_db_name = find_db_team_name(home_name, league_id)
     away_db_name = find_db_team_name(away_name, league_id)
@@ -1329,46 +1568,13 @@ def get_match_prediction(fixture, api_key, model=None):
         weather_impact = -8 
     if temp and (temp < 0 or temp > 35): 
         weather_impact -= 5
-        
-    # Dynamically load/train league-specific model if not provided
-    global _loaded_models_cache
-    if model is None or not isinstance(model, dict):
-        if league_id in _loaded_models_cache:
-            model = _loaded_models_cache[league_id]
-        else:
-            model = load_cached_model(league_id)
-            if not model:
-                print(f"No cached model for league {league_id} found. Training on the fly...")
-                train_df = fetch_training_data(None, league_id)
-                if not train_df.empty:
-                    model = train_model(train_df)
-                    save_cached_model(model, league_id)
-            if model:
-                _loaded_models_cache[league_id] = model
 
     # Core parameters fetched from local database
     home_form = get_local_form(home_db_name, league_id)
     away_form = get_local_form(away_db_name, league_id)
     h2h_dominance = get_local_h2h(home_db_name, away_db_name, league_id)
     boogeyman_effect = calculate_boogeyman_score(None, None, h2h_dominance)
-    sentiment = 0
     derby_active = calculate_derby_coefficient(fixture)
-
-    # Surface & Travel
-    venue_surface = fixture.get('fixture', {}).get('venue', {}).get('surface', 'grass')
-    away_turf_impact = calculate_surface_impact(venue_surface, "grass")
-    home_travel = 0
-    away_travel = calculate_travel_stress(league_id, True)
-
-    home_injuries = 0
-    away_injuries = 0
-    home_fatigue = 0
-    away_fatigue = 0
-    home_bounce = 0
-    away_bounce = 0
-    poisson_boost = 0.0
-    home_stability = 0
-    away_stability = 0
     
     # Derby Neutralizer: Boost the underdog form if it's a derby
     derby_home_boost = 10 if (derby_active and home_form < away_form) else 0
@@ -1381,8 +1587,6 @@ def get_match_prediction(fixture, api_key, model=None):
     home_score += derby_home_boost
     away_score += derby_away_boost
     
-    ml_outcome = "Beacon ML Analyzed"
-    
     # Load rankings & motivation locally
     standings = get_local_standings(league_id, season)
     home_rank = standings.get(home_db_name, 10)
@@ -1406,154 +1610,290 @@ def get_match_prediction(fixture, api_key, model=None):
     elif away_score > home_score + win_threshold: outcome = f"{away_name} Win"
     else: outcome = "Draw / Very Close"
 
-    ht_result = get_halftime_prediction(home_form, away_form)
+    return {
+        "home_name": home_name,
+        "away_name": away_name,
+        "league_id": league_id,
+        "outcome": outcome,
+        "ht_result": get_halftime_prediction(home_form, away_form),
+        "derby_active": derby_active,
+        "h2h_dominance": h2h_dominance,
+        "home_rank": home_rank,
+        "away_rank": away_rank,
+        "home_motivation": home_motivation,
+        "away_motivation": away_motivation,
+        "home_star_power": home_star_power,
+        "away_star_power": away_star_power,
+        "home_def_wall": home_def_wall,
+        "away_def_wall": away_def_wall,
+        "home_db_name": home_db_name,
+        "away_db_name": away_db_name
+    }
+
+def _ml_markets(ctx, prob_outcome, prob_btts, prob_ou15, prob_ou25, prob_ou35, prob_ht_ft=None):
+    """
+    Turns the five market probabilities for one fixture into betting picks. prob_ht_ft, the (3, 3)
+    HT/FT probabilities of a scoreline distribution, picks the likelier of the two HT/FT candidates.
+    """
+    home_name = ctx["home_name"]
+    away_name = ctx["away_name"]
     
-    ref_name = fixture.get('fixture', {}).get('referee')
-    card_risk = calculate_referee_impact(ref_name)
-
-    # ML Model override if available
-    ml_confidence = 50
-    ml_btts = "GG / Yes"
-    ml_dnb = "1 DNB"
-    ml_ou = "Over 2.5"
-    ml_multi = "2-4 Goals"
-    ml_ht_ft = "Draw/Draw"
-    ml_combo = "1X & Under 3.5"
-
-    if model and isinstance(model, dict):
-        try:
-            # Construct feature vector for prediction
-            features_dict = {
-                "league_id": [league_id],
-                "home_rank": [home_rank],
-                "away_rank": [away_rank],
-                "home_motivation": [home_motivation],
-                "away_motivation": [away_motivation],
-                "home_star_power": [home_star_power],
-                "home_defensive_wall": [home_def_wall],
-                "h2h_dominance": [h2h_dominance],
-                "home_advantage": [1],
-                "league_avg_goals": [get_league_avg_goals(league_id)]
-            }
-            X_input = pd.DataFrame(features_dict)
-            
-            # Predict outcome probabilities [Draw(0), Home Win(1), Away Win(2)]
-            prob_outcome = model["outcome"].predict_proba(X_input)[0]
-            # Predict BTTS probability
-            prob_btts = model["btts"].predict_proba(X_input)[0][1]
-            # Predict Over/Under probabilities
-            prob_ou15 = model["ou15"].predict_proba(X_input)[0][1]
-            prob_ou25 = model["ou25"].predict_proba(X_input)[0][1]
-            prob_ou35 = model["ou35"].predict_proba(X_input)[0][1]
+    # 1. Main Outcome
+    if prob_outcome[1] > 0.45 and prob_outcome[1] > prob_outcome[2] + 0.10:
+        outcome = f"{home_name} Win"
+        ml_confidence = prob_outcome[1] * 100
+    elif prob_outcome[2] > 0.45 and prob_outcome[2] > prob_outcome[1] + 0.10:
+        outcome = f"{away_name} Win"
+        ml_confidence = prob_outcome[2] * 100
+    else:
+        outcome = "Draw / Very Close"
+        ml_confidence = prob_outcome[0] * 100
+        
+    # 2. Both Teams to Score (BTTS)
+    if prob_btts > 0.52:
+        ml_btts = "GG / Yes"
+    else:
+        ml_btts = "NG / No"
+        
+    # 3. Draw No Bet (DNB)
+    if prob_outcome[1] >= prob_outcome[2]:
+        ml_dnb = "1 DNB"
+    else:
+        ml_dnb = "2 DNB"
+        
+    # 4. Over/Under Goal Line
+    if prob_ou25 > 0.52:
+        ml_ou = "Over 2.5"
+    elif prob_ou15 < 0.45:
+        ml_ou = "Under 1.5"
+    elif prob_ou35 > 0.55:
+        ml_ou = "Over 3.5"
+    else:
+        ml_ou = "Under 2.5"
+        
+    # 5. Multi Goals Ranges
+    if prob_ou35 > 0.55:
+        ml_multi = "3-5 Goals"
+    elif prob_ou25 > 0.55 and prob_ou35 < 0.30:
+        ml_multi = "2-3 Goals"
+    elif prob_ou15 > 0.70 and prob_ou25 < 0.45:
+        ml_multi = "1-2 Goals"
+    elif prob_ou15 < 0.30:
+        ml_multi = "0-1 Goals"
+    else:
+        ml_multi = "2-4 Goals"
+        
+    # 6. Combo Bets
+    if outcome == f"{home_name} Win":
+        if prob_ou15 > 0.70:
+            ml_combo = "1 & Over 1.5"
+        else:
+            ml_combo = "1 & Under 3.5"
+    elif outcome == f"{away_name} Win":
+        if prob_ou15 > 0.70:
+            ml_combo = "2 & Over 1.5"
+        else:
+            ml_combo = "2 & Under 3.5"
+    else:
+        if prob_ou25 < 0.45:
+            ml_combo = "1X & Under 2.5"
+        else:
+            ml_combo = "1X & GG"
             
-            # 1. Main Outcome
-            if prob_outcome[1] > 0.45 and prob_outcome[1] > prob_outcome[2] + 0.10:
-                outcome = f"{home_name} Win"
-                ml_confidence = prob_outcome[1] * 100
-            elif prob_outcome[2] > 0.45 and prob_outcome[2] > prob_outcome[1] + 0.10:
-                outcome = f"{away_name} Win"
-                ml_confidence = prob_outcome[2] * 100
-            else:
-                outcome = "Draw / Very Close"
-                ml_confidence = prob_outcome[0] * 100
-                
-            # 2. Both Teams to Score (BTTS)
-            if prob_btts > 0.52:
-                ml_btts = "GG / Yes"
-            else:
-                ml_btts = "NG / No"
-                
-            # 3. Draw No Bet (DNB)
-            if prob_outcome[1] >= prob_outcome[2]:
-                ml_dnb = "1 DNB"
-            else:
-                ml_dnb = "2 DNB"
-                
-            # 4. Over/Under Goal Line
-            if prob_ou25 > 0.52:
-                ml_ou = "Over 2.5"
-            elif prob_ou15 < 0.45:
-                ml_ou = "Under 1.5"
-            elif prob_ou35 > 0.55:
-                ml_ou = "Over 3.5"
-            else:
-                ml_ou = "Under 2.5"
-                
-            # 5. Multi Goals Ranges
-            if prob_ou35 > 0.55:
-                ml_multi = "3-5 Goals"
-            elif prob_ou25 > 0.55 and prob_ou35 < 0.30:
-                ml_multi = "2-3 Goals"
-            elif prob_ou15 > 0.70 and prob_ou25 < 0.45:
-                ml_multi = "1-2 Goals"
-            elif prob_ou15 < 0.30:
-                ml_multi = "0-1 Goals"
-            else:
-                ml_multi = "2-4 Goals"
-                
-            # 6. Combo Bets
-            if outcome == f"{home_name} Win":
-                if prob_ou15 > 0.70:
-                    ml_combo = "1 & Over 1.5"
-                else:
-                    ml_combo = "1 & Under 3.5"
-            elif outcome == f"{away_name} Win":
-                if prob_ou15 > 0.70:
-                    ml_combo = "2 & Over 1.5"
-                else:
-                    ml_combo = "2 & Under 3.5"
-            else:
-                if prob_ou25 < 0.45:
-                    ml_combo = "1X & Under 2.5"
-                else:
-                    ml_combo = "1X & GG"
-                    
-            # 7. HT/FT Estimation
-            if outcome == f"{home_name} Win":
-                ml_ht_ft = "Home/Home" if prob_outcome[1] > 0.60 else "Draw/Home"
-            elif outcome == f"{away_name} Win":
-                ml_ht_ft = "Away/Away" if prob_outcome[2] > 0.60 else "Draw/Away"
-            else:
-                ml_ht_ft = "Draw/Draw"
-        except Exception as e:
-            print(f"Error during ML inference override: {e}")
-            ml_confidence = 72.5
+    # 7. HT/FT Estimation
+    if prob_ht_ft is not None:
+        # Full-time column of the picked outcome; half time Draw vs the same side (or Draw/Draw)
+        full = 0 if outcome == f"{home_name} Win" else (2 if outcome == f"{away_name} Win" else 1)
+        half = full if full == 1 or prob_ht_ft[full, full] >= prob_ht_ft[1, full] else 1
+        ml_ht_ft = ht_ft_label(half, full)
+    elif outcome == f"{home_name} Win":
+        ml_ht_ft = "Home/Home" if prob_outcome[1] > 0.60 else "Draw/Home"
+    elif outcome == f"{away_name} Win":
+        ml_ht_ft = "Away/Away" if prob_outcome[2] > 0.60 else "Draw/Away"
     else:
-        # Fallback defaults based on heuristics
-        ml_confidence = 65.0
-        ml_btts = "GG / Yes" if (home_def_wall + away_def_wall < 15) else "NG / No"
-        ml_dnb = "1 DNB" if home_name.lower() in outcome.lower() else ("2 DNB" if away_name.lower() in outcome.lower() else "1 DNB")
-        ml_ou = "Over 2.5" if (home_def_wall + away_def_wall < 15) else "Under 2.5"
-        ml_multi = "2-3 Goals" if "Over 2.5" in ml_ou else "1-2 Goals"
-        ml_combo = "1X & GG" if home_name.lower() in outcome.lower() else "X2 & Under 2.5"
         ml_ht_ft = "Draw/Draw"
 
-    confidence_str = f"{round(ml_confidence, 1)}%"
-
     return {
-        "main": outcome,
-        "confidence": confidence_str,
-        "dc": "1X / X2" if "Draw" in outcome else ("1X" if home_name.lower() in outcome.lower() else "X2"),
-        "ht": ht_result,
-        "corners": calculate_corner_estimate(fixture_id, api_key),
-        "ml": ml_outcome,
-        "ou_refined": ml_ou,
+        "outcome": outcome,
+        "confidence": ml_confidence,
         "btts": ml_btts,
         "dnb": ml_dnb,
-        "multi_goals": ml_multi,
+        "ou": ml_ou,
+        "multi": ml_multi,
         "ht_ft": ml_ht_ft,
-        "combos": ml_combo,
-        "star_power": f"H:{home_star_power} A:{away_star_power}",
-        "h2h_dom": h2h_dominance,
-        "league_avg_goals": get_league_avg_goals(league_id),
+        "combo": ml_combo
+    }
+
+# Multi-goals ranges and combo legs the scoreline engine chooses between (labels priced by ScorelineModel.predict)
+_SCORELINE_MULTI_GOALS = ("0-1 Goals", "1-2 Goals", "2-3 Goals", "2-4 Goals", "3-5 Goals")
+_SCORELINE_COMBO_LEGS = ("Over 1.5", "Under 1.5", "Over 2.5", "Under 2.5", "Over 3.5", "Under 3.5", "GG")
+
+def _scoreline_markets(ctx, scoreline, i):
+    """
+    Picks for fixture i straight from the events its scoreline distribution priced. The outcome,
+    DNB and HT/FT follow _ml_markets; BTTS takes the likelier side, O/U the tightest line still
+    more likely than not, multi goals the most likely range and the combo the most likely pairing
+    of the picked result with a goals leg.
+    """
+    p = lambda label: scoreline[label][i]
+    markets = _ml_markets(ctx, scoreline["outcome"][i], p("GG"), p("Over 1.5"), p("Over 2.5"), p("Over 3.5"), scoreline["ht_ft"][i])
+    markets["btts"] = "GG / Yes" if p("GG") >= p("NG") else "NG / No"
+    main_line = "Over 2.5" if p("Over 2.5") >= p("Under 2.5") else "Under 2.5"
+    markets["ou"] = next((line for line in ("Over 3.5", "Under 1.5") if p(line) > 0.5), main_line)
+    markets["multi"] = max(_SCORELINE_MULTI_GOALS, key=p)
+
+    outcome = markets["outcome"]
+    if outcome == f"{ctx['home_name']} Win":
+        results = ("1",)
+    elif outcome == f"{ctx['away_name']} Win":
+        results = ("2",)
+    else:
+        results = ("1X", "X2")
+    markets["combo"] = max((f"{r} & {leg}" for r in results for leg in _SCORELINE_COMBO_LEGS), key=p)
+    return markets
+
+def _fallback_markets(ctx, ml_failed=False):
+    """Market picks when no ML model is available (or inference failed)."""
+    outcome = ctx["outcome"]
+    if ml_failed:
+        # Keep the rule-engine outcome and the default ML picks
+        return {
+            "outcome": outcome,
+            "confidence": 72.5,
+            "btts": "GG / Yes",
+            "dnb": "1 DNB",
+            "ou": "Over 2.5",
+            "multi": "2-4 Goals",
+            "ht_ft": "Draw/Draw",
+            "combo": "1X & Under 3.5"
+        }
+        
+    # Fallback defaults based on heuristics
+    home_name = ctx["home_name"]
+    away_name = ctx["away_name"]
+    walls = ctx["home_def_wall"] + ctx["away_def_wall"]
+    ml_ou = "Over 2.5" if (walls < 15) else "Under 2.5"
+    return {
+        "outcome": outcome,
+        "confidence": 65.0,
+        "btts": "GG / Yes" if (walls < 15) else "NG / No",
+        "dnb": "1 DNB" if home_name.lower() in outcome.lower() else ("2 DNB" if away_name.lower() in outcome.lower() else "1 DNB"),
+        "ou": ml_ou,
+        "multi": "2-3 Goals" if "Over 2.5" in ml_ou else "1-2 Goals",
+        "ht_ft": "Draw/Draw",
+        "combo": "1X & GG" if home_name.lower() in outcome.lower() else "X2 & Under 2.5"
+    }
+
+def _assemble_prediction(fixture, api_key, ctx, markets):
+    """Builds the prediction dict returned by get_match_prediction / predict_batch."""
+    home_name = ctx["home_name"]
+    outcome = markets["outcome"]
+    
+    home_injuries = 0
+    away_injuries = 0
+    # Expected goal supremacy of the home side under the league's scoreline model
+    poisson_boost = markets.get("poisson", 0.0)
+    home_stability = 0
+    away_stability = 0
+
+    return {
+        "main": outcome,
+        "confidence": f"{round(markets['confidence'], 1)}%",
+        "dc": "1X / X2" if "Draw" in outcome else ("1X" if home_name.lower() in outcome.lower() else "X2"),
+        "ht": ctx["ht_result"],
+        "corners": calculate_corner_estimate(fixture['fixture']['id'], api_key),
+        "ml": "Beacon ML Analyzed",
+        "ou_refined": markets["ou"],
+        "btts": markets["btts"],
+        "dnb": markets["dnb"],
+        "multi_goals": markets["multi"],
+        "ht_ft": markets["ht_ft"],
+        "combos": markets["combo"],
+        "star_power": f"H:{ctx['home_star_power']} A:{ctx['away_star_power']}",
+        "h2h_dom": ctx["h2h_dominance"],
+        "league_avg_goals": get_league_avg_goals(ctx["league_id"]),
         "v4_omniscience": {
             "poisson": f"{poisson_boost:.1f}" if isinstance(poisson_boost, float) else "0.0",
-            "derby": "YES" if derby_active else "No",
+            "derby": "YES" if ctx["derby_active"] else "No",
             "stability": f"H:{home_stability} A:{away_stability}",
             "injuries": f"H:{home_injuries} A:{away_injuries}"
         }
     }
 
+def _scoreline_probabilities(league_id, contexts):
+    """Market probabilities of each fixture under the league's Dixon-Coles scoreline model, or None."""
+    try:
+        scoreline = get_league_snapshot(league_id).scoreline_model
+        if scoreline is None:
+            return None
+        return scoreline.predict([ctx["home_db_name"] for ctx in contexts], [ctx["away_db_name"] for ctx in contexts])
+    except Exception as e:
+        print(f"Error during scoreline inference for league {league_id}: {e}")
+        return None
+
+def predict_batch(fixtures, api_key=None, model=None):
+    """
+    Batched inference: groups fixtures by league, builds one feature matrix per league and
+    runs each market model once over it. With PREDICTION_ENGINE=scoreline the picks come from the
+    league's scoreline distribution instead and no forest is loaded or trained. Returns one
+    prediction per fixture, in input order, with the same shape get_match_prediction returns.
+    """
+    results = [None] * len(fixtures)
+    by_league = {}
+    for pos, fixture in enumerate(fixtures):
+        by_league.setdefault(fixture['league']['id'], []).append(pos)
+        
+    for league_id, positions in by_league.items():
+        # Check if this league is actually seeded (at least 10 matches)
+        if len(get_league_snapshot(league_id)) < 10:
+            for pos in positions:
+                results[pos] = _skipped_prediction()
+            continue
+            
+        contexts = [_build_match_context(fixtures[pos]) for pos in positions]
+        scoreline = _scoreline_probabilities(league_id, contexts)
+        
+        probs = None
+        # Every market from one joint scoreline distribution, in closed form
+        use_scoreline = PREDICTION_ENGINE == "scoreline" and scoreline is not None
+        league_model = None if use_scoreline else _resolve_league_model(league_id, model)
+        has_model = bool(league_model) and isinstance(league_model, dict)
+        if has_model:
+            try:
+                compiled = _resolve_compiled_model(league_id, league_model, model)
+                X_input = FEATURE_SCHEMA.matrix(contexts)
+                # One traversal scores all five markets, bit-identical to each forest's predict_proba
+                market_probs = compiled.predict_proba(X_input)
+                # Outcome probabilities per row: [Draw(0), Home Win(1), Away Win(2)]
+                probs = {
+                    "outcome": market_probs["outcome"],
+                    "btts": market_probs["btts"][:, 1],
+                    "ou15": market_probs["ou15"][:, 1],
+                    "ou25": market_probs["ou25"][:, 1],
+                    "ou35": market_probs["ou35"][:, 1]
+                }
+            except Exception as e:
+                print(f"Error during ML inference override: {e}")
+                
+        for i, (pos, ctx) in enumerate(zip(positions, contexts)):
+            if use_scoreline:
+                markets = _scoreline_markets(ctx, scoreline, i)
+            elif probs is not None:
+                markets = _ml_markets(ctx, probs["outcome"][i], probs["btts"][i], probs["ou15"][i], probs["ou25"][i], probs["ou35"][i])
+            else:
+                markets = _fallback_markets(ctx, ml_failed=has_model)
+            if scoreline is not None:
+                markets["poisson"] = float(scoreline["lambda"][i] - scoreline["mu"][i])
+            results[pos] = _assemble_prediction(fixtures[pos], api_key, ctx, markets)
+            
+    return results
+ 
+def get_match_prediction(fixture, api_key, model=None):
+    """
+    Calculates a prediction based on form, H2H, venue, and ML Model using local DB data.
+    """
+    return predict_batch([fixture], api_key, model=model)[0]
+
 def evaluate_model(model, test_data):
     # Function to evaluate the model's performance
     # Add logic to evaluate the model's performance on a test data set
@@ -1565,11 +1905,9 @@ def make_predictions(model, fixtures, api_key):
     to generate match outcomes.
     """
     predictions = {}
-    for fixture in fixtures:
-        fixture_id = fixture['fixture']['id']
-        # Feed the model for hybrid inference
-        prediction = get_match_prediction(fixture, api_key, model=model)
-        predictions[fixture_id] = prediction
+    # Feed the model for hybrid inference, one feature matrix per league
+    for fixture, prediction in zip(fixtures, predict_batch(fixtures, api_key, model=model)):
+        predictions[fixture['fixture']['id']] = prediction
     
     return predictions
 
@@ -0,0 +1,47 @@
+# retrain_policy.py
+import os
+import sklearn
+
+# Training rows written (inserted or changed) since a league's model was trained that trigger a retrain
+RETRAIN_MIN_NEW_ROWS = int(os.getenv("RETRAIN_MIN_NEW_ROWS", "10"))
+
+
+def usable_reason(entry, league_id):
+    """Why a stored model version cannot serve predictions at all, or None when it can."""
+    from prediction_model import FEATURE_SCHEMA
+    from feature_schema import FeatureSchemaError
+    if entry.get("sklearn") != sklearn.__version__:
+        return f"built with scikit-learn {entry.get('sklearn')}, running {sklearn.__version__}"
+    try:
+        FEATURE_SCHEMA.check_columns(entry.get("feature_columns", []), f"stored model for league {league_id}")
+    except FeatureSchemaError as e:
+        return str(e)
+    return None
+
+def retrain_reason(league_id):
+    """
+    Why the league's model should be retrained, or None while it is current. A model is retrained
+    when there is none, when it cannot be used (other scikit-learn, other features), or once at
+    least RETRAIN_MIN_NEW_ROWS training rows were inserted or changed since it was trained.
+    Age alone never triggers a retrain. Reads the manifest and one state row.
+    """
+    import model_store
+    import prediction_model
+    entry = model_store.current_entry(league_id)
+    if entry is None:
+        if os.path.exists(prediction_model._legacy_model_file(league_id)):
+            return "legacy model file without training data state"
+        return "no stored model"
+    reason = usable_reason(entry, league_id)
+    if reason:
+        return reason
+    trained_state = entry.get("training_data_state")
+    if trained_state is None:
+        return "training data state not recorded"
+    current_state = prediction_model.training_data_state(league_id)
+    if current_state < trained_state:
+        return "training data was reset"
+    written = current_state - trained_state
+    if written >= RETRAIN_MIN_NEW_ROWS:
+        return f"{written} training rows written since version {entry['version']}"
+    return None
@@ -0,0 +1,204 @@
+# scoreline_model.py
+import os
+import numpy as np
+
+# Scorelines 0..SCORELINE_MAX_GOALS per side make up the distribution (the tail beyond is renormalized away)
+SCORELINE_MAX_GOALS = int(os.getenv("SCORELINE_MAX_GOALS", "10"))
+# Dixon-Coles time decay of a match's weight, per day before the league's latest match (0 = no decay)
+SCORELINE_DECAY_PER_DAY = float(os.getenv("SCORELINE_DECAY_PER_DAY", "0.0019"))
+# Pseudo-goals pulling each team's attack and defence towards the league average (thin histories)
+SCORELINE_PRIOR_GOALS = float(os.getenv("SCORELINE_PRIOR_GOALS", "3"))
+# Share of each side's expected goals scored before half time (HT/FT market)
+SCORELINE_HALFTIME_SHARE = float(os.getenv("SCORELINE_HALFTIME_SHARE", "0.45"))
+
+_FIT_ITERATIONS = 200
+_FIT_TOLERANCE = 1e-8
+_RHO_GRID = np.linspace(-0.3, 0.3, 121)
+_MICROSECONDS_PER_DAY = 86400 * 1e6
+
+_RESULTS = ("Home", "Draw", "Away")
+
+
+def _event_masks(max_goals):
+    """
+    Boolean (home goals, away goals) masks of every market event, keyed by label. Any market
+    whose outcome is a function of the final score is one mask, so all of them are priced by a
+    single matrix product with the scoreline distribution.
+    """
+    home, away = np.indices((max_goals + 1, max_goals + 1))
+    total = home + away
+    results = {"1": home > away, "X": home == away, "2": home < away}
+    results["1X"] = results["1"] | results["X"]
+    results["X2"] = results["X"] | results["2"]
+    btts = (home > 0) & (away > 0)
+    masks = dict(results)
+    masks["GG"] = btts
+    masks["NG"] = ~btts
+    for line in (0.5, 1.5, 2.5, 3.5, 4.5, 5.5):
+        masks[f"Over {line}"] = total > line
+        masks[f"Under {line}"] = total < line
+    for low, high in ((0, 1), (1, 2), (2, 3), (2, 4), (3, 5)):
+        masks[f"{low}-{high} Goals"] = (total >= low) & (total <= high)
+    for result in ("1", "2", "1X", "X2"):
+        for line in (1.5, 2.5, 3.5):
+            masks[f"{result} & Over {line}"] = results[result] & (total > line)
+            masks[f"{result} & Under {line}"] = results[result] & (total < line)
+        masks[f"{result} & GG"] = results[result] & btts
+    return masks
+
+def _poisson_pmf(rates, max_goals):
+    """(n, max_goals + 1) Poisson probabilities of 0..max_goals goals for each rate."""
+    k = np.arange(max_goals + 1)
+    log_factorial = np.concatenate(([0.0], np.cumsum(np.log(k[1:]))))
+    rates = np.asarray(rates, dtype=np.float64)[:, None]
+    return np.exp(k * np.log(rates) - rates - log_factorial)
+
+def _difference_pmf(matrices):
+    """(n, 2G + 1) distribution of home minus away goals (-G..G) of (n, G + 1, G + 1) scoreline matrices."""
+    size = matrices.shape[1]
+    home, away = np.indices((size, size))
+    onehot = np.zeros((size * size, 2 * size - 1))
+    onehot[np.arange(size * size), (home - away).ravel() + size - 1] = 1.0
+    return matrices.reshape(len(matrices), -1) @ onehot
+
+
+class ScorelineModel:
+    """
+    Dixon-Coles model of a league's scorelines: home goals ~ Poisson(home_rate * attack[home] *
+    defence[away]) and away goals ~ Poisson(away_rate * attack[away] * defence[home]), with rho
+    correcting the 0-0, 1-0, 0-1 and 1-1 scores. Fitted on the league snapshot's played matches,
+    each weighted by exp(-SCORELINE_DECAY_PER_DAY * days before the latest match).
+    Teams it has not seen play at league average.
+    """
+
+    def __init__(self, team_index, attack, defence, home_rate, away_rate, rho, n_matches, max_goals=None):
+        self.team_index = team_index
+        self.attack = attack
+        self.defence = defence
+        self.home_rate = home_rate
+        self.away_rate = away_rate
+        self.rho = rho
+        self.n_matches = n_matches
+        self.max_goals = max_goals or SCORELINE_MAX_GOALS
+        masks = _event_masks(self.max_goals)
+        self.events = tuple(masks)
+        self._event_matrix = np.stack([m.ravel() for m in masks.values()], axis=1).astype(np.float64)
+
+    @property
+    def nbytes(self):
+        return self.attack.nbytes + self.defence.nbytes + self._event_matrix.nbytes
+
+    @classmethod
+    def fit(cls, snapshot):
+        """Maximum-likelihood fit on a LeagueSnapshot: fixed-point updates of the Poisson rates, then a grid search for rho."""
+        n_teams = len(snapshot.teams)
+        home, away = snapshot.home, snapshot.away
+        x = snapshot.home_goals.astype(np.float64)
+        y = snapshot.away_goals.astype(np.float64)
+
+        dated = snapshot.dates != np.iinfo(np.int64).min
+        w = np.ones(len(home))
+        if dated.any() and SCORELINE_DECAY_PER_DAY > 0:
+            # Undated matches count like the oldest dated one
+            dates = np.where(dated, snapshot.dates, snapshot.dates[dated].min()).astype(np.float64)
+            w = np.exp(-SCORELINE_DECAY_PER_DAY * (dates.max() - dates) / _MICROSECONDS_PER_DAY)
+        if not len(home) or not (w * (x + y)).sum():
+            return None
+
+        attack = np.ones(n_teams)
+        defence = np.ones(n_teams)
+        home_rate = max((w * x).sum() / w.sum(), 1e-3)
+        away_rate = max((w * y).sum() / w.sum(), 1e-3)
+        scored = np.bincount(home, w * x, n_teams) + np.bincount(away, w * y, n_teams)
+        conceded = np.bincount(away, w * x, n_teams) + np.bincount(home, w * y, n_teams)
+        prior = SCORELINE_PRIOR_GOALS
+        for _ in range(_FIT_ITERATIONS):
+            previous = attack, defence
+            exposure = (np.bincount(home, w * home_rate * defence[away], n_teams)
+                        + np.bincount(away, w * away_rate * defence[home], n_teams))
+            attack = (scored + prior) / (exposure + prior)
+            attack /= attack.mean()
+            exposure = (np.bincount(away, w * home_rate * attack[home], n_teams)
+                        + np.bincount(home, w * away_rate * attack[away], n_teams))
+            defence = (conceded + prior) / (exposure + prior)
+            defence /= defence.mean()
+            home_rate = (w * x).sum() / (w * attack[home] * defence[away]).sum()
+            away_rate = (w * y).sum() / (w * attack[away] * defence[home]).sum()
+            if max(np.abs(attack - previous[0]).max(), np.abs(defence - previous[1]).max()) < _FIT_TOLERANCE:
+                break
+
+        # rho only changes the likelihood of low scores: maximize it over the grid where every tau stays positive
+        lam = home_rate * attack[home] * defence[away]
+        mu = away_rate * attack[away] * defence[home]
+        low = (x <= 1) & (y <= 1)
+        tau = _tau(lam[low, None], mu[low, None], x[low, None], y[low, None], _RHO_GRID[None, :])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            loglik = np.where((tau > 0).all(axis=0), (w[low, None] * np.log(tau)).sum(axis=0), -np.inf)
+        rho = float(_RHO_GRID[int(np.argmax(loglik))]) if np.isfinite(loglik).any() else 0.0
+
+        return cls(dict(snapshot.team_index), attack, defence, float(home_rate), float(away_rate), rho, len(home))
+
+    def rates(self, home_teams, away_teams):
+        """Expected home and away goals of each fixture, as two float64 arrays."""
+        h = np.array([self.team_index.get(t, -1) for t in home_teams], dtype=np.int64)
+        a = np.array([self.team_index.get(t, -1) for t in away_teams], dtype=np.int64)
+        attack = np.append(self.attack, 1.0) # Index -1: unseen team, league average
+        defence = np.append(self.defence, 1.0)
+        return self.home_rate * attack[h] * defence[a], self.away_rate * attack[a] * defence[h]
+
+    def scorelines(self, lam, mu):
+        """(n, G + 1, G + 1) joint distribution of (home goals, away goals) for each pair of rates."""
+        matrices = _poisson_pmf(lam, self.max_goals)[:, :, None] * _poisson_pmf(mu, self.max_goals)[:, None, :]
+        low = np.array([0, 1])
+        matrices[:, :2, :2] *= np.maximum(_tau(lam[:, None, None], mu[:, None, None], low[:, None], low[None, :], self.rho), 0.0)
+        return matrices / matrices.sum(axis=(1, 2), keepdims=True)
+
+    def ht_ft(self, lam, mu):
+        """
+        (n, 3, 3) HT/FT probabilities, indexed [half time, full time] in Home/Draw/Away order.
+        Both halves are independent Poisson with SCORELINE_HALFTIME_SHARE of the rates before the
+        break (no low-score correction), and the result at full time is the sum of both halves.
+        """
+        share = SCORELINE_HALFTIME_SHARE
+        first = _difference_pmf(_poisson_pmf(lam * share, self.max_goals)[:, :, None] * _poisson_pmf(mu * share, self.max_goals)[:, None, :])
+        second = _difference_pmf(_poisson_pmf(lam * (1 - share), self.max_goals)[:, :, None] * _poisson_pmf(mu * (1 - share), self.max_goals)[:, None, :])
+        diffs = np.arange(first.shape[1]) - self.max_goals
+        half = np.sign(diffs)
+        full = np.sign(diffs[:, None] + diffs[None, :])
+        # Category index 0/1/2 = Home/Draw/Away for a goal difference sign of +1/0/-1
+        masks = np.zeros((3, 3) + full.shape)
+        for i, s_half in enumerate((1, 0, -1)):
+            for j, s_full in enumerate((1, 0, -1)):
+                masks[i, j] = (half[:, None] == s_half) & (full == s_full)
+        ht_ft = np.einsum("ni,nj,abij->nab", first, second, masks)
+        return ht_ft / ht_ft.sum(axis=(1, 2), keepdims=True)
+
+    def predict(self, home_teams, away_teams):
+        """
+        Prices every market of each fixture from its scoreline distribution. Returns a dict of
+        per-fixture arrays: "lambda"/"mu" (expected goals), "outcome" ([Draw, Home, Away], the
+        class order of the outcome forest), one entry per _event_masks label, "ht_ft" (n, 3, 3)
+        and "scoreline" (the most likely score as (home, away) goals).
+        """
+        lam, mu = self.rates(home_teams, away_teams)
+        matrices = self.scorelines(lam, mu)
+        priced = matrices.reshape(len(matrices), -1) @ self._event_matrix
+        probs = {label: priced[:, i] for i, label in enumerate(self.events)}
+        probs["lambda"], probs["mu"] = lam, mu
+        probs["outcome"] = np.stack([probs["X"], probs["1"], probs["2"]], axis=1)
+        probs["ht_ft"] = self.ht_ft(lam, mu)
+        flat = matrices.reshape(len(matrices), -1).argmax(axis=1)
+        probs["scoreline"] = np.stack(np.divmod(flat, self.max_goals + 1), axis=1)
+        return probs
+
+
+def _tau(lam, mu, x, y, rho):
+    """Dixon-Coles low-score correction factor (1 for scores other than 0-0, 1-0, 0-1, 1-1)."""
+    return np.where((x == 0) & (y == 0), 1 - lam * mu * rho,
+           np.where((x == 0) & (y == 1), 1 + lam * rho,
+           np.where((x == 1) & (y == 0), 1 + mu * rho,
+           np.where((x == 1) & (y == 1), 1 - rho, 1.0))))
+
+def ht_ft_label(half_time, full_time):
+    """Label of an HT/FT index pair, as used by the prediction dicts (e.g. "Draw/Home")."""
+    return f"{_RESULTS[half_time]}/{_RESULTS[full_time]}"
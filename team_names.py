@@ -0,0 +1,123 @@
+# team_names.py
+from bounded_cache import BoundedCache
+from database import SessionLocal, TeamAlias
+
+# Common ESPN <-> football-data.co.uk naming differences (standardized form on both sides)
+TEAM_SYNONYMS = {
+    "manchester united": "man united",
+    "manchester city": "man city",
+    "tottenham hotspur": "tottenham",
+    "west ham united": "west ham",
+    "inter milan": "inter",
+    "ac milan": "milan",
+    "real betis": "betis",
+    "real sociedad": "sociedad",
+    "athletic bilbao": "bilbao",
+    "sporting lisbon": "sporting cp"
+}
+
+def standardize_team_name(name):
+    if not name:
+        return ""
+    n = name.lower().strip()
+    suffixes = [
+        "fc", "fk", "ac", "sc", "rc", "afc", "cf", "ud", "cd",
+        "united", "city", "town", "rovers", "wanderers", "athletic",
+        "hotspur", "hotspurs", "albion", "solna", "ff", "if", "ifs", "ab", "s.c.", "f.c."
+    ]
+    words = n.split()
+    cleaned_words = [w for w in words if w not in suffixes]
+    return " ".join(cleaned_words)
+
+
+class TeamNameResolver:
+    """
+    Precomputed lookup maps for matching external team names against one league's DB team names.
+    Built once per league snapshot, so it is rebuilt whenever new played matches arrive.
+    """
+
+    def __init__(self, db_teams):
+        self.teams = [t for t in db_teams if t]
+        self.exact = {}
+        self.standardized = {}
+        self.standardized_list = []
+        for t in self.teams:
+            self.exact.setdefault(t.lower().strip(), t)
+            clean = standardize_team_name(t)
+            self.standardized.setdefault(clean, t)
+            self.standardized_list.append((clean, t))
+
+    def match(self, name):
+        """
+        Returns (DB team name, pass that matched it), or (None, None) when nothing matches.
+        The passes are "exact", "standardized", "substring" (a guess) and "synonym".
+        """
+        if not self.teams:
+            return None, None
+        exact = self.exact.get(name.lower().strip())
+        if exact is not None:
+            return exact, "exact"
+
+        clean = standardize_team_name(name)
+        match = self.standardized.get(clean)
+        if match is not None:
+            return match, "standardized"
+
+        for db_clean, db_t in self.standardized_list:
+            if clean in db_clean or db_clean in clean:
+                return db_t, "substring"
+
+        for k, v in TEAM_SYNONYMS.items():
+            if clean == k and v in self.exact:
+                return self.exact[v], "synonym"
+            if clean == v and k in self.exact:
+                return self.exact[k], "synonym"
+        return None, None
+
+    def resolve(self, name):
+        """Returns the matching DB team name, or None when nothing matches."""
+        return self.match(name)[0]
+
+
+# league_id -> {external name: DB name}, loaded from team_aliases once per league
+_alias_cache = BoundedCache("team_aliases")
+_alias_cache.configure("league", ttl=3600, max_entries=64)
+
+def _league_aliases(league_id):
+    aliases = _alias_cache.get("league", league_id)
+    if aliases is None:
+        db = SessionLocal()
+        try:
+            rows = db.query(TeamAlias.source_name, TeamAlias.db_name).filter(TeamAlias.league_id == league_id).all()
+            aliases = {source: target for source, target in rows}
+        except Exception as e:
+            print(f"Error loading team aliases for league {league_id}: {e}")
+            aliases = {}
+        finally:
+            db.close()
+        _alias_cache.set("league", league_id, aliases)
+    return aliases
+
+def lookup_team_alias(name, league_id):
+    """O(1) lookup of a previously resolved external -> DB team name."""
+    return _league_aliases(league_id).get(name)
+
+def save_team_alias(name, league_id, db_name):
+    """Persists a resolved external -> DB team name so later runs skip the matching passes."""
+    aliases = _league_aliases(league_id)
+    if aliases.get(name) == db_name:
+        return
+    db = SessionLocal()
+    try:
+        row = db.query(TeamAlias).filter(TeamAlias.league_id == league_id, TeamAlias.source_name == name).first()
+        if row is None:
+            db.add(TeamAlias(league_id=league_id, source_name=name, db_name=db_name))
+        else:
+            row.db_name = db_name
+        db.commit()
+        aliases[name] = db_name
+    except Exception as e:
+        db.rollback()
+        print(f"Error saving team alias '{name}' -> '{db_name}': {e}")
+    finally:
+        db.close()
@@ -0,0 +1,55 @@
+# test_api_quota.py
+import time
+import datetime
+import threading
+import api_quota
+from api_quota import QuotaManager, PRIORITY_FIXTURES, PRIORITY_STANDINGS, PRIORITY_ENRICHMENT
+
+def test_quota_manager():
+    print("--- Running API Quota Manager Test ---")
+    assert api_quota.priority_for("https://v3.football.api-sports.io/fixtures") == PRIORITY_FIXTURES
+    assert api_quota.priority_for("https://v3.football.api-sports.io/standings") == PRIORITY_STANDINGS
+    assert api_quota.priority_for("https://v3.football.api-sports.io/coachs") == PRIORITY_ENRICHMENT
+    assert api_quota.priority_for("https://site.api.espn.com/apis/site/v2/sports/soccer/all/scoreboard") is None
+
+    # Daily reserve: enrichment stops at 20% left, standings may use the rest, fixtures find it empty
+    day = [datetime.date(2026, 5, 1)]
+    quota = QuotaManager(10, 1200, today=lambda: day[0])
+    assert sum(quota.acquire(PRIORITY_ENRICHMENT, max_wait=0) for _ in range(10)) == 8
+    assert sum(quota.acquire(PRIORITY_STANDINGS, max_wait=0) for _ in range(10)) == 2
+    assert quota.acquire(PRIORITY_FIXTURES, max_wait=0) is False
+    # The daily counter resets at midnight UTC
+    day[0] = datetime.date(2026, 5, 2)
+    assert quota.acquire(PRIORITY_FIXTURES, max_wait=0) is True
+
+    # Remaining quota comes from the response headers; a daily limit error closes the day
+    assert quota.observe(200, {"x-ratelimit-requests-remaining": "3"}) is False
+    assert quota.status()["daily_remaining"] == 3
+    assert quota.observe(200, {}, {"errors": {"requests": "You have reached the request limit for the day"}}) is True
+    assert quota.acquire(PRIORITY_FIXTURES, max_wait=1) is False
+
+    # An empty per-minute bucket paces callers instead of failing them (20 tokens/s here)
+    quota = QuotaManager(100, 1200)
+    quota.observe(200, {"x-ratelimit-remaining": "0"})
+    started = time.monotonic()
+    assert quota.acquire(PRIORITY_ENRICHMENT, max_wait=5) is True
+    assert time.monotonic() - started >= 0.03
+
+    # With both waiting on the bucket, the fixtures call is served before the enrichment call
+    quota.observe(200, {"x-ratelimit-remaining": "0"})
+    order = []
+    def call(priority):
+        if quota.acquire(priority, max_wait=5):
+            order.append(priority)
+    enrichment = threading.Thread(target=call, args=(PRIORITY_ENRICHMENT,))
+    fixtures = threading.Thread(target=call, args=(PRIORITY_FIXTURES,))
+    enrichment.start()
+    time.sleep(0.01)
+    fixtures.start()
+    enrichment.join()
+    fixtures.join()
+    assert order == [PRIORITY_FIXTURES, PRIORITY_ENRICHMENT], order
+    print("SUCCESS: Quota manager keeps daily reserves, syncs from headers, paces and prioritizes calls.")
+
+if __name__ == "__main__":
+    test_quota_manager()
@@ -0,0 +1,66 @@
+# test_bounded_cache.py
+import time
+import bounded_cache
+from bounded_cache import BoundedCache, cache_stats
+
+def test_bounded_cache():
+    print("--- Running Bounded Cache Test ---")
+    cache = BoundedCache("test_cache")
+    cache.configure("lru", max_entries=2)
+    cache.configure("ttl", ttl=60)
+    cache.configure("budget", max_entries=100, max_bytes=10, sizeof=len)
+
+    # LRU eviction: touching "a" keeps it while "b" is evicted
+    cache.set("lru", "a", 1)
+    cache.set("lru", "b", 2)
+    assert cache.get("lru", "a") == 1
+    cache.set("lru", "c", 3)
+    assert cache.get("lru", "b") is None
+    assert cache.get("lru", "a") == 1 and cache.get("lru", "c") == 3
+
+    # TTL expiry, with the clock moved forward instead of sleeping
+    cache.set("ttl", "k", {"response": []})
+    assert cache.get("ttl", "k") == {"response": []}
+    real_monotonic = time.monotonic
+    bounded_cache.time.monotonic = lambda: real_monotonic() + 61
+    try:
+        assert cache.get("ttl", "k", "expired") == "expired"
+    finally:
+        bounded_cache.time.monotonic = real_monotonic
+
+    # Byte budget evicts the oldest entries until the namespace fits again
+    cache.set("budget", 1, "xxxx")
+    cache.set("budget", 2, "yyyy")
+    cache.set("budget", 3, "zzzz")
+    assert cache.get("budget", 1) is None and cache.get("budget", 3) == "zzzz"
+
+    # get_or_load only calls the loader on a miss, and caches None results too
+    calls = []
+    loader = lambda: calls.append(1)
+    cache.get_or_load("ttl", "none", loader)
+    cache.get_or_load("ttl", "none", loader)
+    assert len(calls) == 1
+
+    stats = cache_stats()["test_cache"]
+    assert stats["lru"] == {
+        "entries": 2, "max_entries": 2, "bytes": stats["lru"]["bytes"], "max_bytes": None, "ttl_seconds": None,
+        "hits": 3, "misses": 1, "hit_rate": 0.75, "evictions": 1, "expirations": 0
+    }, stats["lru"]
+    assert stats["ttl"]["expirations"] == 1
+    assert stats["budget"]["bytes"] == 8 and stats["budget"]["evictions"] == 1
+
+    # A value that grew in place is re-measured and may push the namespace over its budget
+    grown = [1, 2]
+    cache.set("budget", "grown", grown)
+    grown.extend(range(8))
+    cache.resize("budget", "grown", grown)
+    assert cache.stats()["budget"]["bytes"] == 10 and cache.stats()["budget"]["evictions"] == 3
+
+    cache.pop("lru", "a")
+    cache.clear("budget")
+    stats = cache.stats()
+    assert stats["lru"]["entries"] == 1 and stats["budget"]["bytes"] == 0
+    print("SUCCESS: Cache evicts by LRU, TTL and byte budget and reports its counters.")
+
+if __name__ == "__main__":
+    test_bounded_cache()
@@ -0,0 +1,69 @@
+# test_compiled_forest.py
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+import model_store
+import prediction_model
+from compiled_forest import CompiledForests
+
+def training_frame(n, seed):
+    rng = np.random.default_rng(seed)
+    hg, ag = rng.poisson(1.5, n), rng.poisson(1.1, n)
+    return pd.DataFrame({
+        "league_id": 113, "home_rank": rng.integers(1, 17, n), "away_rank": rng.integers(1, 17, n),
+        "home_motivation": rng.uniform(1, 2, n), "away_motivation": rng.uniform(1, 2, n),
+        "home_star_power": rng.uniform(1, 10, n), "home_defensive_wall": rng.uniform(1, 15, n),
+        "h2h_dominance": rng.integers(-3, 4, n), "home_advantage": 1,
+        "home_goals": hg, "away_goals": ag, "result": np.where(hg > ag, 1, np.where(ag > hg, 2, 0))
+    })
+
+def assert_identical(compiled, models, X):
+    out = compiled.predict_proba(X)
+    for name, clf in models.items():
+        if hasattr(clf, "feature_names_in_"):
+            X = pd.DataFrame(X, columns=clf.feature_names_in_)
+        assert np.array_equal(out[name], clf.predict_proba(X)), f"{name} differs from predict_proba"
+
+def test_compiled_forest():
+    print("--- Running Compiled Forest Test ---")
+    df = training_frame(400, 1)
+    models = prediction_model.train_model(df, n_jobs=1)
+    compiled = prediction_model.compile_market_models(models)
+    assert compiled.markets == ["outcome", "btts", "ou25", "ou15", "ou35"]
+
+    # Training rows, unseen rows, values sitting exactly on split thresholds, and a single row
+    X_train = prediction_model.FEATURE_SCHEMA.training_frame(df).to_numpy(dtype=float)
+    rng = np.random.default_rng(2)
+    X_new = X_train[rng.integers(0, len(X_train), 64)] + rng.normal(0, 0.5, (64, X_train.shape[1]))
+    splits = compiled.left != np.arange(len(compiled.left))
+    X_edge = X_train[np.arange(splits.sum()) % len(X_train)].copy()
+    X_edge[np.arange(splits.sum()), compiled.feature[splits]] = compiled.threshold[splits]
+    for X in (X_train, X_new, X_edge, X_new[:1]):
+        assert_identical(compiled, models, X)
+
+    # Missing values follow each split's learned direction
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(300, 4))
+    X[rng.random(X.shape) < 0.2] = np.nan
+    y = rng.integers(0, 3, 300)
+    nan_model = {"outcome": RandomForestClassifier(n_estimators=7, random_state=0).fit(X, y)}
+    nan_compiled = CompiledForests.from_models(nan_model)
+    assert nan_compiled.has_missing
+    assert_identical(nan_compiled, nan_model, X)
+
+    # Round trip through the model store as memory-mapped arrays
+    saved_dir = model_store.MODEL_STORE_DIR
+    model_store.MODEL_STORE_DIR = tempfile.mkdtemp()
+    try:
+        prediction_model.save_cached_model(models, 113, df)
+        model, mapped = prediction_model._load_cached_models(113)
+        assert mapped is not None and isinstance(mapped.threshold, np.memmap)
+        assert mapped.markets == compiled.markets
+        assert_identical(mapped, model, X_new)
+    finally:
+        model_store.MODEL_STORE_DIR = saved_dir
+    print("SUCCESS: Compiled forests match predict_proba bit for bit.")
+
+if __name__ == "__main__":
+    test_compiled_forest()
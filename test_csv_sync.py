@@ -0,0 +1,108 @@
+# test_csv_sync.py
+import os
+import hashlib
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+import csv_sync
+import http_transport
+
+class StubCsvServer(BaseHTTPRequestHandler):
+    """Static-file server with ETag and single byte-range support, like football-data.co.uk's."""
+    content = b""
+    supports_range = True
+    requests_seen = []
+
+    def do_GET(self):
+        body = StubCsvServer.content
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        StubCsvServer.requests_seen.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        status = 200
+        byte_range = self.headers.get("Range")
+        if byte_range and StubCsvServer.supports_range:
+            start = int(byte_range.split("=")[1].rstrip("-"))
+            if start >= len(body):
+                self.send_response(416)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = body[start:]
+            status = 206
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+HEADER = "Country,League,Season,Date,Time,Home,Away,HG,AG,Res\n"
+
+def csv_rows(n, start=0):
+    return "".join(f"Sweden,Allsvenskan,2025,01/04/2025,17:00,Team{i},Team{i + 1},1,0,H\n" for i in range(start, start + n))
+
+def consume(delta):
+    return [(i, row["Home"]) for i, row in delta.rows()]
+
+def test_csv_delta_download():
+    print("--- Running Conditional CSV Download Test ---")
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'csv_state.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    saved_session = csv_sync.SessionLocal
+    csv_sync.SessionLocal = sessionmaker(bind=engine)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubCsvServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/new/SWE.csv"
+    try:
+        # First run: full download, every row parsed
+        StubCsvServer.content = ("﻿" + HEADER + csv_rows(60)).encode("utf-8")
+        delta = csv_sync.fetch_csv_delta(113, url)
+        assert delta.mode == "full" and len(consume(delta)) == 60
+        delta.commit()
+
+        # Unchanged file: 304, nothing transferred or parsed
+        delta = csv_sync.fetch_csv_delta(113, url)
+        assert delta.mode == "unchanged" and StubCsvServer.requests_seen[-1].get("If-None-Match")
+        delta.commit()
+
+        # Rows appended: only the tail is downloaded, row indices continue where the import stopped
+        StubCsvServer.content += csv_rows(3, start=60).encode("utf-8")
+        delta = csv_sync.fetch_csv_delta(113, url)
+        assert delta.mode == "delta", delta.mode
+        assert consume(delta) == [(60, "Team60"), (61, "Team61"), (62, "Team62")]
+        assert delta.bytes_read == len(csv_rows(3, start=60))
+        # Not committed (e.g. the insert failed): the same rows come back next time
+        assert consume(csv_sync.fetch_csv_delta(113, url)) == [(60, "Team60"), (61, "Team61"), (62, "Team62")]
+        delta.commit()
+
+        # A server without range support sends the whole file; the known prefix is still skipped
+        StubCsvServer.supports_range = False
+        StubCsvServer.content += csv_rows(1, start=63).encode("utf-8")
+        delta = csv_sync.fetch_csv_delta(113, url)
+        assert delta.mode == "delta" and consume(delta) == [(63, "Team63")]
+        delta.commit()
+        StubCsvServer.supports_range = True
+
+        # An edit above the imported offset forces a full re-import
+        StubCsvServer.content = StubCsvServer.content.replace(b"Team5,", b"Team5 FC,", 1)
+        delta = csv_sync.fetch_csv_delta(113, url)
+        assert delta.mode == "full" and len(consume(delta)) == 64
+        delta.commit()
+    finally:
+        server.shutdown()
+        server.server_close()
+        csv_sync.SessionLocal = saved_session
+        http_transport.close_all()
+    print("SUCCESS: CSV downloads are skipped when unchanged and limited to appended rows otherwise.")
+
+if __name__ == "__main__":
+    test_csv_delta_download()
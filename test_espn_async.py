@@ -0,0 +1,88 @@
+# test_espn_async.py
+import sys
+import json
+import time
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import espn_api
+
+EVENT = {
+    "date": "2026-05-02T15:00Z",
+    "status": {"type": {"description": "Scheduled"}},
+    "competitions": [{"competitors": [
+        {"homeAway": "home", "team": {"displayName": "Malmo FF"}},
+        {"homeAway": "away", "team": {"displayName": "AIK"}}
+    ]}]
+}
+
+class StubScoreboard(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        code = parts.path.strip("/").split("/")[0]
+        dates = parse_qs(parts.query).get("dates", [""])[0]
+        if code == "slow.1":
+            time.sleep(1.0)
+        if code == "bad.1":
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        events = [EVENT] if code == "swe.1" and dates == "20260502" else []
+        body = json.dumps({"events": events}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def run_sweep(base):
+    leagues = dict(espn_api.LEAGUE_MAPPING, **{"slow.1": None, "bad.1": None})
+    started = time.monotonic()
+    results = espn_api.fetch_espn_fixtures(["2026-05-02"], leagues, league_timeout=0.3, base_url=base)
+    elapsed = time.monotonic() - started
+    by_code = StubScoreboard.last_results = {r.espn_code: r for r in results}
+    assert len(results) == len(leagues)
+    assert by_code["swe.1"].status == "ok" and by_code["swe.1"].fixtures[0]["name"] == "Malmo FF vs AIK"
+    assert by_code["swe.1"].fixtures[0]["league_id"] == 113
+    assert by_code["nor.1"].status == "no_events" and by_code["nor.1"].succeeded
+    assert by_code["slow.1"].status == "timeout" and not by_code["slow.1"].succeeded
+    # Server errors are failures, never "no fixtures" (the thread fallback may still be retrying at the deadline)
+    assert by_code["bad.1"].status in ("failed", "timeout") and not by_code["bad.1"].succeeded
+    # The slow league is cut at its deadline instead of holding up the sweep
+    assert elapsed < 1.0, elapsed
+    return elapsed
+
+def test_espn_async_fetch():
+    print("--- Running Async ESPN Scoreboard Test ---")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubScoreboard)
+    # Timed-out clients hang up on the slow league; that is expected, not worth a traceback
+    server.handle_error = lambda request, client_address: None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        elapsed = run_sweep(base)
+        assert StubScoreboard.last_results["bad.1"].status == "failed"
+        # Same behaviour on the thread fallback used when aiohttp is not installed
+        saved = sys.modules.get("aiohttp")
+        sys.modules["aiohttp"] = None
+        try:
+            run_sweep(base)
+        finally:
+            if saved is not None:
+                sys.modules["aiohttp"] = saved
+            else:
+                del sys.modules["aiohttp"]
+    finally:
+        server.shutdown()
+        server.server_close()
+    print(f"SUCCESS: {len(espn_api.LEAGUE_MAPPING) + 2} leagues fetched in {elapsed:.2f}s with timeouts and failures reported.")
+
+if __name__ == "__main__":
+    test_espn_async_fetch()
@@ -0,0 +1,80 @@
+# test_feature_schema.py
+import tempfile
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+import model_store
+import prediction_model
+import retrain_policy
+from prediction_model import FEATURE_SCHEMA
+from feature_schema import FeatureSchemaError
+
+def match_context(league_id, home_rank):
+    return {
+        "league_id": league_id, "home_rank": home_rank, "away_rank": 9,
+        "home_motivation": 1.5, "away_motivation": 1.1, "home_star_power": 7.25,
+        "home_def_wall": 11.0, "h2h_dominance": -2, "home_name": "Malmo FF"
+    }
+
+def training_rows(n, seed=0):
+    rng = np.random.default_rng(seed)
+    hg, ag = rng.poisson(1.5, n), rng.poisson(1.1, n)
+    return pd.DataFrame({
+        "fixture_id": np.arange(n), "result": np.where(hg > ag, 1, np.where(ag > hg, 2, 0)),
+        "league_id": 113, "home_rank": rng.integers(1, 17, n), "away_rank": rng.integers(1, 17, n),
+        "home_motivation": rng.uniform(1, 2, n), "away_motivation": rng.uniform(1, 2, n),
+        "home_star_power": rng.uniform(1, 10, n), "home_defensive_wall": rng.uniform(1, 15, n),
+        "h2h_dominance": 0, "home_advantage": 1, "home_goals": hg, "away_goals": ag
+    })
+
+def test_feature_schema():
+    print("--- Running Feature Schema Test ---")
+    # Inference rows come straight from the match context into one float32 matrix
+    X = FEATURE_SCHEMA.matrix([match_context(113, 3), match_context(999, 12)])
+    assert X.dtype == np.float32 and X.shape == (2, len(FEATURE_SCHEMA))
+    assert list(X[0]) == list(np.array([113, 3, 9, 1.5, 1.1, 7.25, 11.0, -2, 1, 2.85], dtype=np.float32))
+    assert X[1, FEATURE_SCHEMA.columns.index("league_avg_goals")] == np.float32(2.5)
+    out = np.zeros(len(FEATURE_SCHEMA), dtype=np.float32)
+    assert FEATURE_SCHEMA.row(match_context(113, 3), out) is out and np.array_equal(out, X[0])
+
+    # Training frames: schema columns only, in order, compact dtypes, derived column recomputed
+    df = training_rows(300)
+    frame = FEATURE_SCHEMA.training_frame(df)
+    assert tuple(frame.columns) == FEATURE_SCHEMA.columns
+    assert dict(frame.dtypes) == FEATURE_SCHEMA.dtypes
+    assert (frame["league_avg_goals"] == np.float32(2.85)).all()
+    assert "league_avg_goals" not in df.columns
+    try:
+        FEATURE_SCHEMA.training_frame(df.drop(columns=["home_star_power"]))
+        assert False, "missing training feature must raise"
+    except FeatureSchemaError as e:
+        assert "home_star_power" in str(e)
+
+    # A model fitted on other features is rejected instead of silently scoring shifted columns
+    model = prediction_model.train_model(df, n_jobs=1)
+    FEATURE_SCHEMA.check_model(model)
+    renamed = frame.rename(columns={"home_star_power": "star_power"})
+    reordered = frame[list(reversed(FEATURE_SCHEMA.columns))]
+    for drifted in (renamed, reordered, frame.to_numpy()[:, :-1]):
+        clf = RandomForestClassifier(n_estimators=2, max_depth=2, random_state=0).fit(drifted, df["result"])
+        try:
+            prediction_model.compile_market_models({"outcome": clf})
+            assert False, "drifted model must raise"
+        except FeatureSchemaError:
+            pass
+
+    # A stored version recorded with other feature columns cannot serve, so the league is retrained
+    saved_dir = model_store.MODEL_STORE_DIR
+    model_store.MODEL_STORE_DIR = tempfile.mkdtemp()
+    try:
+        prediction_model.save_cached_model(model, 113, df)
+        assert retrain_policy.usable_reason(model_store.current_entry(113), 113) is None
+        model_store.publish(113, model, list(reversed(FEATURE_SCHEMA.columns)), df)
+        assert "feature schema" in retrain_policy.retrain_reason(113)
+        assert prediction_model.load_cached_model(113) is None
+    finally:
+        model_store.MODEL_STORE_DIR = saved_dir
+    print("SUCCESS: Training and inference share one feature schema.")
+
+if __name__ == "__main__":
+    test_feature_schema()
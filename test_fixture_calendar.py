@@ -0,0 +1,147 @@
+# test_fixture_calendar.py
+import os
+import datetime
+import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+import espn_api
+import league_activity
+from espn_api import LeagueFetchResult
+
+def espn_fixture(code, league_id, home, away, day):
+    return {"home": home, "away": away, "espn_league": code, "league_id": league_id,
+            "date": f"{day}T15:00Z", "status": "Scheduled", "name": f"{home} vs {away}"}
+
+def test_fixture_calendar():
+    print("--- Running Fixture Calendar Test ---")
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'calendar.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    saved = (database.SessionLocal, espn_api.fetch_espn_fixtures, espn_api.fetch_sportsdb_fixtures)
+    database.SessionLocal = sessionmaker(bind=engine)
+
+    today = datetime.date.today()
+    days = [(today + datetime.timedelta(days=i)).isoformat() for i in range(8)]
+    espn_calls, sportsdb_calls = [], []
+    swe_ok = [True]
+
+    def fake_espn(dates, leagues=None, **kwargs):
+        espn_calls.append(dates)
+        first, last = dates[0]
+        swe = LeagueFetchResult("swe.1", 113, first, "ok", [
+            espn_fixture("swe.1", 113, "Malmo FF", "AIK", days[0]),
+            espn_fixture("swe.1", 113, "Hammarby", "Djurgarden", days[3]),
+        ])
+        if not swe_ok[0]:
+            swe = LeagueFetchResult("swe.1", 113, first, "timeout", error="slow")
+        return [r for r in (swe, LeagueFetchResult("nor.1", 103, first, "no_events")) if r.espn_code in leagues]
+
+    def fake_sportsdb(date_str):
+        sportsdb_calls.append(date_str)
+        if date_str != days[0]:
+            return []
+        return [
+            {"home": "AIK", "away": "Malmo FF", "espn_league": "sportsdb", "league_id": 113,
+             "date": date_str, "status": "Scheduled", "name": "AIK vs Malmo FF"},
+            {"home": "Arsenal", "away": "Chelsea", "espn_league": "sportsdb", "league_id": 39,
+             "date": date_str, "status": "Scheduled", "name": "Arsenal vs Chelsea"},
+        ]
+
+    espn_api.fetch_espn_fixtures = fake_espn
+    espn_api.fetch_sportsdb_fixtures = fake_sportsdb
+    try:
+        # First run: one ESPN range sweep covers all 8 days, TheSportsDB is fetched per day
+        refreshed = espn_api.refresh_fixture_calendar()
+        assert espn_calls == [[(days[0], days[-1])]], espn_calls
+        assert sportsdb_calls == days and refreshed["espn"] == days
+        assert [f["name"] for f in espn_api.get_calendar_fixtures(days[3], "espn")] == ["Hammarby vs Djurgarden"]
+
+        # Second run on the same day: everything is fresh, no network at all
+        assert espn_api.refresh_fixture_calendar() == {"espn": [], "sportsdb": []}
+        assert len(espn_calls) == 1 and len(sportsdb_calls) == 8
+
+        # Today goes stale first; a failed league keeps the fixtures stored earlier
+        db = database.SessionLocal()
+        row = db.query(database.FixtureCalendarDate).filter_by(source="espn", fixture_date=days[0]).one()
+        row.fetched_at -= datetime.timedelta(hours=espn_api.TODAY_MAX_AGE_HOURS + 1)
+        db.commit()
+        db.close()
+        swe_ok[0] = False
+        refreshed = espn_api.refresh_fixture_calendar()
+        assert refreshed == {"espn": [days[0]], "sportsdb": []}
+        assert espn_calls[-1] == [(days[0], days[0])]
+        assert [f["name"] for f in espn_api.get_calendar_fixtures(days[0], "espn")] == ["Malmo FF vs AIK"]
+        # Today is fresh again; the failed league waits for its back-off instead of refetching every league
+        assert espn_api.refresh_fixture_calendar() == {"espn": [], "sportsdb": []} and len(espn_calls) == 2
+
+        # Combined view for today merges both sources and drops the reversed duplicate
+        combined = espn_api.fetch_combined_today_fixtures()
+        assert [f["name"] for f in combined] == ["Malmo FF vs AIK", "Arsenal vs Chelsea"], combined
+    finally:
+        database.SessionLocal, espn_api.fetch_espn_fixtures, espn_api.fetch_sportsdb_fixtures = saved
+    print("SUCCESS: Fixture calendar refreshes only stale dates and serves stored fixtures.")
+
+def test_failed_league_retried():
+    print("--- Running Fixture Calendar Retry Test ---")
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'retry.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    saved = (database.SessionLocal, espn_api.fetch_espn_fixtures, espn_api.fetch_sportsdb_fixtures)
+    database.SessionLocal = sessionmaker(bind=engine)
+
+    today = datetime.date.today()
+    days = [(today + datetime.timedelta(days=i)).isoformat() for i in range(8)]
+    espn_calls = []
+    swe_status = ["timeout"]
+
+    def fake_espn(dates, leagues=None, **kwargs):
+        espn_calls.append((dates, sorted(leagues)))
+        first = dates[0][0]
+        results = {
+            "swe.1": LeagueFetchResult("swe.1", 113, first, "timeout", error="slow") if swe_status[0] != "ok" else
+                     LeagueFetchResult("swe.1", 113, first, "ok", [espn_fixture("swe.1", 113, "Malmo FF", "AIK", days[2])]),
+            "nor.1": LeagueFetchResult("nor.1", 103, first, "ok", [espn_fixture("nor.1", 103, "Molde", "Brann", days[1])]),
+        }
+        return [r for code, r in results.items() if code in leagues]
+
+    def expire_back_off():
+        db = database.SessionLocal()
+        row = db.query(database.LeagueActivity).filter_by(espn_league="swe.1").one()
+        delay = row.next_poll_at - row.last_polled_at
+        # Shift the poll into the past, keeping the back-off it was given
+        row.next_poll_at = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+        row.last_polled_at = row.next_poll_at - delay
+        db.commit()
+        db.close()
+        return delay
+
+    espn_api.fetch_espn_fixtures = fake_espn
+    espn_api.fetch_sportsdb_fixtures = lambda date_str: []
+    try:
+        # The first sweep stores Norway and marks the span fresh although Sweden timed out
+        assert espn_api.refresh_fixture_calendar()["espn"] == days
+        assert espn_api.get_calendar_fixtures(days[2], "espn") == []
+        assert [f["name"] for f in espn_api.get_calendar_fixtures(days[1], "espn")] == ["Molde vs Brann"]
+
+        # Within the back-off nothing is fetched
+        assert espn_api.refresh_fixture_calendar() == {"espn": [], "sportsdb": []} and len(espn_calls) == 1
+
+        # Consecutive failures double the back-off, up to the cap
+        assert expire_back_off() == datetime.timedelta(minutes=league_activity.RETRY_MIN_MINUTES)
+        espn_api.refresh_fixture_calendar()
+        assert espn_calls[-1] == ([(days[0], days[-1])], ["swe.1"]), espn_calls
+        assert expire_back_off() == datetime.timedelta(minutes=2 * league_activity.RETRY_MIN_MINUTES)
+
+        # Once it answers, Sweden alone is refetched over the whole span and its fixtures are stored
+        swe_status[0] = "ok"
+        assert espn_api.refresh_fixture_calendar() == {"espn": [], "sportsdb": []}
+        assert espn_calls[-1] == ([(days[0], days[-1])], ["swe.1"]) and len(espn_calls) == 3
+        assert [f["name"] for f in espn_api.get_calendar_fixtures(days[2], "espn")] == ["Malmo FF vs AIK"]
+        assert [f["name"] for f in espn_api.get_calendar_fixtures(days[1], "espn")] == ["Molde vs Brann"]
+        assert espn_api.refresh_fixture_calendar() == {"espn": [], "sportsdb": []} and len(espn_calls) == 3
+    finally:
+        database.SessionLocal, espn_api.fetch_espn_fixtures, espn_api.fetch_sportsdb_fixtures = saved
+    print("SUCCESS: A failed league is retried on its own after a back-off.")
+
+if __name__ == "__main__":
+    test_fixture_calendar()
+    test_failed_league_retried()
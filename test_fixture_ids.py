@@ -0,0 +1,50 @@
+# test_fixture_ids.py
+import os
+import sys
+import tempfile
+import subprocess
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+from database import FixtureRegistry
+import fixture_ids
+from fixture_ids import register_fixtures, candidate_fixture_id, fixture_key, stable_team_id
+
+def test_stable_fixture_ids():
+    print("--- Running Stable Fixture ID Test ---")
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'registry.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    fixtures = [
+        {"league_id": 113, "date": "2026-05-02T15:00Z", "home": "Malmö FF", "away": "AIK"},
+        {"league_id": 39, "date": "2026-05-02T16:30Z", "home": "Manchester United", "away": "Manchester City"}
+    ]
+    first = register_fixtures(fixtures, db)
+    db.commit()
+    # Same fixture spelled differently by another provider, on another run: same id, no new row
+    again = register_fixtures([dict(fixtures[0], home="Malmo FF"), fixtures[1]], db)
+    assert again == first and db.query(FixtureRegistry).count() == 2
+    assert all(fixture_ids.FIXTURE_ID_BASE <= i < fixture_ids.FIXTURE_ID_BASE + fixture_ids.FIXTURE_ID_SPAN for i in first)
+    assert stable_team_id("Manchester United") != stable_team_id("Manchester City")
+
+    # A new fixture whose hash id is already taken is rehashed instead of sharing it
+    clash = {"league_id": 113, "date": "2026-05-09T15:00Z", "home": "AIK", "away": "Malmö FF"}
+    taken = candidate_fixture_id(fixture_key(113, clash["date"], clash["home"], clash["away"]))
+    db.add(FixtureRegistry(fixture_id=taken, fixture_key="other", fixture_date="2026-05-09", home_team="x", away_team="y"))
+    db.commit()
+    assert register_fixtures([clash], db) != [taken]
+    db.close()
+
+    # Ids do not depend on the interpreter's per-process string hash seed
+    code = "from fixture_ids import candidate_fixture_id, stable_team_id; print(candidate_fixture_id('113|2026-05-02|malmo ff|aik'), stable_team_id('AIK'))"
+    outputs = set()
+    for seed in ("1", "2"):
+        env = dict(os.environ, PYTHONHASHSEED=seed)
+        out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        outputs.add(out.stdout.strip().splitlines()[-1])
+    assert len(outputs) == 1 and first[0] == int(outputs.pop().split()[0])
+    print("SUCCESS: Fixture ids are stable across runs and collision-checked.")
+
+if __name__ == "__main__":
+    test_stable_fixture_ids()
@@ -0,0 +1,84 @@
+# test_http_cache.py
+import os
+import json
+import tempfile
+import threading
+import football_api
+import http_cache
+import api_quota
+
+class FakeResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+    def json(self):
+        return json.loads(self.text)
+
+def age_cache(seconds):
+    """Moves every cached entry 'seconds' into the past."""
+    conn = http_cache._connect()
+    conn.execute("UPDATE http_responses SET fetched_at = fetched_at - ?, expires_at = expires_at - ?", (seconds, seconds))
+    conn.commit()
+    conn.close()
+
+def test_http_response_cache():
+    print("--- Running HTTP Response Cache Test ---")
+    calls = []
+    replies = [FakeResponse(200, {"errors": [], "response": [{"player": "A"}]})]
+
+    def fake_get(url, *args, **kwargs):
+        calls.append((url, kwargs.get("params")))
+        return replies[-1]
+
+    original, original_quota, original_path = football_api._original_get, api_quota.quota, os.environ.get("HTTP_CACHE_PATH")
+    football_api._original_get = fake_get
+    api_quota.quota = api_quota.QuotaManager(1000, 600)
+    # Keep the test cache away from the working copy
+    os.environ["HTTP_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "http_cache_test.db")
+    try:
+        url = "https://v3.football.api-sports.io/players/topscorers"
+        first = football_api.get_top_scorers(113, 2025, "key")
+        # Same params with different types hit the same entry, and restarts reuse the file
+        second = football_api.requests_get_wrapper(url, headers={}, params={"season": "2025", "league": "113"})
+        assert first == [{"player": "A"}] and second.json()["response"] == first
+        assert len(calls) == 1, calls
+
+        # Past its 12h TTL but inside the stale window: old body now, refreshed in the background
+        replies.append(FakeResponse(200, {"errors": [], "response": [{"player": "B"}]}))
+        age_cache(13 * 3600)
+        stale = football_api.get_top_scorers(113, 2025, "key")
+        assert stale == [{"player": "A"}]
+        for t in threading.enumerate():
+            if t.name.startswith("revalidate:"):
+                t.join()
+        assert len(calls) == 2
+        assert football_api.get_top_scorers(113, 2025, "key") == [{"player": "B"}]
+
+        # Expired beyond the stale window and the API fails: the stale answer is still served
+        age_cache(10 * 86400)
+        replies.append(FakeResponse(500, {"errors": {"server": "unavailable"}}))
+        assert football_api.get_top_scorers(113, 2025, "key") == [{"player": "B"}]
+        assert len(calls) == 3
+
+        # Error payloads are never stored, and non-API-Football hosts bypass the cache
+        assert football_api._is_cacheable(FakeResponse(200, {"errors": {"token": "bad"}})) is False
+        assert http_cache.ttl_for("https://site.api.espn.com/apis/site/v2/sports/soccer/swe.1/scoreboard") is None
+        assert http_cache.ttl_for("https://v3.football.api-sports.io/coachs") == 7 * 24 * 3600
+
+        # Writes purge entries past PURGE_MAX_AGE_SECONDS, at most once per PURGE_INTERVAL_SECONDS
+        age_cache(5 * 86400)
+        http_cache._last_purge = 0.0
+        http_cache.store("https://v3.football.api-sports.io/leagues", None, 200, "{}", 3600)
+        assert http_cache.lookup(url, {"league": 113, "season": 2025})[0] is None
+        assert http_cache.lookup("https://v3.football.api-sports.io/leagues")[0] is not None
+    finally:
+        football_api._original_get = original
+        api_quota.quota = original_quota
+        if original_path is None:
+            os.environ.pop("HTTP_CACHE_PATH", None)
+        else:
+            os.environ["HTTP_CACHE_PATH"] = original_path
+    print("SUCCESS: API-Football responses are cached on disk and served stale while revalidating.")
+
+if __name__ == "__main__":
+    test_http_response_cache()
@@ -0,0 +1,48 @@
+# test_http_transport.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import http_transport
+
+class ScoreboardHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive
+    client_ports = set()
+    requests_seen = 0
+
+    def do_GET(self):
+        ScoreboardHandler.client_ports.add(self.client_address[1])
+        ScoreboardHandler.requests_seen += 1
+        body = b'{"events": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def test_pooled_sessions():
+    print("--- Running Pooled HTTP Transport Test ---")
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ScoreboardHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        assert http_transport.session_for(base + "/a") is http_transport.session_for(base + "/b")
+        assert http_transport.session_for(base + "/a") is not http_transport.session_for("https://site.api.espn.com/x")
+
+        # A 45-league sweep over 5 workers reuses at most one connection per worker
+        urls = [f"{base}/apis/site/v2/sports/soccer/league{i}/scoreboard" for i in range(45)]
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            statuses = list(executor.map(lambda u: http_transport.get(u).status_code, urls))
+        assert statuses == [200] * 45
+        assert ScoreboardHandler.requests_seen == 45
+        assert len(ScoreboardHandler.client_ports) <= 5, ScoreboardHandler.client_ports
+    finally:
+        server.shutdown()
+        server.server_close()
+        http_transport.close_all()
+    print(f"SUCCESS: 45 requests served over {len(ScoreboardHandler.client_ports)} keep-alive connections.")
+
+if __name__ == "__main__":
+    test_pooled_sessions()
@@ -0,0 +1,96 @@
+# test_incremental_training.py
+import os
+import tempfile
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+import model_store
+import prediction_model
+import training_cache
+from test_model_training import synthetic_rows
+
+def same_trees(a, b):
+    return len(a) == len(b) and all(np.array_equal(x.tree_.threshold, y.tree_.threshold) for x, y in zip(a, b))
+
+def test_incremental_training():
+    print("--- Running Incremental Forest Growth Test ---")
+    workdir = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'grow.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    saved = (prediction_model.SessionLocal, prediction_model.MODEL_UPDATE_WINDOW_ROWS,
+             prediction_model.MODEL_UPDATE_MAX_TREES, model_store.MODEL_STORE_DIR, training_cache.TRAINING_CACHE_DIR)
+    prediction_model.SessionLocal = sessionmaker(bind=engine)
+    prediction_model.MODEL_UPDATE_WINDOW_ROWS = 100
+    prediction_model.MODEL_UPDATE_MAX_TREES = 50
+    model_store.MODEL_STORE_DIR = os.path.join(workdir, "models")
+    training_cache.TRAINING_CACHE_DIR = os.path.join(workdir, "cache")
+    try:
+        rows = synthetic_rows(7101, 900, 3)
+        prediction_model.save_training_data(rows[:300])
+        assert prediction_model.update_league_model(7101, n_jobs=1) == "trained"
+        base, entry = model_store.load(7101)
+        assert [(b["mode"], b["trees"], b["rows"]) for b in entry["tree_batches"]] == [("full", 30, 300)]
+
+        # New rows add a batch of trees fitted on the most recent window only, never reading the full history
+        prediction_model.save_training_data(rows[300:340])
+        load_training_data = prediction_model.load_training_data
+        def no_full_read(league_id=None):
+            raise AssertionError("an incremental update must not load the whole history")
+        prediction_model.load_training_data = no_full_read
+        try:
+            assert prediction_model.update_league_model(7101) == "updated"
+        finally:
+            prediction_model.load_training_data = load_training_data
+        grown, entry = model_store.load(7101)
+        batch = entry["tree_batches"][-1]
+        assert (batch["mode"], batch["trees"], batch["rows"], batch["new_rows"]) == ("incremental", 10, 100, 40)
+        # The entry describes the history the forests reflect, like a full fit on the same data would
+        history = prediction_model.load_training_data(7101)
+        assert entry["training_data_state"] == batch["training_data_state"] == 340 and entry["training_rows"] == 340
+        assert entry["training_data_version"] == model_store.training_data_key_version(history.attrs["training_data_key"])
+        recent = prediction_model.load_recent_training_data(7101, 100)
+        assert recent.equals(history.iloc[-100:].reset_index(drop=True)) and recent.attrs["training_rows"] == 340
+        for name, forest in grown.items():
+            assert forest.n_estimators == len(forest.estimators_) == 40 and not forest.warm_start
+            assert same_trees(forest.estimators_[:30], base[name].estimators_)
+            assert list(forest.classes_) == list(base[name].classes_)
+        # Compiled inference stays bit-identical to predict_proba on warm-started forests
+        frame = prediction_model.FEATURE_SCHEMA.training_frame(history)
+        compiled = prediction_model.compile_market_models(grown).predict_proba(frame.to_numpy(np.float32))
+        for name, forest in grown.items():
+            assert np.array_equal(compiled[name], forest.predict_proba(frame)), name
+
+        # Past MODEL_UPDATE_MAX_TREES the oldest incremental batch goes; the full fit stays
+        prediction_model.save_training_data(rows[340:380])
+        assert prediction_model.update_league_model(7101) == "updated"
+        previous, _ = model_store.load(7101)
+        prediction_model.save_training_data(rows[380:420])
+        assert prediction_model.update_league_model(7101) == "updated"
+        capped, entry = model_store.load(7101)
+        assert [b["new_rows"] for b in entry["tree_batches"]] == [None, 40, 40]
+        for name, forest in capped.items():
+            assert len(forest.estimators_) == 50
+            assert same_trees(forest.estimators_[:30], base[name].estimators_)
+            assert same_trees(forest.estimators_[30:40], previous[name].estimators_[40:50])
+
+        # A window missing a class cannot grow the forests
+        home_wins = recent[recent["result"] == 1]
+        assert prediction_model.grow_model(capped, entry["tree_batches"], home_wins, 1) is None
+        assert len(capped["outcome"].estimators_) == 50
+
+        # Once the rows since the full fit reach its size, the forests are refitted on the whole history
+        prediction_model.save_training_data(rows[420:700])
+        assert prediction_model.update_league_model(7101, n_jobs=1) == "trained"
+        _, entry = model_store.load(7101)
+        assert [(b["mode"], b["rows"]) for b in entry["tree_batches"]] == [("full", 700)]
+        history = prediction_model.load_training_data(7101)
+        assert entry["training_rows"] == 700
+        assert entry["training_data_version"] == model_store.training_data_key_version(history.attrs["training_data_key"])
+    finally:
+        (prediction_model.SessionLocal, prediction_model.MODEL_UPDATE_WINDOW_ROWS,
+         prediction_model.MODEL_UPDATE_MAX_TREES, model_store.MODEL_STORE_DIR, training_cache.TRAINING_CACHE_DIR) = saved
+    print("SUCCESS: Forests grow on new matches and keep their tree provenance.")
+
+if __name__ == "__main__":
+    test_incremental_training()
@@ -0,0 +1,71 @@
+# test_league_activity.py
+import os
+import datetime
+import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+from database import LeagueActivity
+from league_activity import leagues_due, leagues_to_retry, record_poll, FULL_SWEEP_DAYS, DORMANT_MAX_DAYS, RETRY_MIN_MINUTES, RETRY_MAX_HOURS
+
+def day(now, offset):
+    return (now.date() + datetime.timedelta(days=offset)).isoformat()
+
+def test_league_activity():
+    print("--- Running Adaptive League Polling Test ---")
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'activity.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    now = datetime.datetime(2026, 5, 1, 6, 0)
+    leagues = {"swe.1": 113, "fifa.world": 1, "nor.1": 103}
+
+    # No history yet: everything is polled and the full sweep clock starts
+    assert leagues_due(db, leagues, now) == leagues
+    db.commit()
+
+    # Allsvenskan has fixtures coming up, the World Cup has been silent for two months
+    record_poll(db, "swe.1", 113, "ok", [day(now, 2), day(now, 2), day(now, 5)], now)
+    world = record_poll(db, "fifa.world", 1, "no_events", [], now)
+    world.first_polled_at = now - datetime.timedelta(days=60)
+    record_poll(db, "fifa.world", 1, "no_events", [], now)
+    # A failed request says nothing about the calendar and is retried after a back-off
+    record_poll(db, "nor.1", 103, "timeout", [], now)
+    db.commit()
+
+    swe = db.query(LeagueActivity).filter_by(espn_league="swe.1").one()
+    assert swe.season_start == day(now, 2) and swe.last_event_date == day(now, 5) and swe.cadence_days == 3
+    assert world.next_poll_at == now + datetime.timedelta(days=DORMANT_MAX_DAYS)
+
+    # Consecutive failures double the back-off up to the cap; only failed leagues are retried
+    nor = db.query(LeagueActivity).filter_by(espn_league="nor.1").one()
+    retry_at = now + datetime.timedelta(minutes=RETRY_MIN_MINUTES)
+    assert nor.next_poll_at == retry_at and leagues_to_retry(db, leagues, now) == {}
+    assert leagues_to_retry(db, leagues, retry_at) == {"nor.1": 103}
+    record_poll(db, "nor.1", 103, "failed", [], retry_at)
+    assert nor.next_poll_at == retry_at + datetime.timedelta(minutes=2 * RETRY_MIN_MINUTES)
+    for _ in range(12):
+        record_poll(db, "nor.1", 103, "timeout", [], nor.next_poll_at)
+    assert nor.next_poll_at - nor.last_polled_at == datetime.timedelta(hours=RETRY_MAX_HOURS)
+    nor.next_poll_at = nor.last_polled_at = now
+    db.commit()
+
+    tomorrow = now + datetime.timedelta(days=1)
+    assert leagues_due(db, leagues, tomorrow) == {"swe.1": 113, "nor.1": 103}
+    # The periodic full sweep still reaches dormant leagues
+    assert leagues_due(db, leagues, now + datetime.timedelta(days=FULL_SWEEP_DAYS)) == leagues
+    db.commit()
+
+    # A long break starts a new season; near its anniversary the league is watched daily again
+    record_poll(db, "swe.1", 113, "ok", [day(now, 200)], now)
+    assert swe.season_start == day(now, 200) and swe.cadence_days == 3
+    later = now + datetime.timedelta(days=200 + 150)
+    record_poll(db, "swe.1", 113, "no_events", [], later)
+    assert swe.next_poll_at == later + datetime.timedelta(days=DORMANT_MAX_DAYS)
+    anniversary = now + datetime.timedelta(days=200 + 360)
+    record_poll(db, "swe.1", 113, "no_events", [], anniversary)
+    assert swe.next_poll_at == anniversary + datetime.timedelta(days=1)
+    db.close()
+    print("SUCCESS: Leagues are polled by their learned calendars with a periodic full sweep.")
+
+if __name__ == "__main__":
+    test_league_activity()
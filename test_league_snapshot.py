@@ -0,0 +1,105 @@
+# test_league_snapshot.py
+import os
+import datetime
+import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+import league_snapshot
+import prediction_model
+import team_names
+from league_snapshot import LeagueSnapshot
+
+def make_rows():
+    d = datetime.datetime
+    return [
+        # (season, match_date, home_team, away_team, home_goals, away_goals)
+        ("2025", d(2025, 4, 1), "Malmo", "AIK", 2, 0),
+        ("2025", d(2025, 4, 8), "AIK", "Hammarby", 1, 1),
+        ("2025", d(2025, 4, 15), "Hammarby", "Malmo", 0, 3),
+        ("2025", d(2025, 4, 22), "AIK", "Malmo", 2, 1),
+        ("2024", d(2024, 9, 1), "Malmo", "Hammarby", 1, 2),
+    ]
+
+def test_league_snapshot_queries():
+    print("--- Running League Snapshot Test ---")
+    snap = LeagueSnapshot(113, make_rows())
+    assert len(snap) == 5
+
+    # Malmo: last 5 -> L (AIK 2-1), W (3-0 away), W (2-0), L (1-2 in 2024) = 40 / 100
+    assert snap.form("Malmo") == 40, snap.form("Malmo")
+    assert snap.form("Unknown FC") == 50
+
+    # Last 10 Malmo vs AIK meetings: one win each -> neutral
+    assert snap.h2h("Malmo", "AIK") == 0
+    assert snap.h2h("Hammarby", "Malmo") == 0
+    assert snap.h2h("Malmo", "Hammarby", last_n=1) == 3
+
+    # 2025 table: Malmo 6pts (+3), AIK 4pts (-1), Hammarby 1pt (-3)
+    ranks = snap.standings("2025")
+    assert ranks == {"Malmo": 1, "AIK": 2, "Hammarby": 3}, ranks
+    assert snap.standings(2025) == ranks
+    assert snap.standings("1999") == {}
+
+    star, wall = snap.team_stats("Malmo", "2025")
+    assert star == min(10.0, max(1.0, (6 / 3) * 4.0))
+    assert wall == min(15.0, max(1.0, 15.0 - ((2 / 3) * 5.0)))
+    # Falls back to the previous season when the team has no games yet
+    assert snap.team_stats("Malmo", "2026") == snap.team_stats("Malmo", "2025")
+    assert snap.team_stats("Unknown FC", "2025") == (5.0, 5.0)
+
+    print("SUCCESS: League snapshot answers form, H2H, standings and team stats from arrays.")
+
+def test_team_name_resolver():
+    print("--- Running Team Name Resolver Test ---")
+    snap = LeagueSnapshot(39, [
+        ("2025", datetime.datetime(2025, 8, 16), "Man United", "Tottenham", 1, 0),
+        ("2025", datetime.datetime(2025, 8, 17), "Brighton", "Arsenal", 2, 2),
+    ])
+    resolver = snap.resolver
+    assert resolver is snap.resolver, "Resolver should be built once per snapshot"
+    assert resolver.resolve("brighton ") == "Brighton"
+    assert resolver.resolve("Arsenal FC") == "Arsenal"
+    assert resolver.resolve("Tottenham Hotspur") == "Tottenham"
+    assert resolver.resolve("Manchester United") == "Man United"
+    assert resolver.resolve("Real Madrid") is None
+    assert resolver.match("Brighton & Hove Albion") == ("Brighton", "substring")
+    print("SUCCESS: Team names resolved through exact, standardized, substring and synonym maps.")
+
+def test_team_aliases():
+    print("--- Running Team Alias Persistence Test ---")
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'aliases.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)
+    modules = (prediction_model, league_snapshot, team_names)
+    saved = [m.SessionLocal for m in modules]
+    for m in modules:
+        m.SessionLocal = session
+    try:
+        prediction_model.save_played_matches([
+            {"fixture_id": 390001, "league_id": 39, "season": "2025", "match_date": datetime.datetime(2025, 8, 16),
+             "home_team": "Man United", "away_team": "Tottenham", "home_goals": 1, "away_goals": 0},
+            {"fixture_id": 390002, "league_id": 39, "season": "2025", "match_date": datetime.datetime(2025, 8, 17),
+             "home_team": "Brighton", "away_team": "Arsenal", "home_goals": 2, "away_goals": 2},
+        ])
+        # Deterministic matches are persisted; substring guesses are not
+        assert prediction_model.find_db_team_name("Arsenal FC", 39) == "Arsenal"
+        assert prediction_model.find_db_team_name("Brighton & Hove Albion", 39) == "Brighton"
+        db = session()
+        assert [(a.source_name, a.db_name) for a in db.query(database.TeamAlias).all()] == [("Arsenal FC", "Arsenal")]
+        db.close()
+
+        # An alias stored for a name that is itself a team never shadows that team
+        team_names.save_team_alias("Tottenham", 39, "Man United")
+        assert prediction_model.find_db_team_name("Tottenham", 39) == "Tottenham"
+    finally:
+        for m, s in zip(modules, saved):
+            m.SessionLocal = s
+        league_snapshot.invalidate_league_snapshot(39)
+        team_names._alias_cache.pop("league", 39)
+    print("SUCCESS: Only deterministic team name matches are remembered.")
+
+if __name__ == "__main__":
+    test_league_snapshot_queries()
+    test_team_name_resolver()
+    test_team_aliases()
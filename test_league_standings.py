@@ -0,0 +1,92 @@
+# test_league_standings.py
+import os
+import datetime
+import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+import league_snapshot
+import league_standings
+import prediction_model
+from database import LeagueStanding, Prediction
+from league_snapshot import LeagueSnapshot
+from league_standings import get_league_standings, rebuild_league_standings
+
+def result(fixture_id, home, away, hg, ag, season="2025"):
+    return {"fixture_id": fixture_id, "league_id": 880, "season": season,
+            "match_date": datetime.datetime(2025, 4, 1) + datetime.timedelta(days=fixture_id),
+            "home_team": home, "away_team": away, "home_goals": hg, "away_goals": ag}
+
+def table(db, season="2025"):
+    """Stored rows as (team, points, goal difference, matches played), in get_league_standings order."""
+    rows = db.query(LeagueStanding).filter(LeagueStanding.league_id == 880, LeagueStanding.season == season).order_by(
+        LeagueStanding.points.desc(),
+        (LeagueStanding.goals_scored - LeagueStanding.goals_conceded).desc(),
+        LeagueStanding.goals_scored.desc(),
+        LeagueStanding.first_seen
+    ).all()
+    return [(r.team, r.points, r.goals_scored - r.goals_conceded, r.matches_played) for r in rows]
+
+def test_league_standings():
+    print("--- Running Materialized Standings Test ---")
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'standings.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)
+    modules = (prediction_model, league_standings, league_snapshot)
+    saved = [m.SessionLocal for m in modules] + [database.init_db, os.environ.get("CRON_TOKEN")]
+    for m in modules:
+        m.SessionLocal = session
+    database.init_db = lambda: None # Importing app must not touch the real database
+    os.environ["CRON_TOKEN"] = "test-token"
+    try:
+        import app
+        saved.append(app.recalculate_stats)
+        app.recalculate_stats = lambda db: None # Would rewrite bot_stats.json
+
+        prediction_model.save_played_matches([
+            result(1, "Malmo", "AIK", 2, 0),
+            result(2, "Hammarby", "Djurgarden", 1, 1),
+            result(3, "AIK", "Hammarby", 3, 1),
+            result(4, "Djurgarden", "Malmo", 1, 3),
+            result(5, "Elfsborg", "Varnamo", 1, 0),
+            result(6, "Varnamo", "Elfsborg", 1, 0),
+            result(7, "Malmo", "Varnamo", 0, 4, season="2024"),
+        ])
+        db = session()
+        # Hammarby and Djurgarden are level on points, goal difference and goals: first appearance decides
+        assert table(db)[-2:] == [("Hammarby", 1, -2, 2), ("Djurgarden", 1, -2, 2)], table(db)
+
+        # A manual correction swaps the old score out (sign=-1) and applies the new one
+        db.add(Prediction(fixture_id=5, home_team="Elfsborg", away_team="Varnamo", prediction_main="Elfsborg Win"))
+        db.commit()
+        response = app.decide_outcome(fixture_id=5, home_goals=1, away_goals=2, status_override="", token="test-token", db=db)
+        assert response == {"status": "success", "prediction_status": "lost"}
+        db.expire_all()
+        corrected = table(db)
+        assert ("Varnamo", 6, 2, 2) in corrected and ("Elfsborg", 0, -2, 2) in corrected, corrected
+        ranks = get_league_standings(880, 2025)
+        assert ranks["Varnamo"] == 2 and ranks["Elfsborg"] == 6
+
+        # The incrementally maintained table equals a rebuild from played_matches and the snapshot's table
+        rebuild_league_standings(db, 880)
+        db.commit()
+        assert table(db) == corrected and table(db, "2024") == [("Varnamo", 3, 4, 1), ("Malmo", 0, -4, 1)]
+        assert get_league_standings(880, 2025) == ranks
+        assert LeagueSnapshot.load(880).standings("2025") == ranks
+        assert list(ranks) == [team for team, *_ in corrected]
+        db.close()
+    finally:
+        for m, s in zip(modules, saved):
+            m.SessionLocal = s
+        database.init_db = saved[3]
+        if saved[4] is None:
+            os.environ.pop("CRON_TOKEN", None)
+        else:
+            os.environ["CRON_TOKEN"] = saved[4]
+        if len(saved) > 5:
+            app.recalculate_stats = saved[5]
+        league_snapshot.invalidate_league_snapshot(880)
+    print("SUCCESS: Corrected results keep the standings table equal to a full rebuild.")
+
+if __name__ == "__main__":
+    test_league_standings()
@@ -43,7 +43,7 @@ import football_api
 football_api.get_team_standings = mock_get_team_standings
 prediction_model.get_team_standings = mock_get_team_standings
 
-from prediction_model import train_model, get_match_prediction
+from prediction_model import train_model, get_match_prediction, predict_batch
 
 def test_ml_mock_pipeline():
     print("--- Running Mock ML Predictor Logic Test (With API Mocks) ---")
@@ -140,6 +140,11 @@ def test_ml_mock_pipeline():
     assert "combos" in pred, "combos field missing in prediction"
     assert "league_avg_goals" in pred, "league_avg_goals field missing in prediction"
     
+    # Batched inference must return the same shape and values as the single-fixture path
+    batch = predict_batch([mock_fixture, mock_fixture], api_key="mock_key", model=models_dict)
+    assert len(batch) == 2, "predict_batch must return one prediction per fixture"
+    assert batch[0] == pred and batch[1] == pred, "predict_batch output differs from get_match_prediction"
+    
     print("\nSUCCESS: All prediction fields present and correctly formatted!")
     print("Test passed successfully.")
 
@@ -0,0 +1,50 @@
+# test_model_store.py
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.ensemble import RandomForestClassifier
+import model_store
+
+def small_model(seed):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(120, 3))
+    y = (X[:, 0] + rng.normal(size=120) > 0).astype(int)
+    clf = RandomForestClassifier(n_estimators=5, max_depth=3, random_state=seed).fit(X, y)
+    return {"outcome": clf, "btts": clf}, X, pd.DataFrame(X, columns=["a", "b", "c"])
+
+def test_model_store():
+    print("--- Running Model Store Test ---")
+    saved_dir, saved_keep = model_store.MODEL_STORE_DIR, model_store.MODEL_STORE_KEEP_VERSIONS
+    model_store.MODEL_STORE_DIR = tempfile.mkdtemp()
+    model_store.MODEL_STORE_KEEP_VERSIONS = 2
+    try:
+        assert model_store.load(7) == (None, None) and model_store.current_entry(7) is None
+
+        model, X, df = small_model(1)
+        v1 = model_store.publish(7, model, ["a", "b", "c"], df, metadata={"training_data_state": 120})
+        loaded, entry = model_store.load(7)
+        assert entry["version"] == v1 and entry["training_rows"] == 120 and entry["feature_columns"] == ["a", "b", "c"]
+        assert entry["training_data_state"] == 120 and entry["sklearn"] == sklearn.__version__
+        assert entry["training_data_version"] == model_store.training_data_version(df)
+        assert np.array_equal(loaded["outcome"].predict_proba(X), model["outcome"].predict_proba(X))
+        assert model_store.entry_age_hours(entry) < 1
+
+        # New versions become current; only the newest MODEL_STORE_KEEP_VERSIONS stay on disk
+        v2 = model_store.publish(7, small_model(2)[0], ["a", "b", "c"], small_model(2)[2])
+        v3 = model_store.publish(7, small_model(3)[0], ["a", "b", "c"], small_model(3)[2],
+                                 arrays={"weights": np.arange(6, dtype=np.float32).reshape(2, 3)})
+        weights = model_store.load_arrays(7, model_store.current_entry(7))["weights"]
+        assert isinstance(weights, np.memmap) and not weights.flags.writeable and weights[1, 2] == 5.0
+        manifest = model_store.read_manifest(7)
+        assert manifest["current"] == v3 and [e["version"] for e in manifest["versions"]] == [v3, v2]
+        league_dir = os.path.join(model_store.MODEL_STORE_DIR, "7")
+        assert sorted(d for d in os.listdir(league_dir) if not d.startswith(".") and d != "manifest.json") == sorted([v2, v3])
+        assert model_store.load(7, version=v1) == (None, None) and model_store.load(7, version=v2)[1]["version"] == v2
+    finally:
+        model_store.MODEL_STORE_DIR, model_store.MODEL_STORE_KEEP_VERSIONS = saved_dir, saved_keep
+    print("SUCCESS: Model versions are published atomically and tracked in the manifest.")
+
+if __name__ == "__main__":
+    test_model_store()
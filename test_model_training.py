@@ -0,0 +1,64 @@
+# test_model_training.py
+import os
+import glob
+import tempfile
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+import prediction_model
+import model_store
+from model_training import train_stale_models, stale_leagues
+
+def synthetic_rows(league_id, n, seed):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n):
+        hg, ag = int(rng.poisson(1.5)), int(rng.poisson(1.1))
+        rows.append({
+            "fixture_id": league_id * 10000 + i, "league_id": league_id,
+            "home_rank": int(rng.integers(1, 17)), "away_rank": int(rng.integers(1, 17)),
+            "home_motivation": float(rng.uniform(1, 2)), "away_motivation": float(rng.uniform(1, 2)),
+            "home_star_power": float(rng.uniform(1, 10)), "home_defensive_wall": float(rng.uniform(1, 15)),
+            "h2h_dominance": 0, "home_advantage": 1, "home_goals": hg, "away_goals": ag,
+            "result": 1 if hg > ag else (2 if ag > hg else 0)
+        })
+    return rows
+
+def test_parallel_training():
+    print("--- Running Parallel League Training Test ---")
+    workdir = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'training.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    saved_session, saved_cwd = prediction_model.SessionLocal, os.getcwd()
+    prediction_model.SessionLocal = sessionmaker(bind=engine)
+    os.chdir(workdir)
+    try:
+        for league_id, seed in ((9001, 1), (9002, 2)):
+            prediction_model.save_training_data(synthetic_rows(league_id, 200, seed))
+        prediction_model._loaded_models_cache.set("league", 9001, {"stale": True})
+
+        # 9003 has no rows and no CSV mapping: reported, not fatal
+        results = train_stale_models([9001, 9002, 9003, 9001], max_workers=2)
+        assert results == {9001: "trained", 9002: "trained", 9003: "no_data"}, results
+        assert model_store.current_entry(9001)["training_rows"] == 200 and model_store.current_entry(9002)
+        assert not glob.glob(os.path.join(model_store.MODEL_STORE_DIR, "*", ".publish-*"))
+        # The superseded in-memory copy is dropped so the published model gets loaded
+        assert prediction_model._loaded_models_cache.get("league", 9001) is None
+        assert stale_leagues([9001, 9002, 9003]) == [9003]
+        assert train_stale_models([9001, 9002]) == {}
+
+        # Models fitted in the pool match a serial in-process fit
+        published = prediction_model.load_cached_model(9001)
+        serial = prediction_model.train_model(prediction_model.load_training_data(9001), n_jobs=1)
+        X = prediction_model.load_training_data(9001).drop(columns=["result", "home_goals", "away_goals"])
+        X["league_avg_goals"] = 2.5
+        for market in ("outcome", "btts", "ou15", "ou25", "ou35"):
+            assert np.array_equal(published[market].predict_proba(X), serial[market].predict_proba(X)), market
+    finally:
+        os.chdir(saved_cwd)
+        prediction_model.SessionLocal = saved_session
+    print("SUCCESS: Stale leagues trained concurrently and published atomically.")
+
+if __name__ == "__main__":
+    test_parallel_training()
@@ -0,0 +1,44 @@
+# test_prematch_standings.py
+from prediction_model import reconstruct_prematch_standings
+
+def test_prematch_standings():
+    print("--- Running Pre-Match Standings Reconstruction Test ---")
+    seasons = ["2024", "2024", "2024", "2025", "2025"]
+    home = ["A", "C", "B", "A", "B"]
+    away = ["B", "D", "C", "C", "A"]
+    home_goals = [2, 0, 1, 0, 3]
+    away_goals = [0, 0, 1, 1, 3]
+
+    table = reconstruct_prematch_standings(seasons, home, away, home_goals, away_goals)
+
+    # Opening match: nothing played yet, ties keep first-appearance order
+    assert table["home_rank"][0] == 1 and table["away_rank"][0] == 2
+    assert table["total_teams"][0] == 2
+    # Second match: A has 3 pts, C/D just joined on zero and sit above B (0 pts, -2)
+    assert table["home_rank"][1] == 2 and table["away_rank"][1] == 3
+    assert table["total_teams"][1] == 4
+    # Third match: B (0 pts, -2) sits below C (1 pt) and D (1 pt)
+    assert table["home_rank"][2] == 4, table["home_rank"][2]
+    assert table["away_rank"][2] == 2
+    assert table["home_points"][2] == 0 and table["home_goals_conceded"][2] == 2
+    assert table["away_points"][2] == 1 and table["away_matches_played"][2] == 1
+    # New season resets the table
+    assert table["home_points"][3] == 0 and table["home_matches_played"][3] == 0
+    assert table["total_teams"][3] == 2
+    # C won 1-0 away at A, so newcomer B (0 pts, 0 GD) sits between C and A
+    assert table["home_rank"][4] == 2 and table["away_rank"][4] == 3
+    assert table["away_goals_conceded"][4] == 1
+
+    # Replaying in chunks with a carried table gives the same result as one pass
+    carry = {}
+    for start, end in ((0, 2), (2, 4), (4, 5)):
+        part = reconstruct_prematch_standings(seasons[start:end], home[start:end], away[start:end],
+                                              home_goals[start:end], away_goals[start:end], carry=carry)
+        for key, values in part.items():
+            assert list(values) == list(table[key][start:end]), (key, start)
+    assert carry["2024"]["teams"] == ["A", "B", "C", "D"] and list(carry["2024"]["points"]) == [3, 1, 2, 1]
+
+    print("SUCCESS: Pre-match ranks and totals reconstructed correctly.")
+
+if __name__ == "__main__":
+    test_prematch_standings()
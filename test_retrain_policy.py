@@ -0,0 +1,78 @@
+# test_retrain_policy.py
+import os
+import json
+import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+import model_store
+import model_training
+import prediction_model
+import retrain_policy
+from test_model_training import synthetic_rows
+
+def test_retrain_policy():
+    print("--- Running Retrain Policy Test ---")
+    workdir = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'policy.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    saved = (prediction_model.SessionLocal, os.getcwd(), retrain_policy.RETRAIN_MIN_NEW_ROWS,
+             model_training.RETRAIN_CHECK_SECONDS, model_store.MODEL_STORE_DIR)
+    prediction_model.SessionLocal = sessionmaker(bind=engine)
+    os.chdir(workdir)
+    model_store.MODEL_STORE_DIR = os.path.join(workdir, "models")
+    retrain_policy.RETRAIN_MIN_NEW_ROWS = 10
+    model_training.RETRAIN_CHECK_SECONDS = 0
+    try:
+        rows = synthetic_rows(7001, 120, 1)
+        prediction_model.save_training_data(rows[:100])
+        assert retrain_policy.retrain_reason(7001) == "no stored model"
+        assert model_training.stale_leagues([7001]) == [7001]
+        assert model_training.train_stale_models([7001]) == {7001: "trained"}
+        entry = model_store.current_entry(7001)
+        assert entry["training_data_state"] == 100 and entry["training_rows"] == 100
+
+        # Age alone never retrains; a few new rows do not either
+        manifest = model_store.read_manifest(7001)
+        manifest["versions"][0]["trained_at"] = "2020-01-01T00:00:00"
+        with open(os.path.join(model_store.MODEL_STORE_DIR, "7001", "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+        prediction_model.save_training_data(rows[100:105])
+        assert retrain_policy.retrain_reason(7001) is None and model_training.train_stale_models([7001]) == {}
+
+        # Inserted and corrected rows both count towards the threshold
+        prediction_model.save_training_data(rows[105:108])
+        prediction_model.save_training_data([dict(r, home_rank=1) for r in rows[:2]])
+        assert "10 training rows written" in retrain_policy.retrain_reason(7001)
+
+        # Serving keeps the loaded model while the league retrains in the background
+        served = prediction_model.load_cached_model(7001)
+        prediction_model._loaded_models_cache.set("league", 7001, served)
+        assert prediction_model._resolve_league_model(7001) is served
+        thread = model_training._background_threads[7001]
+        thread.join(timeout=120)
+        assert not thread.is_alive()
+        entry = model_store.current_entry(7001)
+        assert entry["version"] != manifest["current"] and entry["training_data_state"] == 110
+        assert entry["training_rows"] == 108 and retrain_policy.retrain_reason(7001) is None
+        assert [b["mode"] for b in entry["tree_batches"]] == ["full", "incremental"]
+        assert prediction_model._loaded_models_cache.get("league", 7001) is None
+        assert model_training.retrain_in_background(7001) is None
+
+        # A model from another scikit-learn cannot serve: it is not loaded and gets retrained
+        manifest = model_store.read_manifest(7001)
+        manifest["versions"][0]["sklearn"] = "0.0"
+        with open(os.path.join(model_store.MODEL_STORE_DIR, "7001", "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+        assert "scikit-learn 0.0" in retrain_policy.retrain_reason(7001)
+        assert prediction_model.load_cached_model(7001) is None
+    finally:
+        (prediction_model.SessionLocal, saved_cwd, retrain_policy.RETRAIN_MIN_NEW_ROWS,
+         model_training.RETRAIN_CHECK_SECONDS, model_store.MODEL_STORE_DIR) = saved
+        os.chdir(saved_cwd)
+        prediction_model._loaded_models_cache.pop("league", 7001)
+        prediction_model._loaded_models_cache.pop("compiled", 7001)
+    print("SUCCESS: Models retrain on new training data, in the background while serving.")
+
+if __name__ == "__main__":
+    test_retrain_policy()
@@ -0,0 +1,130 @@
+# test_scoreline_model.py
+import os
+import datetime
+import tempfile
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+import league_snapshot
+import league_standings
+import prediction_model
+import team_names
+from league_snapshot import LeagueSnapshot
+from scoreline_model import ScorelineModel
+
+TEAMS = ["Malmo", "AIK", "Hammarby", "Djurgarden", "Elfsborg", "Varnamo"]
+ATTACK = [1.6, 1.2, 1.0, 1.0, 0.8, 0.6]
+
+def played_rows(seasons=10, seed=4):
+    """Double round robins drawn from known attack strengths (defence 1, home 1.5 / away 1.1 goals)."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    day = datetime.datetime(2016, 4, 1)
+    for season in range(seasons):
+        for h, home in enumerate(TEAMS):
+            for a, away in enumerate(TEAMS):
+                if h != a:
+                    day += datetime.timedelta(days=3)
+                    rows.append((str(2016 + season), day, home, away,
+                                 int(rng.poisson(1.5 * ATTACK[h])), int(rng.poisson(1.1 * ATTACK[a]))))
+    return rows
+
+def test_scoreline_fit():
+    print("--- Running Scoreline Model Fit Test ---")
+    snap = LeagueSnapshot(113, played_rows())
+    columns = snap.nbytes
+    model = snap.scoreline_model
+    assert model is snap.scoreline_model, "The model should be fitted once per snapshot"
+    assert snap.nbytes == columns + model.nbytes
+    attack = [model.attack[snap.team_index[t]] for t in TEAMS]
+    assert attack[0] > attack[1] > attack[4] > attack[5], attack
+    assert abs(model.home_rate - 1.5) < 0.25 and abs(model.away_rate - 1.1) < 0.25
+    assert -0.3 <= model.rho <= 0.3 and model.n_matches == len(snap)
+
+    # Unseen teams play at league average
+    lam, mu = model.rates(["Unknown FC"], ["Other FC"])
+    assert np.isclose(lam[0], model.home_rate) and np.isclose(mu[0], model.away_rate)
+    assert LeagueSnapshot(113, []).scoreline_model is None
+    print("SUCCESS: Team strengths recovered from played matches.")
+
+def test_closed_form_markets():
+    print("--- Running Scoreline Market Pricing Test ---")
+    model = ScorelineModel({"A": 0, "B": 1}, np.array([1.4, 0.6]), np.array([0.8, 1.2]), 1.5, 1.1, 0.0, 0)
+    probs = model.predict(["A", "B"], ["B", "A"])
+    lam, mu = probs["lambda"], probs["mu"]
+    assert np.allclose(lam, [1.5 * 1.4 * 1.2, 1.5 * 0.6 * 0.8]) and np.allclose(mu, [1.1 * 0.6 * 0.8, 1.1 * 1.4 * 1.2])
+
+    # Without the low-score correction the markets are independent Poisson closed forms (up to the truncated tail)
+    assert np.allclose(probs["outcome"].sum(axis=1), 1.0)
+    assert np.allclose(probs["GG"], (1 - np.exp(-lam)) * (1 - np.exp(-mu)), atol=1e-4)
+    total = lam + mu
+    assert np.allclose(probs["Under 2.5"], np.exp(-total) * (1 + total + total ** 2 / 2), atol=1e-4)
+    assert np.allclose(probs["Over 2.5"] + probs["Under 2.5"], 1.0)
+    assert np.allclose(probs["1X"], probs["1"] + probs["X"])
+    assert np.allclose(probs["1 & Over 1.5"] + probs["1 & Under 1.5"], probs["1"])
+    assert np.allclose(probs["2-4 Goals"], probs["Over 1.5"] - probs["Over 4.5"])
+
+    # HT/FT adds up to the full-time result; the favourite's most likely score is a home win
+    assert np.allclose(probs["ht_ft"].sum(axis=(1, 2)), 1.0)
+    assert np.allclose(probs["ht_ft"].sum(axis=1), probs["outcome"][:, [1, 0, 2]], atol=1e-4)
+    assert probs["scoreline"][0][0] > probs["scoreline"][0][1]
+
+    # A negative rho moves probability onto 0-0 and 1-1
+    corrected = ScorelineModel(model.team_index, model.attack, model.defence, 1.5, 1.1, -0.1, 0)
+    assert (corrected.predict(["A"], ["B"])["X"] > probs["X"][:1]).all()
+    print("SUCCESS: Every market priced from one scoreline distribution.")
+
+def test_scoreline_engine():
+    print("--- Running Scoreline Prediction Engine Test ---")
+    workdir = tempfile.mkdtemp()
+    engine = create_engine(f"sqlite:///{os.path.join(workdir, 'scoreline.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)
+    modules = (prediction_model, league_snapshot, league_standings, team_names)
+    saved = [m.SessionLocal for m in modules] + [prediction_model.PREDICTION_ENGINE, prediction_model.calculate_corner_estimate,
+                                                 prediction_model._resolve_league_model]
+    for m in modules:
+        m.SessionLocal = session
+    prediction_model.calculate_corner_estimate = lambda fixture_id, api_key: "9-11"
+    try:
+        prediction_model.save_played_matches([
+            {"fixture_id": 880000 + i, "league_id": 880, "season": season, "match_date": day,
+             "home_team": home, "away_team": away, "home_goals": hg, "away_goals": ag}
+            for i, (season, day, home, away, hg, ag) in enumerate(played_rows())
+        ])
+        fixture = {"fixture": {"id": 1}, "league": {"id": 880, "season": 2025},
+                   "teams": {"home": {"id": 1, "name": "Malmo"}, "away": {"id": 2, "name": "Varnamo"}}}
+
+        # The forest engine keeps its picks; the scoreline model still fills the Poisson figure
+        prediction_model._resolve_league_model = lambda league_id, model=None: None
+        forest = prediction_model.get_match_prediction(fixture, None)
+        assert forest["confidence"] == "65.0%" and float(forest["v4_omniscience"]["poisson"]) > 0.5
+
+        # The scoreline engine never loads or trains a forest
+        def no_forest(league_id, model=None):
+            raise AssertionError("the scoreline engine must not resolve a forest")
+        prediction_model._resolve_league_model = no_forest
+        prediction_model.PREDICTION_ENGINE = "scoreline"
+        pred = prediction_model.get_match_prediction(fixture, None)
+        assert pred["main"] == "Malmo Win" and pred["ht_ft"] in ("Home/Home", "Draw/Home")
+        # Goal markets are picked from the priced events: the most likely range and combo, the tightest likely line
+        priced = league_snapshot.get_league_snapshot(880).scoreline_model.predict(["Malmo"], ["Varnamo"])
+        p = lambda label: priced[label][0]
+        ranges = ("0-1 Goals", "1-2 Goals", "2-3 Goals", "2-4 Goals", "3-5 Goals")
+        assert pred["multi_goals"] == max(ranges, key=p)
+        assert pred["combos"].startswith("1 & ") and all(p(pred["combos"]) >= p(f"1 & {leg}") for leg in ("Over 1.5", "Under 3.5", "GG"))
+        assert p(pred["ou_refined"]) > 0.5 and pred["btts"] == ("GG / Yes" if p("GG") >= p("NG") else "NG / No")
+        assert pred["v4_omniscience"]["poisson"] == forest["v4_omniscience"]["poisson"]
+        assert prediction_model.predict_batch([fixture, fixture]) == [pred, pred]
+    finally:
+        for m, s in zip(modules, saved):
+            m.SessionLocal = s
+        prediction_model.PREDICTION_ENGINE, prediction_model.calculate_corner_estimate, prediction_model._resolve_league_model = saved[4:]
+        league_snapshot.invalidate_league_snapshot(880)
+    print("SUCCESS: The scoreline engine picks every market without the forests.")
+
+if __name__ == "__main__":
+    test_scoreline_fit()
+    test_closed_form_markets()
+    test_scoreline_engine()
@@ -0,0 +1,82 @@
+# test_training_cache.py
+import os
+import tempfile
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+import prediction_model
+import training_cache
+from database import MatchTrainingData
+
+def training_row(fixture_id, league_id=5001, **values):
+    row = {
+        "fixture_id": fixture_id, "league_id": league_id, "home_rank": 3, "away_rank": 11,
+        "home_motivation": 1.2, "away_motivation": 1.7, "home_star_power": 6.5, "home_defensive_wall": 9.0,
+        "h2h_dominance": -6, "home_advantage": 1, "home_goals": 2, "away_goals": 1, "result": 1
+    }
+    row.update(values)
+    return row
+
+def test_training_cache():
+    print("--- Running Training Data Loader Test ---")
+    workdir = tempfile.mkdtemp()
+    test_engine = create_engine(f"sqlite:///{os.path.join(workdir, 'train.db')}")
+    database.Base.metadata.create_all(bind=test_engine)
+    saved = prediction_model.SessionLocal, prediction_model.TRAINING_LOAD_CHUNK_ROWS, training_cache.TRAINING_CACHE_DIR
+    prediction_model.SessionLocal = sessionmaker(bind=test_engine)
+    prediction_model.TRAINING_LOAD_CHUNK_ROWS = 7
+    training_cache.TRAINING_CACHE_DIR = os.path.join(workdir, "cache")
+    try:
+        assert prediction_model.load_training_data(5001).empty
+        prediction_model.save_training_data([training_row(i, home_rank=1 + i % 16) for i in range(40)])
+        prediction_model.save_training_data([training_row(100 + i, league_id=5002) for i in range(5)])
+
+        # Streamed in chunks of 7 into compact columns, in id order
+        df = prediction_model.load_training_data(5001)
+        assert list(df.columns) == list(prediction_model.TRAINING_COLUMN_DTYPES)
+        assert dict(df.dtypes) == prediction_model.TRAINING_COLUMN_DTYPES
+        assert len(df) == 40 and list(df["home_rank"][:3]) == [1, 2, 3]
+        assert df["home_motivation"].iloc[0] == np.float32(1.2) and (df["h2h_dominance"] == -6).all()
+        assert len(prediction_model.load_training_data()) == 45
+
+        # A second load memory-maps the cached columns instead of querying the rows
+        db = prediction_model.SessionLocal()
+        _, _, state, key = prediction_model._training_data_key(db, 5001)
+        db.close()
+        cached = training_cache.read(5001, key)
+        assert isinstance(cached["home_rank"], np.memmap) and len(cached["home_rank"]) == 40
+        saved_stream = prediction_model._stream_training_columns
+        prediction_model._stream_training_columns = None # Fails loudly if the database is scanned again
+        try:
+            warm = prediction_model.load_training_data(5001)
+            assert warm.equals(df) and warm.attrs["training_data_state"] == state == 40
+        finally:
+            prediction_model._stream_training_columns = saved_stream
+
+        # Updated rows bump the league's state; other leagues keep their cached data
+        prediction_model.save_training_data([training_row(0, home_rank=9)])
+        assert prediction_model.load_training_data(5001)["home_rank"].iloc[0] == 9
+        assert len(os.listdir(os.path.join(training_cache.TRAINING_CACHE_DIR, "5001"))) == 1
+        db = prediction_model.SessionLocal()
+        assert prediction_model._training_data_key(db, 5002)[3] == "v5-n5-id45"
+
+        # Rows deleted behind the loader's back change the row count, so the cache is not reused
+        db.query(MatchTrainingData).filter(MatchTrainingData.fixture_id < 10).delete()
+        db.commit()
+        db.close()
+        assert len(prediction_model.load_training_data(5001)) == 30
+
+        # NULLs in an integer column keep that column floating
+        db = prediction_model.SessionLocal()
+        db.add(MatchTrainingData(**training_row(500, h2h_dominance=None)))
+        db.commit()
+        db.close()
+        df = prediction_model.load_training_data(5001)
+        assert df["h2h_dominance"].dtype == np.float32 and np.isnan(df["h2h_dominance"].iloc[-1])
+    finally:
+        prediction_model.SessionLocal, prediction_model.TRAINING_LOAD_CHUNK_ROWS, training_cache.TRAINING_CACHE_DIR = saved
+    print("SUCCESS: Training data streams into compact, cached columns.")
+
+if __name__ == "__main__":
+    test_training_cache()
@@ -0,0 +1,60 @@
+# test_upsert.py
+import os
+import datetime
+import tempfile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import database
+from database import MatchTrainingData, LeagueStanding, upsert_rows
+import prediction_model
+
+def training_row(fixture_id, home_rank=1, result=1):
+    return {
+        "fixture_id": fixture_id, "league_id": 113, "home_rank": home_rank, "away_rank": 2,
+        "home_motivation": 1.0, "away_motivation": 1.0, "home_star_power": 5.0,
+        "home_defensive_wall": 5.0, "h2h_dominance": 0, "home_advantage": 1,
+        "home_goals": 1, "away_goals": 0, "result": result
+    }
+
+def test_bulk_upsert():
+    print("--- Running Bulk Upsert Test ---")
+    engine = create_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'upsert.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    saved_session = prediction_model.SessionLocal
+    prediction_model.SessionLocal = sessionmaker(bind=engine)
+    try:
+        db = prediction_model.SessionLocal()
+        columns = prediction_model.TRAINING_UPDATE_COLUMNS
+        inserted, updated = upsert_rows(db, MatchTrainingData, [training_row(i) for i in range(5)],
+                                        update_columns=columns, batch_size=2)
+        assert sorted(inserted) == [0, 1, 2, 3, 4] and updated == []
+
+        # One changed row, one untouched row, one new row and a duplicate key within the batch
+        rows = [training_row(1, home_rank=7), training_row(2), training_row(9), training_row(9, home_rank=3)]
+        inserted, updated = upsert_rows(db, MatchTrainingData, rows, update_columns=columns, batch_size=2)
+        assert inserted == [9] and updated == [1], (inserted, updated)
+        # Without update columns conflicts are left alone
+        assert upsert_rows(db, MatchTrainingData, [training_row(1, home_rank=8)]) == ([], [])
+        db.commit()
+        ranks = dict(db.query(MatchTrainingData.fixture_id, MatchTrainingData.home_rank).all())
+        assert ranks == {0: 1, 1: 7, 2: 1, 3: 1, 4: 1, 9: 1}, ranks
+        db.close()
+
+        # Played matches: re-saving the same results must not count them twice in the standings
+        played = [{
+            "fixture_id": 100 + i, "league_id": 113, "season": "2025", "match_date": datetime.datetime(2025, 4, 1 + i),
+            "home_team": "Hammarby", "away_team": "AIK", "home_goals": 2, "away_goals": 1
+        } for i in range(2)]
+        assert prediction_model.save_played_matches(played) == 2
+        assert prediction_model.save_played_matches(played + [dict(played[0], fixture_id=102)]) == 1
+        db = prediction_model.SessionLocal()
+        hammarby = db.query(LeagueStanding).filter_by(team="Hammarby").one()
+        assert hammarby.points == 9 and hammarby.matches_played == 3, (hammarby.points, hammarby.matches_played)
+        db.close()
+        assert prediction_model.save_training_data([training_row(1, home_rank=7), training_row(20)]) == 1
+    finally:
+        prediction_model.SessionLocal = saved_session
+    print("SUCCESS: Upserts report inserted/updated rows and leave unchanged rows alone.")
+
+if __name__ == "__main__":
+    test_bulk_upsert()
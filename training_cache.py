@@ -0,0 +1,64 @@
+# training_cache.py
+import os
+import json
+import shutil
+import tempfile
+import numpy as np
+
+# Root of the cache: <dir>/<scope>/<data key>/ holds one .npy file per column plus columns.json
+TRAINING_CACHE_DIR = os.getenv("TRAINING_CACHE_DIR", "training_cache")
+# Set to "0" to always load training data from the database
+TRAINING_CACHE_ENABLED = os.getenv("TRAINING_CACHE_ENABLED", "1") != "0"
+
+COLUMNS_FILE = "columns.json"
+
+
+def _scope_dir(scope):
+    return os.path.join(TRAINING_CACHE_DIR, str(scope))
+
+def read(scope, key):
+    """
+    Memory-maps the cached columns of a training set (read-only), as {name: array} in stored
+    order, or returns None when nothing is cached under this data key.
+    """
+    if not TRAINING_CACHE_ENABLED:
+        return None
+    key_dir = os.path.join(_scope_dir(scope), key)
+    try:
+        with open(os.path.join(key_dir, COLUMNS_FILE), "r", encoding="utf-8") as f:
+            names = json.load(f)["columns"]
+        return {name: np.load(os.path.join(key_dir, f"{name}.npy"), mmap_mode="r", allow_pickle=False) for name in names}
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"Error reading cached training data {scope}/{key}: {e}")
+        return None
+
+def write(scope, key, columns):
+    """
+    Stores {name: array} under a data key and drops the scope's older keys. The columns are
+    written into a temporary directory that is renamed into place, so readers never see half a set.
+    """
+    if not TRAINING_CACHE_ENABLED:
+        return
+    scope_dir = _scope_dir(scope)
+    try:
+        os.makedirs(scope_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".write-", dir=scope_dir)
+        try:
+            for name, array in columns.items():
+                np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array), allow_pickle=False)
+            with open(os.path.join(tmp_dir, COLUMNS_FILE), "w", encoding="utf-8") as f:
+                json.dump({"columns": list(columns), "rows": len(next(iter(columns.values()), []))}, f)
+            os.rename(tmp_dir, os.path.join(scope_dir, key))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            # Losing the rename to another process caching the same data key is fine
+            if not os.path.isdir(os.path.join(scope_dir, key)):
+                raise
+        # Readers that mapped an older key keep their mappings; unlinked files live until closed
+        for name in os.listdir(scope_dir):
+            if name != key and not name.startswith("."):
+                shutil.rmtree(os.path.join(scope_dir, name), ignore_errors=True)
+    except Exception as e:
+        print(f"Error caching training data {scope}/{key}: {e}")
@@ -0,0 +1,61 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+import prediction_model
+
+BATCH_SIZES = (1, 16, 64, 256, 1024)
+
+def _median_ms(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+    return float(np.median(times))
+
+def league_model(league_id, train_df):
+    """The league's stored model, or one trained in memory from its training data (nothing is published)."""
+    model = prediction_model.load_cached_model(league_id)
+    if model or train_df.empty:
+        return model
+    return prediction_model.train_model(train_df)
+
+def verify_compiled_inference(league_id=113, repeats=20):
+    """
+    Checks the compiled forests against sklearn's predict_proba on the league's own feature rows
+    (bit for bit) and times both paths for one batch of every size in BATCH_SIZES.
+    """
+    print(f"--- Verifying compiled inference for league {league_id} ---")
+    train_df = prediction_model.fetch_training_data(None, league_id)
+    model = league_model(league_id, train_df)
+    if not model:
+        print(f"[FAIL] No model or training data for league {league_id}.")
+        return False
+    started = time.perf_counter()
+    compiled = prediction_model.compile_market_models(model)
+    print(f"Compiled {len(compiled.roots)} trees ({len(compiled.threshold)} nodes, {compiled.nbytes / 1024:.0f} KiB) "
+          f"in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    rows = prediction_model.FEATURE_SCHEMA.training_frame(train_df).to_numpy(dtype=float)
+    rng = np.random.default_rng(0)
+    ok = True
+    print(f"{'batch':>6} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8}")
+    for size in BATCH_SIZES:
+        X = rows[rng.integers(0, len(rows), size)]
+        frame = pd.DataFrame(X, columns=prediction_model.FEATURE_SCHEMA.columns)
+        reference = {name: clf.predict_proba(frame) for name, clf in model.items()}
+        compiled_out = compiled.predict_proba(np.asarray(X, dtype=np.float32))
+        if not all(np.array_equal(compiled_out[name], reference[name]) for name in model):
+            print(f"[FAIL] batch {size}: compiled probabilities differ from predict_proba")
+            ok = False
+        sk_ms = _median_ms(lambda: [clf.predict_proba(frame) for clf in model.values()], repeats)
+        cf_ms = _median_ms(lambda: compiled.predict_proba(np.asarray(X, dtype=np.float32)), repeats)
+        print(f"{size:>6} {sk_ms:>11.2f} {cf_ms:>12.2f} {sk_ms / cf_ms:>7.1f}x")
+    return ok
+
+if __name__ == "__main__":
+    league = int(sys.argv[1]) if len(sys.argv) > 1 else 113
+    if not verify_compiled_inference(league):
+        sys.exit(1)
+    print("\nCompiled inference matches predict_proba bit for bit.")
@@ -69,17 +69,16 @@ def main():
     model = train_model(train_df)
     print("[SUCCESS] Model trained successfully.")
     
-    # 4.5 Test Model Cache (Pickle)
-    print("\n[Step 4.5] Testing Model Cache (Pickling)...")
+    # 4.5 Test Model Cache (Model Store)
+    print("\n[Step 4.5] Testing Model Cache (Model Store)...")
     from prediction_model import save_cached_model, load_cached_model
+    import model_store
     try:
-        # Remove any existing cache file
-        if os.path.exists("model_113.pkl"):
-            os.remove("model_113.pkl")
-            
-        save_cached_model(model, 113)
-        if not os.path.exists("model_113.pkl"):
-            raise FileNotFoundError("model_113.pkl was not created on disk.")
+        previous = model_store.current_entry(113)
+        save_cached_model(model, 113, train_df)
+        entry = model_store.current_entry(113)
+        if entry is None or (previous and entry["version"] == previous["version"]):
+            raise FileNotFoundError("No new model version was published for league 113.")
             
         loaded_model = load_cached_model(113)
         if not loaded_model:
@@ -0,0 +1,83 @@
+import sys
+import datetime
+import json
+from sqlalchemy import text
+import database
+from database import SessionLocal, PlayedMatch
+
+def played_matches_access_paths(db, league_id=113, team="Malmo FF", opponent="AIK", season="2025"):
+    """The played_matches lookups the prediction engine issues, keyed by the feature they serve."""
+    by_team = (PlayedMatch.home_team == team) | (PlayedMatch.away_team == team)
+    return {
+        "league_snapshot": db.query(PlayedMatch.season, PlayedMatch.home_goals).filter(
+            PlayedMatch.league_id == league_id
+        ).order_by(PlayedMatch.id),
+        "get_local_form": db.query(PlayedMatch).filter(
+            PlayedMatch.league_id == league_id,
+            by_team
+        ).order_by(PlayedMatch.match_date.desc()).limit(5),
+        "get_local_h2h": db.query(PlayedMatch).filter(
+            PlayedMatch.league_id == league_id,
+            (
+                ((PlayedMatch.home_team == team) & (PlayedMatch.away_team == opponent)) |
+                ((PlayedMatch.home_team == opponent) & (PlayedMatch.away_team == team))
+            )
+        ).order_by(PlayedMatch.match_date.desc()).limit(10),
+        "get_local_team_stats": db.query(PlayedMatch).filter(
+            PlayedMatch.league_id == league_id,
+            PlayedMatch.season == season,
+            by_team
+        ),
+        "verify_previous_matches": db.query(PlayedMatch).filter(
+            PlayedMatch.match_date >= datetime.datetime.utcnow() - datetime.timedelta(days=4)
+        ),
+    }
+
+def full_scans(db, query):
+    """Returns the plan lines that read played_matches without an index."""
+    dialect = db.bind.dialect.name
+    compiled = query.statement.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    sql = str(compiled)
+    if dialect == "sqlite":
+        rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+        details = [row[-1] for row in rows]
+        return [d for d in details if d.startswith("SCAN played_matches")]
+    if dialect == "postgresql":
+        # Small tables always favour sequential scans; disable them to check index usability instead
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scans = []
+        def walk(node):
+            if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") == "played_matches":
+                scans.append(f"Seq Scan on {node['Relation Name']}")
+            for child in node.get("Plans", []):
+                walk(child)
+        walk(plan[0]["Plan"])
+        return scans
+    raise ValueError(f"Query plan verification is not implemented for dialect '{dialect}'")
+
+def verify_query_plans():
+    print("--- Verifying played_matches query plans ---")
+    database.init_db()
+    db = SessionLocal()
+    failed = []
+    try:
+        for name, query in played_matches_access_paths(db).items():
+            scans = full_scans(db, query)
+            if scans:
+                failed.append(name)
+                print(f"[FAIL] {name}: {'; '.join(scans)}")
+            else:
+                print(f"[SUCCESS] {name}: index lookup")
+    finally:
+        db.rollback()
+        db.close()
+    return not failed
+
+if __name__ == "__main__":
+    if not verify_query_plans():
+        print("\nFull table scans detected on played_matches. Check the indexes declared in database.py.")
+        sys.exit(1)
+    print("\nAll played_matches access paths use an index.")